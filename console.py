@@ -67,6 +67,16 @@ class HBNBCommand(cmd.Cmd):
             command = "show"
             obj_id = line[line.find('(') + 1: -1]
             return command + " " + class_name + " " + obj_id
+        if re.search("[a-z]+\\.search\\(.*?\\)$", line):
+            class_name = line.split('.')[0]
+            command = "search"
+            text = line[line.find('(') + 1: -1]
+            return command + " " + class_name + " " + text
+        if re.search("[a-z]+\\.aggregate\\(.*?\\)$", line):
+            class_name = line.split('.')[0]
+            command = "aggregate"
+            param = line[line.find('(') + 1: -1].replace(',', ' ')
+            return command + " " + class_name + " " + param
         if re.search("[a-z]+\\.destroy\\(.*?\\)$", line):
             class_name = line.split('.')[0]
             command = "destroy"
@@ -87,9 +97,7 @@ class HBNBCommand(cmd.Cmd):
             if class_name not in avaliable_classes.keys():
                 print("** class doesn't exist **")
                 return ""
-            all_objs = storage.all()
-            obj_name = "{}.{}".format(class_name, obj_id)
-            obj = all_objs.get(obj_name, None)
+            obj = storage.get(avaliable_classes[class_name], obj_id)
             if obj is None:
                 print("** no instance found **")
                 return ""
@@ -108,12 +116,7 @@ class HBNBCommand(cmd.Cmd):
         arg = split(arg)
         if arg[0] not in avaliable_classes.keys():
             return print("** class doesn't exist **")
-        objs = storage.all()
-        count = 0
-        for key in objs:
-            if arg[0] == objs[key].__class__.__name__:
-                count += 1
-        print(count)
+        print(storage.count(avaliable_classes[arg[0]]))
 
     def do_quit(self, arg: str):
         """Quit command to exit the program"""
@@ -151,9 +154,7 @@ class HBNBCommand(cmd.Cmd):
             return print("** class doesn't exist **")
         if len(arg) < 2:
             return print("** instance id missing **")
-        all_objs = storage.all()
-        obj_name = "{}.{}".format(arg[0], arg[1])
-        obj = all_objs.get(obj_name, None)
+        obj = storage.get(avaliable_classes[arg[0]], arg[1])
         if obj is None:
             return print("** no instance found **")
         print(obj)
@@ -165,21 +166,61 @@ class HBNBCommand(cmd.Cmd):
         Display all objects if no class_name is specified else it displays
         all objects of type class_name
         """
-        all_objs = storage.all()
-        to_print = []
         arg = split(arg)
         if len(arg) > 0:
             if arg[0] not in avaliable_classes.keys():
                 return print("** class doesn't exist **")
-            for key in all_objs:
-                if key.split('.')[0] == arg[0]:
-                    to_print.append(all_objs[key].__str__())
-            print(to_print)
-            return
-        for key in all_objs:
-            to_print.append(all_objs[key].__str__())
+            all_objs = storage.all(avaliable_classes[arg[0]])
+        else:
+            all_objs = storage.all()
+        to_print = []
+        for obj in all_objs.values():
+            to_print.append(obj.__str__())
         print(to_print)
 
+    def do_search(self, arg):
+        """
+        Usage: search <class_name> <text> or <class_name>.search(<text>)
+
+        Displays the objects of type class_name matching the words of text,
+        best match first
+        """
+        arg = split(arg)
+        if len(arg) < 1:
+            return print("** class name missing **")
+        if arg[0] not in avaliable_classes.keys():
+            return print("** class doesn't exist **")
+        if len(arg) < 2:
+            return print("** search text missing **")
+        found = storage.search(avaliable_classes[arg[0]], " ".join(arg[1:]))
+        print([obj.__str__() for obj in found])
+
+    def do_aggregate(self, arg):
+        """
+        Usage: aggregate <class_name> <group_by>[:<label>] [<metric>=<attr>]
+or <class_name>.aggregate(<group_by>[:<label>], [<metric>=<attr>])
+
+        Displays the metrics of the objects of type class_name grouped by the
+        attribute group_by, eg. aggregate Place city_id:name
+        avg=price_by_night count=*. It counts the objects by default
+        """
+        arg = split(arg)
+        if len(arg) < 1:
+            return print("** class name missing **")
+        if arg[0] not in avaliable_classes.keys():
+            return print("** class doesn't exist **")
+        if len(arg) < 2:
+            return print("** group by attribute missing **")
+        group_by, _, label = arg[1].partition(":")
+        metrics = dict(metric.partition("=")[::2] for metric in arg[2:])
+        try:
+            groups = storage.aggregate(avaliable_classes[arg[0]], group_by,
+                                       metrics, label or None)
+        except ValueError as error:
+            return print("** {} **".format(error))
+        for value, row in groups.items():
+            print(value, row)
+
     def do_destroy(self, arg):
         """
         Usage: destroy <class_name> <object_id> or \
@@ -194,10 +235,10 @@ class HBNBCommand(cmd.Cmd):
             return print("** class doesn't exist **")
         if len(arg) < 2:
             return print("** instance id missing **")
-        all_objs = storage.all()
-        obj_name = "{}.{}".format(arg[0], arg[1])
-        if all_objs.pop(obj_name, None) is None:
+        obj = storage.get(avaliable_classes[arg[0]], arg[1])
+        if obj is None:
             return print("** no instance found **")
+        storage.delete(obj)
         storage.save()
 
     def do_update(self, arg):
@@ -216,9 +257,7 @@ or <class name>.update(<id>, <dictionary representation>)
             return print("** class doesn't exist **")
         if len(arg) < 2:
             return print("** instance id missing **")
-        all_objs = storage.all()
-        obj_name = "{}.{}".format(arg[0], arg[1])
-        obj = all_objs.get(obj_name, None)
+        obj = storage.get(avaliable_classes[arg[0]], arg[1])
         if obj is None:
             return print("** no instance found **")
         if len(arg) < 3:
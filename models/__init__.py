@@ -1,6 +1,24 @@
 #!/usr/bin/python3
 """This module declares the storage object"""
+import os
 from models.engine import file_storage
 
-storage = file_storage.FileStorage()
+if os.getenv("HBNB_TYPE_STORAGE") == "sqlite":
+    from models.engine import sqlite_storage
+    storage = sqlite_storage.SQLiteStorage(
+        os.getenv("HBNB_SQLITE_PATH", "hbnb.db"))
+else:
+    storage = file_storage.FileStorage()
+    if os.getenv("HBNB_FILE_JOURNAL") == "1":
+        storage.configure(journal=True)
+    if os.getenv("HBNB_FILE_FORMAT") == "binary":
+        storage.configure(format="binary")
+    if os.getenv("HBNB_FILE_LAZY") == "1":
+        storage.configure(lazy=True)
+    if os.getenv("HBNB_FILE_SEGMENTS"):
+        storage.configure(segments=int(os.getenv("HBNB_FILE_SEGMENTS")))
+    if os.getenv("HBNB_FILE_LAYOUT") == "class":
+        storage.configure(layout="class")
+    if os.getenv("HBNB_COMPACT_MODELS") == "1":
+        storage.configure(compact=True)
 storage.reload()
@@ -5,7 +5,10 @@ from models.base_model import BaseModel
 
 class Amenity(BaseModel):
     """Defines an Amenity object"""
-    name = ""
+
+    __slots__ = ()
+
+    name: str = ""
 
     def __init__(self, *args, **kwargs):
         """
@@ -1,12 +1,160 @@
 #!/usr/bin/python3
-"""This module defines a BaseModel class"""
+"""This module defines a BaseModel class and the compact versions of the
+ model classes"""
 import uuid
 import datetime
 import models
 
 
+class Timestamp:
+    """Defines the descriptor of a datetime attribute stored in the slot of
+    the same name prefixed with an underscore. A value given as isoformat
+    text is only parsed the first time it is read, and the text is kept to
+    serialize the value again as long as it is not changed"""
+
+    def __set_name__(self, owner, name):
+        """
+        __set_name__ binds the descriptor to its attribute and slot
+
+        :param owner(type): is the class holding the descriptor
+        :param name(str): is the name of the attribute
+        """
+        self.name = name
+        self.slot = owner.__dict__["_" + name]
+
+    def __get__(self, obj, objtype=None):
+        """
+        __get__ returns the datetime of obj, parsing its text on first read
+
+        :param obj(BaseModel): is the object
+        :param objtype(type): is the class of obj
+        :return (datetime): is the value of the attribute
+        """
+        if obj is None:
+            return self
+        try:
+            value = self.slot.__get__(obj)
+        except AttributeError:
+            raise AttributeError("'{}' object has no attribute '{}'".format(
+                obj.__class__.__name__, self.name)) from None
+        if value.__class__ is tuple:
+            return value[0]
+        if value.__class__ is str:
+            parsed = datetime.datetime.fromisoformat(value)
+            self.slot.__set__(obj, (parsed, value))
+            return parsed
+        return value
+
+    def __set__(self, obj, value):
+        """
+        __set__ stores value as it is, text included
+
+        :param obj(BaseModel): is the object
+        :param value(datetime|str): is the datetime or its isoformat text
+        """
+        if not isinstance(value, (str, datetime.date)):
+            raise TypeError("{} must be a datetime or an isoformat string, "
+                            "not {}".format(self.name, type(value).__name__))
+        self.slot.__set__(obj, value)
+
+    def __delete__(self, obj):
+        """
+        __delete__ unsets the attribute
+
+        :param obj(BaseModel): is the object
+        """
+        self.slot.__delete__(obj)
+
+    def export(self, obj, attrs, text=False):
+        """
+        export adds the value of the attribute of obj to attrs when it is set
+
+        :param obj(BaseModel): is the object
+        :param attrs(dict): is the dict to add the value to
+        :param text(bool): when True the value is added as isoformat text,
+        reusing the text it was given as when it did not change
+        """
+        try:
+            value = self.slot.__get__(obj)
+        except AttributeError:
+            return
+        if not text:
+            attrs[self.name] = self.__get__(obj)
+        elif value.__class__ is tuple:
+            attrs[self.name] = value[1]
+        elif value.__class__ is str:
+            attrs[self.name] = value
+        else:
+            attrs[self.name] = value.isoformat()
+
+    def restore(self, obj, attrs):
+        """
+        restore sets the attribute of obj from attrs, or unsets it when attrs
+        does not hold it
+
+        :param obj(BaseModel): is the object
+        :param attrs(dict): is the dict of the attributes
+        """
+        if self.name in attrs:
+            self.__set__(obj, attrs[self.name])
+        else:
+            try:
+                self.slot.__delete__(obj)
+            except AttributeError:
+                pass
+
+
+class ListDefault:
+    """Defines the descriptor of a list attribute defaulting to an empty
+    list. An object reading the default gets its own list, stored in its
+    __dict__, so that appending to it does not change the other objects.
+    The compact objects keep the field in a slot instead"""
+
+    def __set_name__(self, owner, name):
+        """
+        __set_name__ binds the descriptor to its attribute
+
+        :param owner(type): is the class holding the descriptor
+        :param name(str): is the name of the attribute
+        """
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        """
+        __get__ returns a new empty list, which becomes the value of the
+        attribute of obj
+
+        :param obj(BaseModel): is the object
+        :param objtype(type): is the class of obj
+        :return (list): is the new list
+        """
+        value = []
+        if obj is not None:
+            obj.__dict__[self.name] = value
+        return value
+
+
 class BaseModel:
-    """Defines a BaseModel object"""
+    """Defines a BaseModel object. The model classes only declare slots, and
+    their objects are made from a DictModel or a CompactModel version of the
+    class which decides where the attributes are stored"""
+
+    __slots__ = ("_dirty", "_created_at", "_updated_at")
+
+    id: str
+    created_at: datetime.datetime = Timestamp()
+    updated_at: datetime.datetime = Timestamp()
+
+    def __new__(cls, *args, **kwargs):
+        """
+        __new__ creates the object from the version of cls storing its
+        attributes in a __dict__, unless cls is compact or already has one
+
+        :param args(tuple): unused
+        :param kwargs(dict): unused
+        :return (BaseModel): is the new object
+        """
+        return object.__new__(dict_classes.get(cls) or dict_class(cls))
 
     def __init__(self, *args, **kwargs):
         """
@@ -15,19 +163,32 @@ class BaseModel:
         :param args(tuple): unused
         :param kwargs(dict): is a dict of key/value pairs to init the object
         """
+        object.__setattr__(self, "_dirty", True)
         if kwargs:
             for key, val in kwargs.items():
                 if key == "__class__":
                     continue
-                if key in ["created_at", "updated_at"]:
-                    val = datetime.datetime.fromisoformat(val)
                 setattr(self, key, val)
+            self._dirty = False
         else:
             self.id = str(uuid.uuid4())
             self.created_at = datetime.datetime.today()
             self.updated_at = self.created_at
             models.storage.new(self)
 
+    def __setattr__(self, name, value):
+        """
+        __setattr__ sets the attribute and marks a clean object as dirty so
+        the storage re-serializes it on the next save
+
+        :param name(str): is the name of the attribute
+        :param value(any): is the new value of the attribute
+        """
+        if self._dirty is False:
+            object.__setattr__(self, "_dirty", True)
+            models.storage.mark_dirty(self)
+        object.__setattr__(self, name, value)
+
     def __str__(self):
         """
         __str__ return the string representation of this object
@@ -35,13 +196,27 @@ class BaseModel:
         :return (str): is the string representation of the object
         """
         return "[{}] ({}) {}".format(
-            self.__class__.__name__, self.id, self.__dict__)
+            self.__class__.__name__, self.id, self.get_attributes())
+
+    @classmethod
+    def fields(cls):
+        """
+        fields returns the fields declared by the class and its bases
+
+        :return (dict): maps the name of each field to its type, the fields
+        of the bases first
+        """
+        fields = {}
+        for klass in reversed(cls.__mro__):
+            fields.update(klass.__dict__.get("__annotations__", {}))
+        return fields
 
     def save(self):
         """
         save updates the object
         """
         self.updated_at = datetime.datetime.today()
+        models.storage.new(self)
         models.storage.save()
 
     def to_dict(self):
@@ -51,10 +226,219 @@ class BaseModel:
         :return (dict): is the dictionary form of the object with created_at
         and updated_at as strings
         """
-        dict_form = self.__dict__.copy()
+        dict_form = self.get_attributes(text=True)
         dict_form["__class__"] = self.__class__.__name__
-        dict_form["created_at"] = datetime.datetime.isoformat(
-            dict_form["created_at"])
-        dict_form["updated_at"] = datetime.datetime.isoformat(
-            dict_form["updated_at"])
         return dict_form
+
+
+timestamps = (BaseModel.created_at, BaseModel.updated_at)
+timestamp_names = frozenset(timestamp.name for timestamp in timestamps)
+
+
+class DictModel:
+    """Defines the behaviour of the model classes made by dict_class, whose
+    objects store the attributes other than the timestamps in a __dict__"""
+
+    __slots__ = ("__dict__",)
+
+    def get_attributes(self, text=False):
+        """
+        get_attributes returns the attributes set on the object, leaving out
+        the defaults of the class
+
+        :param text(bool): when True created_at and updated_at are given as
+        isoformat text, without parsing them when they were not read yet
+        :return (dict): is a new dict of the attributes, with created_at and
+        updated_at right after the id as when they were in the __dict__
+        """
+        attrs = {}
+        if "id" in self.__dict__:
+            attrs["id"] = self.__dict__["id"]
+        for timestamp in timestamps:
+            timestamp.export(self, attrs, text)
+        attrs.update(self.__dict__)
+        return attrs
+
+    def set_attributes(self, attrs):
+        """
+        set_attributes replaces the attributes set on the object without
+        marking it dirty
+
+        :param attrs(dict): is the dict of the new attributes
+        """
+        self.__dict__.clear()
+        for timestamp in timestamps:
+            timestamp.restore(self, attrs)
+        self.__dict__.update((name, value) for name, value in attrs.items()
+                             if name not in timestamp_names)
+
+
+class CompactModel:
+    """Defines the behaviour of the compact model classes made by
+    compact_class. The declared fields of their objects are stored in slots,
+    the other attributes in an overflow dict created when the first one is
+    set"""
+
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        """
+        __getattr__ returns the attributes that are neither in a set slot nor
+        in the class: the overflow attributes and the field defaults
+
+        :param name(str): is the name of the attribute
+        :return (any): is the value of the attribute, a new list set in the
+        slot for a list default
+        """
+        if name == "_extra":
+            return None
+        extra = self._extra
+        if extra is not None and name in extra:
+            return extra[name]
+        try:
+            value = self._defaults[name]
+        except KeyError:
+            raise AttributeError("'{}' object has no attribute '{}'".format(
+                self.__class__.__name__, name)) from None
+        if value.__class__ is list:
+            value = list(value)
+            object.__setattr__(self, name, value)
+        return value
+
+    def __setattr__(self, name, value):
+        """
+        __setattr__ sets a field in its slot and any other attribute in the
+        overflow dict, marking a clean object as dirty
+
+        :param name(str): is the name of the attribute
+        :param value(any): is the new value of the attribute
+        """
+        if name in self._slotted:
+            super().__setattr__(name, value)
+            return
+        if self._dirty is False:
+            object.__setattr__(self, "_dirty", True)
+            models.storage.mark_dirty(self)
+        if self._extra is None:
+            object.__setattr__(self, "_extra", {})
+        self._extra[name] = value
+
+    def __delattr__(self, name):
+        """
+        __delattr__ removes an attribute from its slot or the overflow dict
+
+        :param name(str): is the name of the attribute
+        """
+        if name in self._slotted:
+            object.__delattr__(self, name)
+        elif self._extra is not None and name in self._extra:
+            del self._extra[name]
+        else:
+            raise AttributeError(name)
+
+    def get_attributes(self, text=False):
+        """
+        get_attributes returns the attributes set on the object, leaving out
+        the defaults of the class
+
+        :param text(bool): when True created_at and updated_at are given as
+        isoformat text, without parsing them when they were not read yet
+        :return (dict): is a new dict of the fields in declaration order,
+        created_at and updated_at right after the id, followed by the
+        overflow attributes
+        """
+        attrs = {}
+        for name, slot in self._slots:
+            try:
+                attrs[name] = slot.__get__(self)
+            except AttributeError:
+                pass
+            if name == "id":
+                for timestamp in timestamps:
+                    timestamp.export(self, attrs, text)
+        if self._extra:
+            attrs.update(self._extra)
+        return attrs
+
+    def set_attributes(self, attrs):
+        """
+        set_attributes replaces the attributes set on the object without
+        marking it dirty
+
+        :param attrs(dict): is the dict of the new attributes
+        """
+        for name, slot in self._slots:
+            if name in attrs:
+                slot.__set__(self, attrs[name])
+                continue
+            try:
+                slot.__delete__(self)
+            except AttributeError:
+                pass
+        for timestamp in timestamps:
+            timestamp.restore(self, attrs)
+        extra = {name: value for name, value in attrs.items()
+                 if name not in self._slotted}
+        object.__setattr__(self, "_extra", extra or None)
+
+
+dict_classes = {}
+
+
+def dict_class(cls):
+    """
+    dict_class returns the version of the model class cls whose objects
+    store their attributes in a __dict__, a subclass with the same name. A
+    compact class and a class whose objects already have a __dict__ are
+    returned as they are
+
+    :param cls(type): is a subclass of BaseModel
+    :return (type): is the class the objects of cls are made from
+    """
+    dict_cls = dict_classes.get(cls)
+    if dict_cls is not None:
+        return dict_cls
+    if cls.__dictoffset__ or issubclass(cls, CompactModel):
+        dict_cls = cls
+    else:
+        dict_cls = type(cls.__name__, (DictModel, cls), {
+            "__slots__": (),
+            "__module__": cls.__module__,
+            "__qualname__": cls.__qualname__,
+            "__doc__": cls.__doc__})
+    dict_classes[cls] = dict_classes[dict_cls] = dict_cls
+    return dict_cls
+
+
+compact_classes = {}
+
+
+def compact_class(cls):
+    """
+    compact_class returns the compact version of the model class cls, a
+    subclass with the same name whose objects store the fields declared by
+    cls in slots instead of a per-object __dict__
+
+    :param cls(type): is a subclass of BaseModel
+    :return (type): is the compact class
+    """
+    compact_cls = compact_classes.get(cls)
+    if compact_cls is not None:
+        return compact_cls
+    if DictModel in cls.__bases__:
+        cls = cls.__bases__[-1]
+    fields = tuple(name for name in cls.fields()
+                   if not hasattr(getattr(cls, name, None), "__set__"))
+    compact_cls = type(cls.__name__, (CompactModel, cls), {
+        "__slots__": fields + ("_extra",),
+        "__module__": cls.__module__,
+        "__qualname__": cls.__qualname__,
+        "__doc__": cls.__doc__,
+        "_defaults": {name: getattr(cls, name) for name in fields
+                      if hasattr(cls, name)},
+        "_slotted": frozenset(fields + ("_dirty",)) | timestamp_names})
+    compact_cls._slots = tuple((name, compact_cls.__dict__[name])
+                               for name in fields)
+    compact_classes[cls] = compact_classes[compact_cls] = compact_cls
+    compact_classes[dict_class(cls)] = compact_cls
+    return compact_cls
@@ -1,13 +1,17 @@
 #!/usr/bin/python3
 """This module defines a City class"""
+import models
 from models.base_model import BaseModel
+from models.place import Place
 
 
 class City(BaseModel):
     """Defines a city Object"""
 
-    state_id = ""
-    name = ""
+    __slots__ = ()
+
+    state_id: str = ""
+    name: str = ""
 
     def __init__(self, *args, **kwargs):
         """
@@ -17,3 +21,13 @@ class City(BaseModel):
         :param kwargs(dict): is a dict of key/value pairs to init the object
         """
         super().__init__(*args, **kwargs)
+
+    @property
+    def places(self):
+        """
+        places returns the places of this city
+
+        :return (list[Place]): is the list of places whose city_id is the id
+        of this city
+        """
+        return list(models.storage.find_by(Place, "city_id", self.id).values())
@@ -0,0 +1,589 @@
+#!/usr/bin/python3
+"""Defines the aggregate function that groups the objects of a class by an
+ attribute and computes metrics over each group in a single pass, reading
+ the groups from a hash index when one is kept on the attribute, and the
+ MaterializedView class that keeps such metrics up to date"""
+
+functions = ("count", "sum", "avg", "min", "max")
+
+
+def parse_metrics(metrics):
+    """
+    parse_metrics checks the metrics given to aggregate
+
+    :param metrics(dict): maps the name of each metric to the attribute it
+    is computed over, "*" to count the objects. The name is the function
+    (count, sum, avg, min or max) unless the attribute is written
+    function:attribute, eg. {"avg": "price_by_night", "count": "*",
+    "top": "max:price_by_night"}
+    :return (list): is the list of the name, function and attribute of each
+    metric, the attribute being None for count(*)
+    """
+    parsed = []
+    for name, spec in metrics.items():
+        function, _, attr = spec.rpartition(":")
+        function = function or name
+        if function not in functions:
+            raise ValueError("unknown function {}".format(function))
+        if attr == "*":
+            if function != "count":
+                raise ValueError("{}(*) is not supported".format(function))
+            attr = None
+        parsed.append((name, function, attr))
+    return parsed
+
+
+def parent_class(attr, classes):
+    """
+    parent_class returns the class an attribute refers to by its name,
+    eg. City for city_id
+
+    :param attr(str): is the name of the attribute
+    :param classes(dict): maps the class names to the classes
+    :return (type): is the class
+    """
+    name = "".join(part.capitalize() for part in
+                   attr[:-3].split("_")) if attr.endswith("_id") else None
+    if name not in classes:
+        raise ValueError("{} does not refer to a class".format(attr))
+    return classes[name]
+
+
+def accumulate(state, objects, metrics):
+    """
+    accumulate adds the objects of a group to its state
+
+    :param state(list): is the state of the group, one slot per metric and
+    two for avg, the sum and the number of values
+    :param objects(list): is the objects of the group
+    :param metrics(list): is the parsed metrics
+    """
+    slot = 0
+    for name, function, attr in metrics:
+        if attr is None:
+            state[slot] += len(objects)
+            slot += 1
+            continue
+        values = [getattr(obj, attr, None) for obj in objects]
+        if function == "count":
+            state[slot] += len(values) - values.count(None)
+            slot += 1
+            continue
+        values = [value for value in values if isinstance(
+            value, (int, float)) and not isinstance(value, bool)]
+        if function == "avg":
+            state[slot] += sum(values)
+            state[slot + 1] += len(values)
+            slot += 2
+            continue
+        if function == "sum":
+            state[slot] += sum(values)
+        elif values:
+            pick = min if function == "min" else max
+            state[slot] = pick(values) if state[slot] is None else \
+                pick(state[slot], pick(values))
+        slot += 1
+
+
+def merge(state, other, metrics):
+    """
+    merge adds the state of a group to the state of another one
+
+    :param state(list): is the state that is updated
+    :param other(list): is the state that is added
+    :param metrics(list): is the parsed metrics
+    """
+    slot = 0
+    for name, function, attr in metrics:
+        if function in ("min", "max"):
+            if state[slot] is None or other[slot] is not None and \
+                    (other[slot] < state[slot] if function == "min"
+                     else other[slot] > state[slot]):
+                state[slot] = other[slot]
+        else:
+            state[slot] += other[slot]
+        if function == "avg":
+            slot += 1
+            state[slot] += other[slot]
+        slot += 1
+
+
+def join(storage, groups, attr, parent_attr, metrics, classes):
+    """
+    join regroups groups keyed by the value of attr by the value of
+    parent_attr in the objects attr refers to, reading each of them once
+
+    :param storage(FileStorage): is the storage engine holding the objects
+    :param groups(dict): maps each value of attr to the state of its group
+    :param attr(str): is the name of the attribute the groups are keyed by
+    :param parent_attr(str): is the name of the attribute of the referred
+    objects to group by
+    :param metrics(list): is the parsed metrics
+    :param classes(dict): maps the class names to the classes
+    :return (dict): maps each value of parent_attr to the state of its group
+    """
+    parent = parent_class(attr, classes)
+    joined = {}
+    for value, state in groups.items():
+        obj = storage.get(parent, value) if isinstance(value, str) else None
+        key = getattr(obj, parent_attr, None)
+        try:
+            if key not in joined:
+                joined[key] = initial_state(metrics)
+        except TypeError:
+            continue
+        merge(joined[key], state, metrics)
+    return joined
+
+
+def initial_state(metrics):
+    """
+    initial_state returns the state of an empty group
+
+    :param metrics(list): is the parsed metrics
+    :return (list): is the state
+    """
+    state = []
+    for name, function, attr in metrics:
+        if function == "avg":
+            state += [0, 0]
+        elif function in ("min", "max"):
+            state.append(None)
+        else:
+            state.append(0)
+    return state
+
+
+def results(state, metrics):
+    """
+    results returns the metrics of a group from its state
+
+    :param state(list): is the state of the group
+    :param metrics(list): is the parsed metrics
+    :return (dict): maps the name of each metric to its value
+    """
+    row = {}
+    slot = 0
+    for name, function, attr in metrics:
+        if function == "avg":
+            row[name] = state[slot] / state[slot + 1] if state[slot + 1] \
+                else None
+            slot += 2
+            continue
+        row[name] = state[slot]
+        slot += 1
+    return row
+
+
+def aggregate(storage, cls, group_by=None, metrics=None, label=None,
+              conditions=None, classes=None):
+    """
+    aggregate groups the objects of type cls by the value of group_by and
+    computes metrics over each group. The objects are put in a hash table
+    of groups in a single pass, or the groups are read from the hash index
+    of group_by when there is one and no conditions, in which case counting
+    the objects of each group reads none of them
+
+    :param storage(FileStorage): is the storage engine holding the objects
+    :param cls(type): is the class of the objects
+    :param group_by(str): is the name of the attribute the objects are
+    grouped by, None for a single group. Attributes referring to another
+    class are followed with dots, eg. "city_id.state_id" groups places by
+    the state of their city
+    :param metrics(dict): is the metrics to compute as described in
+    parse_metrics, {"count": "*"} by default
+    :param label(str): is an attribute of the class group_by refers to,
+    eg. "name" for the name of the city of a city_id group, added to each
+    group under "label"
+    :param conditions(dict): is a dict of conditions the objects must match,
+    written like in Query.where
+    :param classes(dict): maps the class names to the classes group_by and
+    label can refer to
+    :return (dict): maps each group value to the dict of its metrics
+    """
+    metrics = parse_metrics(metrics or {"count": "*"})
+    path = group_by.split(".") if group_by else []
+    classes = classes or {}
+    groups = {}
+    index = storage.get_index(cls, path[0]) \
+        if path and not conditions else None
+    if index is not None and hasattr(index, "groups"):
+        buckets = index.groups()
+    else:
+        objects = storage.query(cls).where(**conditions) if conditions \
+            else storage.all(cls).values()
+        buckets = {}
+        for obj in objects:
+            value = getattr(obj, path[0], None) if path else None
+            try:
+                bucket = buckets.get(value)
+            except TypeError:
+                continue
+            if bucket is None:
+                buckets[value] = bucket = []
+            bucket.append(obj)
+        buckets = buckets.items()
+    for value, objects in buckets:
+        groups[value] = initial_state(metrics)
+        accumulate(groups[value], objects, metrics)
+    for attr, parent_attr in zip(path, path[1:]):
+        groups = join(storage, groups, attr, parent_attr, metrics, classes)
+    found = {value: results(state, metrics)
+             for value, state in groups.items()}
+    if label is not None and path:
+        parent = parent_class(path[-1], classes)
+        for value, row in found.items():
+            obj = storage.get(parent, value) if isinstance(value, str) \
+                else None
+            row["label"] = getattr(obj, label, None)
+    return found
+
+
+class MaterializedView:
+    """Keeps the metrics of aggregate over the objects of a class up to date
+    as the objects are added, changed and removed, instead of computing them
+    again. The part each object adds to its group is kept so that it can be
+    taken back, which limits the metrics to count, sum and avg. The view
+    is only built when first used. Only the groups are saved by dump, so a
+    view restored by load answers from them until an object is added or
+    discarded, the part of each object being then counted again"""
+
+    def __init__(self, group_by, metrics):
+        """
+        __init__ instantiates a MaterializedView object
+
+        :param group_by(str): is the name of the attribute the objects are
+        grouped by
+        :param metrics(dict): is the metrics as described in parse_metrics
+        """
+        self.attr = group_by
+        self.metrics = dict(metrics)
+        self.__metrics = parse_metrics(metrics)
+        for name, function, attr in self.__metrics:
+            if function in ("min", "max"):
+                raise ValueError("{} cannot be maintained by a view".format(
+                    function))
+        self.__unit = None
+        if all(attr is None for name, function, attr in self.__metrics):
+            self.__unit = initial_state(self.__metrics)
+            accumulate(self.__unit, (None,), self.__metrics)
+        self.__groups = {}
+        self.__rows = {}
+        self.__members = None
+        self.__partial = False
+        self.__lost = False
+        self.__saved = None
+        self.__trusted = False
+        self.__deferred = None
+        self.__touched = set()
+        self.__changes = set()
+        self.__cleared = True
+        self.__loaded = False
+        self.changed = True
+
+    def __len__(self):
+        """
+        __len__ returns the number of objects in the view
+
+        :return (int): is the number of objects
+        """
+        self.__ready()
+        return sum(group[0] for group in self.__groups.values())
+
+    @property
+    def loaded(self):
+        """
+        loaded returns whether the content of the view was restored by load
+
+        :return (bool): is True when the view was restored
+        """
+        self.__restore()
+        return self.__loaded
+
+    @property
+    def built(self):
+        """
+        built tells whether the groups account for the objects given to the
+        view, which is not the case when the groups given to load could not
+        be read and no build followed
+
+        :return (bool): is True when the groups can be saved
+        """
+        self.__restore()
+        return not self.__lost
+
+    def add(self, key, obj):
+        """
+        add counts obj in the group of its current value, taking it out of
+        its previous group first unless nothing it adds changed
+
+        :param key(str): is the storage key of obj
+        :param obj(BaseModel): is the object
+        """
+        if self.__deferred is not None:
+            self.__deferred[key] = obj
+            self.__touched.add(key)
+            return
+        self.__ready()
+        self.__recount()
+        self.__count(key, obj)
+
+    def __count(self, key, obj):
+        """
+        __count counts obj in the group of its current value
+
+        :param key(str): is the storage key of obj
+        :param obj(BaseModel): is the object
+        """
+        value = getattr(obj, self.attr, None)
+        try:
+            hash(value)
+        except TypeError:
+            self.__uncount(key)
+            return
+        row = self.__row(obj)
+        old = self.__rows.get(key)
+        if old is not None and old[0] == value and old[1] == row:
+            return
+        self.__uncount(key)
+        self.__rows[key] = (value, row)
+        group = self.__groups.get(value)
+        if group is None:
+            group = self.__groups[value] = [0] * (len(row) + 1)
+        group[0] += 1
+        for i, item in enumerate(row, 1):
+            group[i] += item
+        self.__changes.add(value)
+        self.changed = True
+
+    def __row(self, obj):
+        """
+        __row returns the part obj adds to its group, the same list for
+        every object when no metric reads an attribute
+
+        :param obj(BaseModel): is the object
+        :return (list): is the state of a group holding only obj
+        """
+        if self.__unit is not None:
+            return self.__unit
+        row = initial_state(self.__metrics)
+        accumulate(row, (obj,), self.__metrics)
+        return row
+
+    def discard(self, key):
+        """
+        discard takes the object stored under key out of its group
+
+        :param key(str): is the storage key of the object
+        """
+        if self.__deferred is not None:
+            self.__deferred.pop(key, None)
+            self.__touched.add(key)
+            return
+        self.__ready()
+        self.__recount()
+        self.__uncount(key)
+
+    def __uncount(self, key):
+        """
+        __uncount takes the object stored under key out of its group
+
+        :param key(str): is the storage key of the object
+        """
+        old = self.__rows.pop(key, None)
+        if old is None:
+            return
+        value, row = old
+        group = self.__groups[value]
+        group[0] -= 1
+        if not group[0]:
+            del self.__groups[value]
+        else:
+            for i, item in enumerate(row, 1):
+                group[i] -= item
+        self.__changes.add(value)
+        self.changed = True
+
+    def clear(self):
+        """
+        clear removes every object from the view
+        """
+        self.__groups = {}
+        self.__rows = {}
+        self.__members = None
+        self.__partial = False
+        self.__lost = False
+        self.__saved = None
+        self.__trusted = False
+        self.__deferred = None
+        self.__touched = set()
+        self.__changes = set()
+        self.__cleared = True
+        self.__loaded = False
+        self.changed = True
+
+    def build(self, objects):
+        """
+        build makes the view hold exactly the given objects once it is first
+        used, only updating the groups for the objects that changed since
+        they were added. Right after load, the restored groups are kept as
+        long as no object is added or discarded
+
+        :param objects(dict): maps the storage keys to the objects
+        """
+        if self.__deferred is not None:
+            self.__trusted = False
+        self.__deferred = dict(objects)
+        self.__lost = False
+        self.__touched = set()
+
+    def __ready(self):
+        """
+        __ready counts the objects given to build in their groups, keeping
+        the restored groups when no object was added or discarded since load
+        """
+        self.__restore()
+        if self.__deferred is None:
+            return
+        objects = self.__deferred
+        touched = self.__touched
+        trusted = self.__trusted
+        self.__deferred = None
+        self.__touched = set()
+        self.__trusted = False
+        if self.__partial and self.__members is None:
+            self.__members = objects
+            if not trusted or touched:
+                self.__recount()
+            return
+        self.__recount()
+        for key in [key for key in self.__rows if key not in objects]:
+            self.__uncount(key)
+        for key, obj in objects.items():
+            self.__count(key, obj)
+
+    def __recount(self):
+        """
+        __recount counts the groups again from the objects attached since
+        load, since the part of each object is not saved by dump, noting the
+        groups that differ from the restored ones
+        """
+        if not self.__partial:
+            return
+        members = self.__members or {}
+        self.__members = None
+        self.__partial = False
+        saved = self.__groups
+        groups = self.__groups = {}
+        rows = self.__rows = {}
+        for key, obj in members.items():
+            value = getattr(obj, self.attr, None)
+            try:
+                group = groups.get(value)
+            except TypeError:
+                continue
+            row = self.__row(obj)
+            rows[key] = (value, row)
+            if group is None:
+                group = groups[value] = [0] * (len(row) + 1)
+            group[0] += 1
+            for i, item in enumerate(row, 1):
+                group[i] += item
+        for value in saved.keys() | groups.keys():
+            if saved.get(value) != groups.get(value):
+                self.__changes.add(value)
+                self.changed = True
+
+    def __restore(self):
+        """
+        __restore reads the groups given to load the first time the view is
+        used
+        """
+        if self.__saved is None:
+            return
+        saved = self.__saved
+        self.__saved = None
+        try:
+            groups = dict(saved()["groups"])
+        except (KeyError, TypeError, ValueError):
+            self.__trusted = False
+            self.__lost = self.__deferred is None
+            self.changed = True
+            return
+        self.__groups = groups
+        self.__rows = {}
+        self.__partial = True
+        self.__changes = set()
+        self.__cleared = False
+        self.__loaded = True
+
+    def dump(self):
+        """
+        dump returns the groups of the view in a form json can serialize
+
+        :return (dict): holds the groups
+        """
+        self.__ready()
+        self.__changes = set()
+        self.__cleared = False
+        self.changed = False
+        return {"groups": [[value, group]
+                           for value, group in self.__groups.items()]}
+
+    def dump_changes(self):
+        """
+        dump_changes returns the groups changed since the last dump or load,
+        in a form json can serialize
+
+        :return (dict): holds the changed groups, None for the emptied ones.
+        The whole dict is None when the view was cleared since, and has to
+        be dumped whole
+        """
+        self.__ready()
+        if self.__cleared:
+            return None
+        groups = self.__groups
+        changes = [[value, groups.get(value)] for value in self.__changes]
+        self.__changes = set()
+        self.changed = False
+        return {"groups": changes}
+
+    def load(self, data):
+        """
+        load replaces the content of the view with the output of dump. data
+        can also be a function returning it, called when the view is first
+        used. The objects must then be attached again with build
+
+        :param data(dict): is the output of dump
+        """
+        self.clear()
+        self.__saved = data if callable(data) else lambda: data
+        self.__trusted = True
+        self.changed = False
+
+    def get(self, value):
+        """
+        get returns the metrics of a group
+
+        :param value(any): is the value of the group
+        :return (dict): maps the name of each metric to its value, the
+        metrics of an empty group when no object has value
+        """
+        self.__ready()
+        try:
+            group = self.__groups.get(value)
+        except TypeError:
+            group = None
+        if group is None:
+            return results(initial_state(self.__metrics), self.__metrics)
+        return results(group[1:], self.__metrics)
+
+    def all(self):
+        """
+        all returns the metrics of every group
+
+        :return (dict): maps each group value to the dict of its metrics
+        """
+        self.__ready()
+        return {value: results(group[1:], self.__metrics)
+                for value, group in self.__groups.items()}
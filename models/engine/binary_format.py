@@ -0,0 +1,626 @@
+#!/usr/bin/python3
+"""Defines a compact binary file format for the stored objects and the
+ functions converting it from and to the json file format.
+
+A file starts with MAGIC followed by length-prefixed records. A schema record
+stores once the class name and the attribute names shared by the objects of
+the same shape, an object record stores the id of its schema followed by its
+values. Datetimes are stored as microseconds since the epoch and uuid strings
+as their 16 bytes.
+
+A file may end with an index record listing the positions of the object
+records in the order of their keys, followed by a fixed size trailer
+record giving the positions of the schemas and of the index, so that an
+object can be found without reading the whole file"""
+
+from models.engine.json_stream import CHUNK_SIZE, atomic_writer, \
+    iter_entries
+from contextlib import contextmanager
+import datetime
+import json
+import mmap
+import re
+import struct
+import sys
+
+
+MAGIC = b"HBNB\x01"
+SCHEMA = ord("S")
+OBJECT = ord("O")
+INDEX = ord("I")
+TRAILER = ord("T")
+
+NONE, FALSE, TRUE, INT, BIGINT, FLOAT, STR, DATETIME, UUID, LIST, DICT = \
+    range(11)
+
+header = struct.Struct("<BI")
+u32 = struct.Struct("<I")
+i64 = struct.Struct("<q")
+f64 = struct.Struct("<d")
+u64 = struct.Struct("<Q")
+trailer = struct.Struct("<QQ")
+
+EPOCH = datetime.datetime(1970, 1, 1)
+MICROSECOND = datetime.timedelta(microseconds=1)
+uuid_pattern = re.compile(
+    "[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+
+
+class BinaryCodec:
+    """Creates a BinaryCodec object that encodes and decodes the records of
+    a binary file, remembering the schemas met so far"""
+
+    def __init__(self):
+        """
+        __init__ instantiates a BinaryCodec object with no schema
+        """
+        self.__ids = {}
+        self.__schemas = []
+        self.__id_fields = {}
+
+    def __len__(self):
+        """
+        __len__ returns the number of known schemas
+
+        :return (int): is the number of schemas
+        """
+        return len(self.__schemas)
+
+    def encode(self, name, attrs):
+        """
+        encode returns the object record of an object, adding a schema when
+        it is the first object of its shape
+
+        :param name(str): is the class name of the object
+        :param attrs(dict): is the dict of the attributes of the object
+        :return (bytes): is the object record
+        """
+        shape = (name, tuple(attrs))
+        schema_id = self.__ids.get(shape)
+        if schema_id is None:
+            schema_id = self.__ids[shape] = len(self.__schemas)
+            self.__schemas.append(shape)
+        out = bytearray(header.size)
+        out += u32.pack(schema_id)
+        for value in attrs.values():
+            encode_value(value, out)
+        header.pack_into(out, 0, OBJECT, len(out) - header.size)
+        return bytes(out)
+
+    def schema_records(self, start=0):
+        """
+        schema_records returns the schema records of the schemas from the
+        id start onwards
+
+        :param start(int): is the id of the first schema
+        :return (bytes): is the schema records
+        """
+        out = bytearray()
+        for schema_id in range(start, len(self.__schemas)):
+            name, fields = self.__schemas[schema_id]
+            payload = bytearray(u32.pack(schema_id))
+            for text in (name,) + fields:
+                encode_str(text, payload)
+            out += header.pack(SCHEMA, len(payload)) + payload
+        return bytes(out)
+
+    def iter_records(self, view):
+        """
+        iter_records decodes the records of a binary file, learning its
+        schemas on the way
+
+        :param view(memoryview): is the content of the file
+        :return (generator): yields the key, the class name, the dict of the
+        attributes and the start and end positions of the record of each
+        object
+        """
+        for pos, end, schema_id in self.__iter_objects(view):
+            key, name, attrs = self.decode(view, pos)
+            yield key, name, attrs, pos, end
+
+    def scan(self, view):
+        """
+        scan lists the object records of a binary file without decoding
+        them, only reading their id
+
+        :param view(memoryview): is the content of the file
+        :return (generator): yields the key, the class name and the start
+        and end positions of the record of each object
+        """
+        for pos, end, schema_id in self.__iter_objects(view):
+            yield self.read_key(view, pos), self.__schemas[schema_id][0], \
+                pos, end
+
+    def read_key(self, view, pos):
+        """
+        read_key returns the key of the object record at pos, only decoding
+        its id
+
+        :param view(memoryview): is the content of the file
+        :param pos(int): is the position of the record
+        :return (str): is the key of the object
+        """
+        start = pos + header.size
+        schema_id = u32.unpack_from(view, start)[0]
+        name, fields = self.__schemas[schema_id]
+        id_field = self.__id_fields.get(schema_id)
+        if id_field is None:
+            id_field = self.__id_fields[schema_id] = fields.index("id") \
+                if "id" in fields else -1
+        if id_field < 0:
+            return "{}.None".format(name)
+        start += u32.size
+        for i in range(id_field):
+            value, start = decode_value(view, start)
+        tag = view[start]
+        if tag == UUID:
+            id = format_uuid(view[start + 1:start + 17].hex())
+        elif tag == STR:
+            length = u32.unpack_from(view, start + 1)[0]
+            id = str(view[start + 5:start + 5 + length], "utf-8")
+        else:
+            id = decode_value(view, start)[0]
+        return "{}.{}".format(name, id)
+
+    def decode(self, view, pos):
+        """
+        decode decodes the object record at pos. The most common values are
+        decoded inline and a datetime equal to the previous one is shared
+        rather than rebuilt
+
+        :param view(memoryview): is the content of the file
+        :param pos(int): is the position of the record
+        :return (tuple): is the key, the class name and the dict of the
+        attributes of the object
+        """
+        unpack_u32 = u32.unpack_from
+        unpack_i64 = i64.unpack_from
+        micros = None
+        start = pos + header.size
+        name, fields = self.__schemas[unpack_u32(view, start)[0]]
+        attrs = {}
+        start += u32.size
+        for field in fields:
+            tag = view[start]
+            if tag == UUID:
+                attrs[field] = format_uuid(view[start + 1:start + 17].hex())
+                start += 17
+            elif tag == STR:
+                length = unpack_u32(view, start + 1)[0]
+                start += 5
+                attrs[field] = str(view[start:start + length], "utf-8")
+                start += length
+            elif tag == DATETIME:
+                value = unpack_i64(view, start + 1)[0]
+                if value != micros:
+                    micros = value
+                    date = EPOCH + MICROSECOND * value
+                attrs[field] = date
+                start += 9
+            else:
+                attrs[field], start = decode_value(view, start)
+        return "{}.{}".format(name, attrs.get("id")), name, attrs
+
+    def __iter_objects(self, view):
+        """
+        __iter_objects walks the records of a binary file, learning the
+        schemas and listing the object records
+
+        :param view(memoryview): is the content of the file
+        :return (generator): yields the start and end positions and the
+        schema id of each object record
+        """
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError("not a binary storage file")
+        unpack_header = header.unpack_from
+        size = len(view)
+        pos = len(MAGIC)
+        while pos < size:
+            kind, length = unpack_header(view, pos)
+            start = pos + header.size
+            end = start + length
+            if end > size:
+                raise ValueError("truncated record")
+            if kind == SCHEMA:
+                self.__read_schema(view, start, end)
+            elif kind == INDEX or kind == TRAILER:
+                pass
+            elif kind == OBJECT:
+                schema_id = u32.unpack_from(view, start)[0]
+                if schema_id >= len(self.__schemas) or \
+                        self.__schemas[schema_id] is None:
+                    raise ValueError("unknown schema {}".format(schema_id))
+                yield pos, end, schema_id
+            else:
+                raise ValueError("unknown record kind {}".format(kind))
+            pos = end
+
+    def load_schemas(self, view, pos):
+        """
+        load_schemas learns the schemas stored in the run of schema records
+        starting at pos
+
+        :param view(memoryview): is the content of the file
+        :param pos(int): is the position of the first schema record
+        """
+        while pos + header.size <= len(view):
+            kind, length = header.unpack_from(view, pos)
+            if kind != SCHEMA:
+                return
+            self.__read_schema(view, pos + header.size,
+                               pos + header.size + length)
+            pos += header.size + length
+
+    def __read_schema(self, view, pos, end):
+        """
+        __read_schema learns the schema stored between pos and end
+
+        :param view(memoryview): is the content of the file
+        :param pos(int): is the position of the schema payload
+        :param end(int): is the position after the schema payload
+        """
+        schema_id = u32.unpack_from(view, pos)[0]
+        pos += u32.size
+        texts = []
+        while pos < end:
+            text, pos = decode_str(view, pos)
+            texts.append(text)
+        shape = (texts[0], tuple(texts[1:]))
+        while len(self.__schemas) <= schema_id:
+            self.__schemas.append(None)
+        self.__schemas[schema_id] = shape
+        self.__ids[shape] = schema_id
+
+
+class RecordIndex:
+    """Creates a RecordIndex object that reads the index record of a binary
+    file, finding the record of a key by binary search"""
+
+    def __init__(self, view, codec):
+        """
+        __init__ instantiates a RecordIndex object from the trailer of a
+        binary file, teaching codec the schemas of the file
+
+        :param view(memoryview): is the content of the file
+        :param codec(BinaryCodec): is the codec reading the records
+        """
+        size = len(view)
+        pos = size - header.size - trailer.size
+        if pos < len(MAGIC) or bytes(view[:len(MAGIC)]) != MAGIC or \
+                header.unpack_from(view, pos) != (TRAILER, trailer.size):
+            raise ValueError("the binary file has no index")
+        schemas, index = trailer.unpack_from(view, pos + header.size)
+        kind, length = header.unpack_from(view, index)
+        if kind != INDEX or length % u64.size:
+            raise ValueError("the binary file has no index")
+        codec.load_schemas(view, schemas)
+        self.__view = view
+        self.__codec = codec
+        self.__count = length // u64.size
+        self.__entries = index + header.size
+
+    def __len__(self):
+        """
+        __len__ returns the number of indexed objects
+
+        :return (int): is the number of objects
+        """
+        return self.__count
+
+    def key(self, i):
+        """
+        key returns the i-th key in order
+
+        :param i(int): is the position of the key in the index
+        :return (str): is the key
+        """
+        return self.__codec.read_key(self.__view, self.position(i))
+
+    def position(self, i):
+        """
+        position returns the position of the record of the i-th key
+
+        :param i(int): is the position of the key in the index
+        :return (int): is the position of the record in the file
+        """
+        return u64.unpack_from(self.__view,
+                               self.__entries + i * u64.size)[0]
+
+    def find(self, key):
+        """
+        find returns the position of the record of key
+
+        :param key(str): is the key to look up
+        :return (int): is the position of the record or None
+        """
+        i = self.bisect(key)
+        if i < self.__count and self.key(i) == key:
+            return self.position(i)
+        return None
+
+    def span(self, name):
+        """
+        span returns the range of the index holding the keys of the class
+        name
+
+        :param name(str): is the name of the class
+        :return (range): is the range of positions in the index
+        """
+        return range(self.bisect(name + "."), self.bisect(name + "/"))
+
+    def bisect(self, key):
+        """
+        bisect returns the position of the first key not lower than key
+
+        :param key(str): is the key to look up
+        :return (int): is the position in the index
+        """
+        low, high = 0, self.__count
+        while low < high:
+            middle = (low + high) // 2
+            if self.key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+
+def index_record(keys):
+    """
+    index_record returns the index record of a binary file
+
+    :param keys(list): is the list of (key, record position) sorted by key
+    :return (bytes): is the index record
+    """
+    payload = b"".join(u64.pack(pos) for key, pos in keys)
+    return header.pack(INDEX, len(payload)) + payload
+
+
+def trailer_record(schemas, index):
+    """
+    trailer_record returns the trailer record of a binary file
+
+    :param schemas(int): is the position of the schema records
+    :param index(int): is the position of the index record
+    :return (bytes): is the trailer record
+    """
+    return header.pack(TRAILER, trailer.size) + trailer.pack(schemas, index)
+
+
+def format_uuid(digits):
+    """
+    format_uuid adds the dashes of a uuid string to its 32 hex digits
+
+    :param digits(str): is the hex digits
+    :return (str): is the uuid string
+    """
+    return "{}-{}-{}-{}-{}".format(digits[:8], digits[8:12], digits[12:16],
+                                   digits[16:20], digits[20:])
+
+
+def encode_str(text, out):
+    """
+    encode_str appends the length and utf-8 bytes of text to out
+
+    :param text(str): is the string to encode
+    :param out(bytearray): is the buffer to append to
+    """
+    data = text.encode("utf-8")
+    out += u32.pack(len(data))
+    out += data
+
+
+def decode_str(view, pos):
+    """
+    decode_str reads a string written by encode_str
+
+    :param view(memoryview): is the buffer to read
+    :param pos(int): is the position of the string
+    :return (tuple): is the string and the position after it
+    """
+    length = u32.unpack_from(view, pos)[0]
+    pos += u32.size
+    return str(view[pos:pos + length], "utf-8"), pos + length
+
+
+def encode_value(value, out):
+    """
+    encode_value appends the type tag and the bytes of value to out
+
+    :param value(any): is a json value, a datetime, a date or a uuid string
+    :param out(bytearray): is the buffer to append to
+    """
+    if value is None:
+        out.append(NONE)
+    elif value is True or value is False:
+        out.append(TRUE if value else FALSE)
+    elif isinstance(value, int):
+        if -(1 << 63) <= value < 1 << 63:
+            out.append(INT)
+            out += i64.pack(value)
+        else:
+            out.append(BIGINT)
+            encode_str(str(value), out)
+    elif isinstance(value, float):
+        out.append(FLOAT)
+        out += f64.pack(value)
+    elif isinstance(value, str):
+        if len(value) == 36 and uuid_pattern.fullmatch(value):
+            out.append(UUID)
+            out += bytes.fromhex(value.replace("-", ""))
+        else:
+            out.append(STR)
+            encode_str(value, out)
+    elif isinstance(value, datetime.datetime):
+        if value.tzinfo is None:
+            out.append(DATETIME)
+            out += i64.pack((value - EPOCH) // MICROSECOND)
+        else:
+            out.append(STR)
+            encode_str(value.isoformat(), out)
+    elif isinstance(value, datetime.date):
+        out.append(STR)
+        encode_str(value.isoformat(), out)
+    elif isinstance(value, (list, tuple)):
+        out.append(LIST)
+        out += u32.pack(len(value))
+        for item in value:
+            encode_value(item, out)
+    elif isinstance(value, dict):
+        out.append(DICT)
+        out += u32.pack(len(value))
+        for key, item in value.items():
+            encode_str(str(key), out)
+            encode_value(item, out)
+    else:
+        raise TypeError("cannot encode {}".format(type(value).__name__))
+
+
+def decode_value(view, pos):
+    """
+    decode_value reads a value written by encode_value
+
+    :param view(memoryview): is the buffer to read
+    :param pos(int): is the position of the value
+    :return (tuple): is the value and the position after it
+    """
+    tag = view[pos]
+    pos += 1
+    if tag == STR:
+        return decode_str(view, pos)
+    if tag == UUID:
+        return format_uuid(view[pos:pos + 16].hex()), pos + 16
+    if tag == DATETIME:
+        return EPOCH + MICROSECOND * i64.unpack_from(view, pos)[0], pos + 8
+    if tag == INT:
+        return i64.unpack_from(view, pos)[0], pos + 8
+    if tag == FLOAT:
+        return f64.unpack_from(view, pos)[0], pos + 8
+    if tag == NONE:
+        return None, pos
+    if tag == FALSE or tag == TRUE:
+        return tag == TRUE, pos
+    if tag == BIGINT:
+        text, pos = decode_str(view, pos)
+        return int(text), pos
+    if tag == LIST or tag == DICT:
+        count = u32.unpack_from(view, pos)[0]
+        pos += u32.size
+        if tag == LIST:
+            items = []
+            for i in range(count):
+                item, pos = decode_value(view, pos)
+                items.append(item)
+            return items, pos
+        items = {}
+        for i in range(count):
+            key, pos = decode_str(view, pos)
+            items[key], pos = decode_value(view, pos)
+        return items, pos
+    raise ValueError("unknown value tag {}".format(tag))
+
+
+def map_view(path):
+    """
+    map_view maps the file path to memory. The view must be closed with
+    close_view
+
+    :param path(str): is the path of the file
+    :return (memoryview): is the content of the file
+    """
+    with open(path, "rb") as infile:
+        if not infile.seek(0, 2):
+            return memoryview(b"")
+        return memoryview(mmap.mmap(infile.fileno(), 0,
+                                    access=mmap.ACCESS_READ))
+
+
+def close_view(view):
+    """
+    close_view releases a view returned by map_view and unmaps its file
+
+    :param view(memoryview): is the view to close
+    """
+    data = view.obj
+    view.release()
+    if isinstance(data, mmap.mmap):
+        data.close()
+
+
+@contextmanager
+def open_view(path):
+    """
+    open_view maps the file path to memory for the duration of a with block
+
+    :param path(str): is the path of the file
+    :return (memoryview): is the content of the file
+    """
+    view = map_view(path)
+    try:
+        yield view
+    finally:
+        close_view(view)
+
+
+def json_to_binary(json_path, binary_path, buffer_size=CHUNK_SIZE):
+    """
+    json_to_binary converts a json storage file to the binary format. The
+    schemas are written before the first object using them and once more
+    before the index, where a lazy reader looks for them
+
+    :param json_path(str): is the path of the json file to read
+    :param binary_path(str): is the path of the binary file to write
+    :param buffer_size(int): is the size of the read and write buffers
+    """
+    codec = BinaryCodec()
+    with open(json_path, encoding="utf-8") as infile, \
+            atomic_writer(binary_path, buffer_size, binary=True) as outfile:
+        pos = outfile.write(MAGIC)
+        keys = []
+        for key, data, text in iter_entries(infile, buffer_size):
+            name = data.pop("__class__")
+            for attr in ("created_at", "updated_at"):
+                if isinstance(data.get(attr), str):
+                    data[attr] = datetime.datetime.fromisoformat(data[attr])
+            count = len(codec)
+            record = codec.encode(name, data)
+            pos += outfile.write(codec.schema_records(count))
+            keys.append(("{}.{}".format(name, data.get("id")), pos))
+            pos += outfile.write(record)
+        schemas = pos
+        pos += outfile.write(codec.schema_records())
+        keys.sort()
+        outfile.write(index_record(keys))
+        outfile.write(trailer_record(schemas, pos))
+
+
+def binary_to_json(binary_path, json_path, buffer_size=CHUNK_SIZE):
+    """
+    binary_to_json converts a binary storage file to the json format
+
+    :param binary_path(str): is the path of the binary file to read
+    :param json_path(str): is the path of the json file to write
+    :param buffer_size(int): is the size of the write buffer
+    """
+    with open_view(binary_path) as view, \
+            atomic_writer(json_path, buffer_size) as outfile:
+        separator = "{"
+        for key, name, data, start, end in BinaryCodec().iter_records(view):
+            for attr, value in data.items():
+                if isinstance(value, datetime.datetime):
+                    data[attr] = value.isoformat()
+            data["__class__"] = name
+            outfile.write(separator)
+            outfile.write(json.dumps(key) + ": " + json.dumps(data))
+            separator = ", "
+        outfile.write("{}" if separator == "{" else "}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or not sys.argv[1].endswith((".json", ".bin")):
+        sys.exit("Usage: binary_format.py <file.json> <file.bin>\n"
+                 "       binary_format.py <file.bin> <file.json>")
+    if sys.argv[1].endswith(".json"):
+        json_to_binary(sys.argv[1], sys.argv[2])
+    else:
+        binary_to_json(sys.argv[1], sys.argv[2])
@@ -0,0 +1,326 @@
+#!/usr/bin/python3
+"""Defines the ColumnStore class that keeps numeric attributes of the
+ stored objects in one array per attribute, so filters and aggregates run
+ over the arrays instead of the objects. NumPy is used when it is
+ installed"""
+
+from models.engine.query import operators
+from array import array
+import math
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def value_of(obj, attr):
+    """
+    value_of returns the value of an attribute as stored in a column
+
+    :param obj(BaseModel): is the object
+    :param attr(str): is the name of the attribute
+    :return (float): is the value, NaN when it is not a number
+    """
+    value = getattr(obj, attr, None)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return math.nan
+
+
+def percentile(values, q):
+    """
+    percentile returns the q-th percentile of sorted values, interpolating
+    linearly between the two closest values like numpy.percentile
+
+    :param values(list): is the sorted list of values
+    :param q(float): is the percentile, between 0 and 100
+    :return (float): is the percentile or None when values is empty
+    """
+    if not values:
+        return None
+    position = (len(values) - 1) * q / 100
+    low = math.floor(position)
+    high = math.ceil(position)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+class ColumnStore:
+    """Keeps numeric attributes of the objects of a class in columns, one
+    array of doubles per attribute with a row per object. Values that are
+    not numbers are stored as NaN, which no condition but ne matches and
+    which the aggregates leave out"""
+
+    def __init__(self, attrs):
+        """
+        __init__ instantiates a ColumnStore object
+
+        :param attrs(list): is the names of the stored attributes
+        """
+        self.attrs = tuple(attrs)
+        self.__columns = {attr: array("d") for attr in self.attrs}
+        self.__keys = []
+        self.__rows = {}
+        self.__deferred = None
+
+    def __len__(self):
+        """
+        __len__ returns the number of stored objects
+
+        :return (int): is the number of rows
+        """
+        self.__ready()
+        return len(self.__keys)
+
+    def add(self, key, obj):
+        """
+        add stores the current values of obj, in place of its previous
+        values when it is already stored
+
+        :param key(str): is the storage key of obj
+        :param obj(BaseModel): is the object to store
+        """
+        if self.__deferred is not None:
+            self.__deferred[key] = obj
+            return
+        row = self.__rows.get(key)
+        if row is None:
+            self.__rows[key] = len(self.__keys)
+            self.__keys.append(key)
+            for attr, column in self.__columns.items():
+                column.append(value_of(obj, attr))
+            return
+        for attr, column in self.__columns.items():
+            column[row] = value_of(obj, attr)
+
+    def discard(self, key):
+        """
+        discard removes the row of the object stored under key, moving the
+        last row in its place
+
+        :param key(str): is the storage key of the object
+        """
+        if self.__deferred is not None:
+            self.__deferred.pop(key, None)
+            return
+        row = self.__rows.pop(key, None)
+        if row is None:
+            return
+        last = self.__keys.pop()
+        for column in self.__columns.values():
+            value = column.pop()
+            if last != key:
+                column[row] = value
+        if last != key:
+            self.__keys[row] = last
+            self.__rows[last] = row
+
+    def clear(self):
+        """
+        clear removes every row
+        """
+        for attr in self.attrs:
+            self.__columns[attr] = array("d")
+        self.__keys.clear()
+        self.__rows.clear()
+        self.__deferred = None
+
+    def build(self, objects):
+        """
+        build replaces the content of the store with the given objects,
+        which are only read when the store is first used
+
+        :param objects(dict): maps the storage keys to the objects
+        """
+        self.clear()
+        self.__deferred = dict(objects)
+
+    def __ready(self):
+        """
+        __ready stores the objects given to build, filling each column in
+        one go
+        """
+        if self.__deferred is None:
+            return
+        objects = self.__deferred
+        self.__deferred = None
+        self.__keys.extend(objects)
+        self.__rows.update(zip(self.__keys, range(len(self.__keys))))
+        for attr in self.attrs:
+            self.__columns[attr] = array("d", (
+                value_of(obj, attr) for obj in objects.values()))
+
+    def __column(self, attr):
+        """
+        __column returns the column of an attribute
+
+        :param attr(str): is the name of the attribute
+        :return (array): is the column
+        """
+        self.__ready()
+        try:
+            return self.__columns[attr]
+        except KeyError:
+            raise ValueError("{} is not a column".format(attr)) from None
+
+    def __select(self, conditions):
+        """
+        __select returns the rows matching all the conditions
+
+        :param conditions(dict): is a dict of conditions written like in
+        Query.where
+        :return (list|ndarray): is the positions of the matching rows, or
+        None for every row
+        """
+        self.__ready()
+        rows = None
+        mask = None
+        for name, value in conditions.items():
+            attr, _, op = name.partition("__")
+            op = op or "eq"
+            if op not in operators:
+                raise ValueError("unknown operator {}".format(op))
+            column = self.__column(attr)
+            if numpy is not None:
+                values = numpy.frombuffer(column, dtype=numpy.float64) \
+                    if len(column) else numpy.empty(0)
+                match = numpy.isin(values, list(value)) if op == "in" \
+                    else operators[op](values, value)
+                mask = match if mask is None else mask & match
+                continue
+            test = operators[op]
+            rows = [row for row, item in enumerate(column)
+                    if test(item, value)] if rows is None else \
+                [row for row in rows if test(column[row], value)]
+        if mask is not None:
+            return numpy.flatnonzero(mask)
+        return rows
+
+    def keys(self, **conditions):
+        """
+        keys returns the storage keys of the objects matching all the
+        conditions, written attr=value or attr__op=value like in Query.where,
+        eg. keys(price_by_night__lt=100, max_guest__gte=4)
+
+        :param conditions(dict): is a dict of conditions
+        :return (list): is the list of storage keys
+        """
+        self.__ready()
+        rows = self.__select(conditions)
+        if rows is None:
+            return list(self.__keys)
+        keys = self.__keys
+        return [keys[row] for row in rows]
+
+    def ids(self, **conditions):
+        """
+        ids returns the ids of the objects matching all the conditions
+
+        :param conditions(dict): is a dict of conditions
+        :return (list): is the list of ids
+        """
+        return [key.partition(".")[2] for key in self.keys(**conditions)]
+
+    def values(self, attr, **conditions):
+        """
+        values returns the values of attr of the objects matching all the
+        conditions, leaving out the values that are not numbers
+
+        :param attr(str): is the name of the attribute
+        :param conditions(dict): is a dict of conditions
+        :return (list|ndarray): is the values, as an array when NumPy is
+        installed
+        """
+        column = self.__column(attr)
+        rows = self.__select(conditions)
+        if numpy is not None:
+            values = numpy.array(column, dtype=numpy.float64)
+            if rows is not None:
+                values = values[rows]
+            return values[~numpy.isnan(values)]
+        if rows is None:
+            return [value for value in column if value == value]
+        return [column[row] for row in rows if column[row] == column[row]]
+
+    def count(self, **conditions):
+        """
+        count returns the number of objects matching all the conditions
+
+        :param conditions(dict): is a dict of conditions
+        :return (int): is the number of objects
+        """
+        rows = self.__select(conditions)
+        return len(self.__keys) if rows is None else len(rows)
+
+    def sum(self, attr, **conditions):
+        """
+        sum returns the sum of attr over the objects matching all the
+        conditions
+
+        :param attr(str): is the name of the attribute
+        :param conditions(dict): is a dict of conditions
+        :return (float): is the sum
+        """
+        values = self.values(attr, **conditions)
+        return float(sum(values) if numpy is None else values.sum())
+
+    def mean(self, attr, **conditions):
+        """
+        mean returns the mean of attr over the objects matching all the
+        conditions
+
+        :param attr(str): is the name of the attribute
+        :param conditions(dict): is a dict of conditions
+        :return (float): is the mean or None when no object matches
+        """
+        values = self.values(attr, **conditions)
+        if not len(values):
+            return None
+        return float(sum(values) / len(values)) if numpy is None else \
+            float(values.mean())
+
+    def min(self, attr, **conditions):
+        """
+        min returns the smallest value of attr over the objects matching all
+        the conditions
+
+        :return (float): is the smallest value or None when no object matches
+        """
+        values = self.values(attr, **conditions)
+        if not len(values):
+            return None
+        return float(min(values) if numpy is None else values.min())
+
+    def max(self, attr, **conditions):
+        """
+        max returns the largest value of attr over the objects matching all
+        the conditions
+
+        :return (float): is the largest value or None when no object matches
+        """
+        values = self.values(attr, **conditions)
+        if not len(values):
+            return None
+        return float(max(values) if numpy is None else values.max())
+
+    def percentile(self, attr, q, **conditions):
+        """
+        percentile returns the q-th percentile of attr over the objects
+        matching all the conditions, eg. percentile("price_by_night", 50)
+        for the median price
+
+        :param attr(str): is the name of the attribute
+        :param q(float|list): is the percentile between 0 and 100, or a list
+        of them
+        :param conditions(dict): is a dict of conditions
+        :return (float|list): is the percentile, or the list of percentiles
+        when q is a list, None when no object matches
+        """
+        values = self.values(attr, **conditions)
+        qs = q if isinstance(q, (list, tuple)) else [q]
+        if numpy is not None and len(values):
+            found = [float(value) for value in numpy.percentile(values, qs)]
+        else:
+            values = sorted(values)
+            found = [percentile(values, each) for each in qs]
+        return found if isinstance(q, (list, tuple)) else found[0]
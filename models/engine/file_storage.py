@@ -2,14 +2,30 @@
 """Defines the FileStorage class that handle persisting of objects
  to the disk"""
 
-from models.base_model import BaseModel
+from models.base_model import BaseModel, compact_class
 from models.user import User
 from models.state import State
 from models.city import City
 from models.amenity import Amenity
 from models.place import Place
 from models.review import Review
+from models.engine.indexes import HashIndex, RangeIndex, GeoIndex, \
+    TextIndex, PartitionedIndex, BitmapIndex
+from models.engine.binary_format import MAGIC, BinaryCodec, RecordIndex, \
+    close_view, header, index_record, map_view, open_view, trailer_record
+from models.engine.json_stream import CHUNK_SIZE, atomic_writer, \
+    iter_entries
+from models.engine.query import Query
+from models.engine.places_search import places_search
+from models.engine.aggregation import MaterializedView, aggregate
+from models.engine.columns import ColumnStore
+from models.engine.segments import read_segments, segment_of, \
+    segment_paths
+from contextlib import ExitStack, contextmanager
+import gc
 import json
+import os
+import zlib
 
 
 avaliable_classes = {
@@ -21,21 +37,538 @@ avaliable_classes = {
     "Place": Place,
     "Review": Review}
 
+hash_indexes = {
+    "City": ["state_id"],
+    "Place": ["city_id", "user_id"],
+    "Review": ["place_id", "user_id"]}
+
+range_indexes = {name: ["created_at", "updated_at"]
+                 for name in avaliable_classes}
+range_indexes["Place"] += ["price_by_night", "max_guest", "number_rooms"]
+
+partitioned_indexes = {
+    "Place": [("city_id", "price_by_night"), ("city_id", "created_at")]}
+
+bitmap_indexes = {"Place": ["amenity_ids"]}
+
+geo_indexes = {"Place": ("latitude", "longitude")}
+
+text_indexes = {
+    "Place": ["name", "description"],
+    "Review": ["text"],
+    "User": ["first_name", "last_name"]}
+
+materialized_views = {
+    "reviews_by_place": ("Review", "place_id", {"count": "*"}),
+    "reviews_by_user": ("Review", "user_id", {"count": "*"})}
+
+column_stores = {
+    "Place": ["price_by_night", "max_guest", "number_rooms",
+              "number_bathrooms", "latitude", "longitude"]}
+
 
 class FileStorage:
     """Creates a FileStorage object that persists objects to disk"""
 
     __file_path = "file.json"
+    __binary_path = "file.bin"
+    __format = "json"
+    __codec = BinaryCodec()
+    __codecs = {}
+    __lazy = False
+    __segments = 1
+    __layout = "single"
+    __models = avaliable_classes
+    __unloaded = set()
+    __dirty = set()
+    __view = None
+    __records = None
+    __taken = {}
     __objects = {}
+    __exposed = False
+    __journal_path = "file.json.journal"
+    __text_path = "file.json.fts"
+    __views_path = "file.json.views"
+    __journal = False
+    __checkpoint_interval = 1000
+    __buffer_size = CHUNK_SIZE
+    __journal_records = 0
+    __generation = []
+    __sidecars = {}
+    __pending = {}
+    __fragments = {}
+    __classes = {}
+    __indexes = {}
+    __hash_indexes = {}
+    __range_indexes = {}
+    __partitioned_indexes = {}
+    __bitmap_indexes = {}
+    __geo_indexes = {}
+    __text_indexes = {}
+    __column_stores = {}
+    __materialized = {}
+    __count = 0
+    __batch_depth = 0
+    __batch_saved = False
+    __batch_objects = None
+    __batch_states = {}
+    __batch_taken = None
+
+    def __init__(self):
+        """
+        __init__ instantiates a FileStorage object, creating the indexes
+        declared in hash_indexes, range_indexes, partitioned_indexes,
+        bitmap_indexes, geo_indexes, text_indexes and column_stores and the
+        views of materialized_views the first time
+        """
+        if FileStorage.__indexes:
+            return
+        for name, attrs in hash_indexes.items():
+            for attr in attrs:
+                self.add_index(avaliable_classes[name], attr)
+        for name, attrs in range_indexes.items():
+            for attr in attrs:
+                self.add_index(avaliable_classes[name], attr, ordered=True)
+        for name, pairs in partitioned_indexes.items():
+            for within, attr in pairs:
+                self.add_index(avaliable_classes[name], attr, ordered=True,
+                               within=within)
+        for name, attrs in bitmap_indexes.items():
+            for attr in attrs:
+                self.add_index(avaliable_classes[name], attr, bitmap=True)
+        for name, (lat_attr, lon_attr) in geo_indexes.items():
+            FileStorage.__geo_indexes[name] = GeoIndex(lat_attr, lon_attr)
+            self.__register(name, FileStorage.__geo_indexes[name])
+        for name, attrs in text_indexes.items():
+            FileStorage.__text_indexes[name] = TextIndex(attrs)
+            self.__register(name, FileStorage.__text_indexes[name])
+        for name, attrs in column_stores.items():
+            FileStorage.__column_stores[name] = ColumnStore(attrs)
+            self.__register(name, FileStorage.__column_stores[name])
+        for view, (name, group_by, metrics) in materialized_views.items():
+            self.add_view(view, avaliable_classes[name], group_by, metrics)
+
+    def configure(self, journal=None, checkpoint_interval=None,
+                  buffer_size=None, format=None, lazy=None, segments=None,
+                  layout=None, compact=None):
+        """
+        configure changes how the storage persists objects to disk
+
+        :param journal(bool): when True every save appends the changed
+        objects to the journal file instead of rewriting __file_path
+        :param checkpoint_interval(int): is the number of journal records
+        after which the journal is compacted into a fresh __file_path
+        :param buffer_size(int): is the size of the chunks read from
+        __file_path and of the buffer used to write it
+        :param format(str): is "json" to store the objects in __file_path or
+        "binary" to store them in the more compact __binary_path
+        :param lazy(bool): when True reload only reads the index of
+        __binary_path and each object is decoded the first time it is
+        requested. It has no effect on the json format
+        :param segments(int): is the number of files the objects are spread
+        over by the hash of their key. Several segments are decoded in
+        parallel worker processes on reload
+        :param layout(str): is "single" to store every object in the same
+        files or "class" to store the objects of each class in their own
+        files, which are read the first time the class is requested and
+        rewritten only when one of its objects changed
+        :param compact(bool): when True the objects read from the data files
+        are built from the compact versions of the model classes, which
+        store the declared fields in slots. It applies from the next reload
+        """
+        if journal is not None:
+            FileStorage.__journal = bool(journal)
+        if checkpoint_interval is not None:
+            if checkpoint_interval < 1:
+                raise ValueError("checkpoint_interval must be positive")
+            FileStorage.__checkpoint_interval = checkpoint_interval
+        if buffer_size is not None:
+            if buffer_size < 1:
+                raise ValueError("buffer_size must be positive")
+            FileStorage.__buffer_size = buffer_size
+        if format is not None and format not in ("json", "binary"):
+            raise ValueError("format must be json or binary")
+        if segments is not None and segments < 1:
+            raise ValueError("segments must be positive")
+        if layout is not None and layout not in ("single", "class"):
+            raise ValueError("layout must be single or class")
+        if (FileStorage.__lazy if lazy is None else lazy) and \
+                ((segments or FileStorage.__segments) > 1 or
+                 (layout or FileStorage.__layout) == "class"):
+            raise ValueError("the lazy mode needs a single data file")
+        if (format or FileStorage.__format) != FileStorage.__format or \
+                (segments or FileStorage.__segments) != \
+                FileStorage.__segments or \
+                (layout or FileStorage.__layout) != FileStorage.__layout:
+            self.__close_records()
+            FileStorage.__format = format or FileStorage.__format
+            FileStorage.__segments = segments or FileStorage.__segments
+            FileStorage.__layout = layout or FileStorage.__layout
+            FileStorage.__fragments = {}
+            FileStorage.__codec = BinaryCodec()
+            FileStorage.__codecs = {}
+            FileStorage.__dirty = set(avaliable_classes)
+        if lazy is not None:
+            if not lazy:
+                self.__close_records()
+            FileStorage.__lazy = bool(lazy)
+        if compact is not None:
+            FileStorage.__models = avaliable_classes if not compact else {
+                name: compact_class(cls) for name, cls in
+                avaliable_classes.items()}
+
+    def all(self, cls=None):
+        """
+        all returns the private class attribute objects, or only the objects
+        of type cls when it is given
+
+        :param cls(type): is the class of the objects to return
+        :return (dict): is a key value pair that maps object id to their
+        respective objects
+        """
+        if cls is None:
+            self.__load_all()
+            FileStorage.__exposed = True
+            return FileStorage.__objects
+        if not isinstance(cls, type):
+            raise TypeError("cls must be a class")
+        self.__sync()
+        self.__load(cls.__name__)
+        return dict(FileStorage.__classes.get(cls.__name__, {}))
+
+    def count(self, cls=None):
+        """
+        count returns the number of stored objects, or the number of objects
+        of type cls when it is given
+
+        :param cls(type): is the class of the objects to count
+        :return (int): is the number of objects. The objects that are not
+        decoded yet are counted from the index of __binary_path
+        """
+        records = FileStorage.__records
+        if cls is None:
+            for name in avaliable_classes:
+                self.__read_class(name)
+            count = len(FileStorage.__objects)
+            if records is not None:
+                count += len(records) - sum(
+                    len(keys) for keys in FileStorage.__taken.values())
+            return count
+        self.__sync()
+        name = cls.__name__
+        self.__read_class(name)
+        count = len(FileStorage.__classes.get(name, {}))
+        if records is not None:
+            count += len(records.span(name)) - len(
+                FileStorage.__taken.get(name, ()))
+        return count
+
+    def add_index(self, cls, attr, ordered=False, within=None,
+                  bitmap=False):
+        """
+        add_index starts maintaining an index on the attribute attr of the
+        objects of type cls
+
+        :param cls(type): is the class of the indexed objects
+        :param attr(str): is the name of the indexed attribute
+        :param ordered(bool): whether to keep a sorted index that serves
+        find_range instead of a hash index that serves find_by
+        :param within(str): is the name of an attribute to keep a sorted
+        index per value of, eg. the places of each city sorted by price
+        for within="city_id", for the queries with a condition on it
+        :param bitmap(bool): whether to keep a bitmap index of the values of
+        a list attribute that serves the contains condition of the queries
+        """
+        name = cls.__name__
+        if bitmap:
+            lookup = FileStorage.__bitmap_indexes.setdefault(name, {})
+            if attr not in lookup:
+                lookup[attr] = BitmapIndex(attr)
+                self.__register(name, lookup[attr])
+            return
+        if within is not None:
+            lookup = FileStorage.__partitioned_indexes.setdefault(name, {})
+            if (within, attr) not in lookup:
+                lookup[within, attr] = PartitionedIndex(within, attr)
+                self.__register(name, lookup[within, attr])
+            return
+        lookup = FileStorage.__range_indexes if ordered else \
+            FileStorage.__hash_indexes
+        if attr in lookup.setdefault(name, {}):
+            return
+        index = lookup[name][attr] = (RangeIndex if ordered else HashIndex)(
+            attr)
+        self.__register(name, index)
+
+    def places_search(self, states=None, cities=None, amenities=None,
+                      price_range=None, max_guest=None, page=1, per_page=20):
+        """
+        places_search returns a page of the places matching the filters with
+        the number of matching places per amenity and per price bucket, eg.
+        places_search(states=[state.id], amenities=[wifi.id],
+        price_range=(50, 150)). See models.engine.places_search
+
+        :param states(list): is the ids of the states
+        :param cities(list): is the ids of the cities
+        :param amenities(list): is the ids of the amenities a place must have
+        :param price_range(tuple): is the lowest and highest price
+        :param max_guest(int): is the number of guests a place must fit
+        :param page(int): is the number of the page, from 1
+        :param per_page(int): is the number of places of a page
+        :return (dict): holds the total, the page, per_page, the places and
+        the facets
+        """
+        return places_search(self, states, cities, amenities, price_range,
+                             max_guest, page, per_page)
+
+    def add_view(self, name, cls, group_by, metrics):
+        """
+        add_view starts maintaining a materialized view of the metrics of
+        the objects of type cls grouped by the attribute group_by, updated
+        as the objects are stored, changed and deleted and saved to
+        __views_path with the data
+
+        :param name(str): is the name of the view
+        :param cls(type): is the class of the objects
+        :param group_by(str): is the name of the attribute to group by
+        :param metrics(dict): maps the name of each metric to its attribute
+        as in aggregate, the metrics being count, sum or avg
+        """
+        if name in FileStorage.__materialized:
+            return
+        view = MaterializedView(group_by, metrics)
+        FileStorage.__materialized[name] = (cls.__name__, view)
+        self.__register(cls.__name__, view)
+
+    def view(self, name):
+        """
+        view returns a materialized view added with add_view, eg.
+        view("reviews_by_place").get(place.id)["count"]. The objects
+        changed since the last save are counted again first, and the
+        objects of the class are only read when the view was not restored
+        by reload
+
+        :param name(str): is the name of the view
+        :return (MaterializedView): is the view
+        """
+        cls_name, view = FileStorage.__materialized[name]
+        self.__sync()
+        if not view.loaded:
+            self.__load(cls_name)
+        objects = FileStorage.__objects
+        for key, op in FileStorage.__pending.items():
+            if op != "delete" and key in objects and \
+                    key.partition(".")[0] == cls_name:
+                view.add(key, objects[key])
+        return view
+
+    def get_index(self, cls, attr, ordered=False, within=None,
+                  bitmap=False):
+        """
+        get_index returns the index maintained on the attribute attr of the
+        objects of type cls
+
+        :param cls(type): is the class of the indexed objects
+        :param attr(str): is the name of the indexed attribute
+        :param ordered(bool): whether to return the sorted index instead of
+        the hash index
+        :param within(str): is the partition attribute of the partitioned
+        index to return
+        :param bitmap(bool): whether to return the bitmap index
+        :return (HashIndex): is the index or None if attr is not indexed
+        """
+        self.__sync()
+        self.__load(cls.__name__)
+        if bitmap:
+            return FileStorage.__bitmap_indexes.get(cls.__name__, {}).get(
+                attr)
+        if within is not None:
+            return FileStorage.__partitioned_indexes.get(
+                cls.__name__, {}).get((within, attr))
+        lookup = FileStorage.__range_indexes if ordered else \
+            FileStorage.__hash_indexes
+        return lookup.get(cls.__name__, {}).get(attr)
+
+    def query(self, cls):
+        """
+        query starts a query over the objects of type cls
+
+        :param cls(type): is the class of the queried objects
+        :return (Query): is the query
+        """
+        return Query(self, cls)
+
+    def aggregate(self, cls, group_by=None, metrics=None, label=None,
+                  **conditions):
+        """
+        aggregate groups the objects of type cls by the attribute group_by
+        and computes metrics over each group, eg. aggregate(Place,
+        group_by="city_id", metrics={"avg": "price_by_night", "count": "*"},
+        label="name"). See models.engine.aggregation.aggregate
+
+        :param cls(type): is the class of the objects
+        :param group_by(str): is the name of the attribute to group by,
+        following the attributes referring to other classes with dots
+        :param metrics(dict): maps the name of each metric to its attribute
+        :param label(str): is the attribute of the class group_by refers to
+        added to each group
+        :param conditions(dict): is a dict of conditions the objects must
+        match, written like in Query.where
+        :return (dict): maps each group value to the dict of its metrics
+        """
+        return aggregate(self, cls, group_by, metrics, label, conditions,
+                         avaliable_classes)
+
+    def __register(self, name, index):
+        """
+        __register starts maintaining index over the objects of the class
+        name, filling it with the objects already stored
 
-    def all(self):
+        :param name(str): is the name of the class
+        :param index(HashIndex): is the index, or any object with the same
+        add, discard and build methods
         """
-        all returns the private class attribute objects
+        self.__sync()
+        self.__load(name)
+        FileStorage.__indexes.setdefault(name, []).append(index)
+        index.build(FileStorage.__classes.get(name, {}))
 
+    def find_by(self, cls, attr, value):
+        """
+        find_by returns the objects of type cls whose attribute attr equals
+        value, using a hash index when attr is indexed
+
+        :param cls(type): is the class of the objects
+        :param attr(str): is the name of the attribute
+        :param value(any): is the value to look up
         :return (dict): is a key value pair that maps object id to their
         respective objects
         """
-        return FileStorage.__objects
+        self.__sync()
+        self.__load(cls.__name__)
+        index = FileStorage.__hash_indexes.get(cls.__name__, {}).get(attr)
+        if index is not None:
+            return index.find(value)
+        return {key: obj for key, obj in
+                FileStorage.__classes.get(cls.__name__, {}).items()
+                if getattr(obj, attr, None) == value}
+
+    def find_range(self, cls, attr, low=None, high=None, limit=None,
+                   reverse=False):
+        """
+        find_range returns the objects of type cls whose attribute attr is
+        between low and high, both included, ordered by attr. It reads a
+        sorted index when attr has one and sorts the whole class otherwise
+
+        :param cls(type): is the class of the objects
+        :param attr(str): is the name of the attribute
+        :param low(any): is the lower bound, None for no lower bound
+        :param high(any): is the upper bound, None for no upper bound
+        :param limit(int): is the maximum number of objects to return
+        :param reverse(bool): whether to return the largest values first
+        :return (list): is the list of objects
+        """
+        self.__sync()
+        self.__load(cls.__name__)
+        index = FileStorage.__range_indexes.get(cls.__name__, {}).get(attr)
+        if index is None:
+            index = RangeIndex(attr)
+            index.build(FileStorage.__classes.get(cls.__name__, {}))
+        found = []
+        for key, obj in index.scan(low, high, reverse=reverse):
+            if limit is not None and len(found) >= limit:
+                break
+            found.append(obj)
+        return found
+
+    def nearby(self, lat, lon, radius_km, limit=None, cls=Place):
+        """
+        nearby returns the objects of type cls within radius_km of a point,
+        closest first
+
+        :param lat(float): is the latitude of the point
+        :param lon(float): is the longitude of the point
+        :param radius_km(float): is the search radius in kilometers
+        :param limit(int): is the maximum number of objects to return
+        :param cls(type): is the class of the objects, Place by default
+        :return (list): is the list of objects
+        """
+        return [obj for distance, key, obj in
+                self.__geo_index(cls).nearby(lat, lon, radius_km, limit)]
+
+    def within_bbox(self, min_lat, min_lon, max_lat, max_lon, limit=None,
+                    cls=Place):
+        """
+        within_bbox returns the objects of type cls inside a bounding box,
+        closest to its center first. The box crosses the antimeridian when
+        min_lon > max_lon
+
+        :param min_lat(float): is the southern edge of the box
+        :param min_lon(float): is the western edge of the box
+        :param max_lat(float): is the northern edge of the box
+        :param max_lon(float): is the eastern edge of the box
+        :param limit(int): is the maximum number of objects to return
+        :param cls(type): is the class of the objects, Place by default
+        :return (list): is the list of objects
+        """
+        return [obj for distance, key, obj in self.__geo_index(
+            cls).within_bbox(min_lat, min_lon, max_lat, max_lon, limit)]
+
+    def __geo_index(self, cls):
+        """
+        __geo_index returns the spatial index of the class cls, building a
+        throwaway one over latitude and longitude when it has none
+
+        :param cls(type): is the class of the objects
+        :return (GeoIndex): is the spatial index
+        """
+        self.__sync()
+        self.__load(cls.__name__)
+        index = FileStorage.__geo_indexes.get(cls.__name__)
+        if index is None:
+            index = GeoIndex()
+            index.build(FileStorage.__classes.get(cls.__name__, {}))
+        return index
+
+    def search(self, cls, text, limit=20):
+        """
+        search returns the objects of type cls whose text attributes hold any
+        word of text, best match first. The classes missing from
+        text_indexes are searched by name through a throwaway index
+
+        :param cls(type): is the class of the objects
+        :param text(str): is the text to search for
+        :param limit(int): is the maximum number of objects to return
+        :return (list): is the list of objects
+        """
+        self.__sync()
+        self.__load(cls.__name__)
+        index = FileStorage.__text_indexes.get(cls.__name__)
+        if index is None:
+            index = TextIndex(["name"])
+            index.build(FileStorage.__classes.get(cls.__name__, {}))
+        return [obj for score, key, obj in index.search(text, limit)]
+
+    def columns(self, cls):
+        """
+        columns returns the columns kept over the numeric attributes of the
+        objects of type cls, to filter and aggregate them without reading
+        the objects, eg. columns(Place).ids(price_by_night__lt=100,
+        max_guest__gte=4) or columns(Place).percentile("price_by_night", 90).
+        The classes missing from column_stores get throwaway columns over
+        the numeric fields they declare
+
+        :param cls(type): is the class of the objects
+        :return (ColumnStore): is the columns of the class
+        """
+        self.__sync()
+        self.__load(cls.__name__)
+        store = FileStorage.__column_stores.get(cls.__name__)
+        if store is None:
+            store = ColumnStore(name for name, kind in cls.fields().items()
+                                if kind in (int, float))
+            store.build(FileStorage.__classes.get(cls.__name__, {}))
+        return store
 
     def new(self, obj: BaseModel):
         """
@@ -45,31 +578,862 @@ class FileStorage:
         :param obj(BaseModel): new object to be added to the private class
         attribute objects
         """
-        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        name = obj.__class__.__name__
+        key = "{}.{}".format(name, obj.id)
+        if key not in FileStorage.__objects:
+            self.__take(key)
+            FileStorage.__pending[key] = "new"
+            FileStorage.__count += 1
+        elif FileStorage.__pending.get(key) != "new":
+            FileStorage.__pending[key] = "update"
         FileStorage.__objects[key] = obj
+        FileStorage.__classes.setdefault(name, {})[key] = obj
+        for index in FileStorage.__indexes.get(name, ()):
+            index.add(key, obj)
+
+    def get(self, cls, id):
+        """
+        get returns the object of type cls with the given id, decoding it
+        when it was not requested yet
+
+        :param cls(type): is the class of the object
+        :param id(str): is the id of the object
+        :return (BaseModel): is the object or None if it is not stored
+        """
+        key = "{}.{}".format(cls.__name__, id)
+        self.__read_class(cls.__name__)
+        obj = FileStorage.__objects.get(key)
+        if obj is None and FileStorage.__records is not None:
+            obj = self.__load(cls.__name__, key)
+        return obj
+
+    def delete(self, obj: BaseModel):
+        """
+        delete removes obj from the private class attribute objects
+
+        :param obj(BaseModel): is the object to be removed
+        """
+        name = obj.__class__.__name__
+        key = "{}.{}".format(name, obj.id)
+        self.__read_class(name)
+        if FileStorage.__objects.pop(key, None) is None:
+            if self.__take(key):
+                FileStorage.__pending[key] = "delete"
+            return
+        FileStorage.__count -= 1
+        FileStorage.__classes.get(name, {}).pop(key, None)
+        for index in FileStorage.__indexes.get(name, ()):
+            index.discard(key)
+        if FileStorage.__pending.get(key) == "new":
+            del FileStorage.__pending[key]
+        else:
+            FileStorage.__pending[key] = "delete"
+
+    def mark_dirty(self, obj: BaseModel):
+        """
+        mark_dirty records that a stored object changed so that the next
+        save re-serializes it
+
+        :param obj(BaseModel): is the object that changed
+        """
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        if key in FileStorage.__objects and key not in FileStorage.__pending:
+            FileStorage.__pending[key] = "update"
+            if FileStorage.__batch_depth and \
+                    key not in FileStorage.__batch_states:
+                FileStorage.__batch_states[key] = (
+                    obj, obj.get_attributes().copy())
+
+    @contextmanager
+    def batch(self):
+        """
+        batch defers every save made inside the with block to a single save
+        when the block exits, and restores __objects and the changed objects
+        to their state before the block if it raises. Nested blocks join the
+        outermost one.
+        """
+        if FileStorage.__batch_depth:
+            FileStorage.__batch_depth += 1
+            try:
+                yield self
+            finally:
+                FileStorage.__batch_depth -= 1
+            return
+        FileStorage.__batch_objects = FileStorage.__objects.copy()
+        FileStorage.__batch_taken = {name: keys.copy() for name, keys in
+                                     FileStorage.__taken.items()}
+        FileStorage.__batch_states = {}
+        pending = FileStorage.__pending.copy()
+        for key in pending:
+            obj = FileStorage.__objects.get(key)
+            if obj is not None:
+                FileStorage.__batch_states[key] = (
+                    obj, obj.get_attributes().copy())
+        FileStorage.__batch_saved = False
+        FileStorage.__batch_depth = 1
+        try:
+            yield self
+        except BaseException:
+            FileStorage.__batch_depth = 0
+            FileStorage.__objects.clear()
+            FileStorage.__objects.update(FileStorage.__batch_objects)
+            FileStorage.__taken = FileStorage.__batch_taken
+            for key, (obj, state) in FileStorage.__batch_states.items():
+                obj.set_attributes(state)
+                if key not in pending:
+                    obj._dirty = False
+            FileStorage.__pending.clear()
+            FileStorage.__pending.update(pending)
+            self.__reindex()
+            raise
+        finally:
+            FileStorage.__batch_depth = 0
+            FileStorage.__batch_objects = None
+            FileStorage.__batch_taken = None
+            FileStorage.__batch_states = {}
+        if FileStorage.__batch_saved:
+            self.save()
 
     def save(self):
         """
         save stores the private class attribute objects to the file __file_path
+        or __binary_path depending on the format
+        """
+        if FileStorage.__batch_depth:
+            FileStorage.__batch_saved = True
+            return
+        changes, in_sync = self.__flush()
+        if not FileStorage.__journal or not in_sync:
+            if changes or not in_sync or FileStorage.__dirty or \
+                    not self.__stored():
+                self.__write_snapshot()
+            return
+        with open(FileStorage.__journal_path, "a", encoding="utf-8") as log:
+            for key, op, data in changes:
+                log.write('{{"op": "{}", "key": {}'.format(
+                    op, json.dumps(key)))
+                if data is not None:
+                    log.write(', "data": ' + data)
+                log.write("}\n")
+                FileStorage.__journal_records += 1
+            log.flush()
+            os.fsync(log.fileno())
+        if FileStorage.__journal_records >= FileStorage.__checkpoint_interval:
+            self.__write_snapshot()
+
+    def checkpoint(self):
+        """
+        checkpoint compacts the journal by rewriting __file_path from the
+        private class attribute objects and truncating the journal
         """
-        with open(FileStorage.__file_path, "w", encoding="utf-8") as outfile:
-            temp = FileStorage.__objects.copy()
-            for key in temp:
-                temp[key] = temp[key].to_dict()
-            outfile.write(json.dumps(temp))
+        if FileStorage.__batch_depth:
+            FileStorage.__batch_saved = True
+            return
+        self.__flush()
+        self.__write_snapshot()
+
+    def __flush(self):
+        """
+        __flush re-serializes the pending objects into the fragment cache
+
+        :return (tuple): is the list of (key, op, json data) changes and
+        whether __objects was only changed through the storage methods
+        """
+        objects = FileStorage.__objects
+        fragments = FileStorage.__fragments
+        changes = []
+        for name in {key.partition(".")[0] for key in FileStorage.__pending}:
+            self.__read_class(name)
+            FileStorage.__dirty.add(name)
+        for key, op in FileStorage.__pending.items():
+            obj = objects.get(key)
+            if op == "delete" or obj is None:
+                fragments.pop(key, None)
+                changes.append((key, "delete", None))
+                continue
+            data = None
+            if FileStorage.__format == "json" or FileStorage.__journal:
+                data = json.dumps(obj.to_dict())
+            fragments[key] = self.__fragment(key, obj, data)
+            obj._dirty = False
+            changes.append((key, op, data))
+            for index in FileStorage.__indexes.get(
+                    obj.__class__.__name__, ()):
+                index.add(key, obj)
+        FileStorage.__pending.clear()
+        return changes, self.__sync(thorough=True)
+
+    def __fragment(self, key, obj, data=None):
+        """
+        __fragment encodes obj the way __write_snapshot writes it
+
+        :param key(str): is the storage key of obj
+        :param obj(BaseModel): is the object to encode
+        :param data(str): is the json encoding of obj when already known
+        :return (str): is the json text of the entry, or the bytes of the
+        object record in the binary format
+        """
+        if FileStorage.__format == "binary":
+            name = obj.__class__.__name__
+            return self.__codec_for(name).encode(name,
+                                                 obj.get_attributes())
+        return json.dumps(key) + ": " + (data or json.dumps(obj.to_dict()))
+
+    def __data_path(self):
+        """
+        __data_path returns the path of the file holding the objects
+
+        :return (str): is __binary_path in the binary format and __file_path
+        otherwise
+        """
+        if FileStorage.__format == "binary":
+            return FileStorage.__binary_path
+        return FileStorage.__file_path
+
+    def __segment_paths(self, name=None):
+        """
+        __segment_paths returns the paths of the files holding the objects,
+        or the objects of the class name in the class layout
+
+        :param name(str): is the name of the class
+        :return (list): is the paths of the segments of __data_path, suffixed
+        with name when it is given
+        """
+        path = self.__data_path()
+        if name is not None:
+            path = "{}.{}".format(path, name)
+        return segment_paths(path, FileStorage.__segments)
+
+    def __stored(self):
+        """
+        __stored tells whether the data files were written. In the class
+        layout the files of the classes that never had objects are missing
+
+        :return (bool): is True when the data files exist
+        """
+        if FileStorage.__layout == "class":
+            return True
+        return all(map(os.path.exists, self.__segment_paths()))
+
+    def __codec_for(self, name):
+        """
+        __codec_for returns the codec of the binary files holding the objects
+        of the class name. In the class layout each class has its own codec,
+        since its files are written and read independently
+
+        :param name(str): is the name of the class
+        :return (BinaryCodec): is the codec
+        """
+        if FileStorage.__layout == "class":
+            return FileStorage.__codecs.setdefault(name, BinaryCodec())
+        return FileStorage.__codec
+
+    def __sync(self, thorough=False):
+        """
+        __sync rebuilds the indexes when __objects was changed without going
+        through new or delete, eg. by clearing the dict returned by all or
+        storing another object under a key. The number of objects is
+        compared, and when thorough and all handed out __objects every key
+        is also checked to hold the object indexed under it, the fragments
+        of the keys that do not being dropped to be encoded again
+
+        :param thorough(bool): whether to check every key, which saves do
+        :return (bool): is False when the indexes had to be rebuilt
+        """
+        objects = FileStorage.__objects
+        if FileStorage.__count == len(objects) and \
+                not (thorough and FileStorage.__exposed):
+            return True
+        classes = FileStorage.__classes
+        stale = [key for key, obj in objects.items()
+                 if classes.get(obj.__class__.__name__, {}).get(key)
+                 is not obj]
+        if not stale and FileStorage.__count == len(objects) and \
+                sum(map(len, classes.values())) == len(objects):
+            return True
+        fragments = FileStorage.__fragments
+        for key in stale:
+            fragments.pop(key, None)
+        self.__reindex()
+        FileStorage.__dirty.update(avaliable_classes)
+        return False
+
+    def __reindex(self):
+        """
+        __reindex rebuilds the indexes from __objects, except the indexes of
+        the classes whose files were not read yet in the class layout
+        """
+        classes = {name: {} for name in avaliable_classes}
+        for key, obj in FileStorage.__objects.items():
+            classes.setdefault(obj.__class__.__name__, {})[key] = obj
+        FileStorage.__classes = classes
+        for name, indexes in FileStorage.__indexes.items():
+            if name in FileStorage.__unloaded:
+                continue
+            for index in indexes:
+                index.build(classes.get(name, {}))
+        FileStorage.__count = len(FileStorage.__objects)
+
+    def __write_snapshot(self):
+        """
+        __write_snapshot writes the fragment cache to the data file and
+        truncates the journal, encoding the objects missing from the cache.
+        The fragments are written one at a time to a temporary file that
+        replaces the data file once complete. In the lazy mode the index of
+        the new file is opened in place of the old one. In the class layout
+        only the files of the classes with changed objects are written. The
+        text indexes and the materialized views are then saved next to the
+        data, except the views in the lazy mode, where they only count the
+        objects decoded so far
+        """
+        class_layout = FileStorage.__layout == "class"
+        if class_layout:
+            for name in FileStorage.__dirty:
+                self.__read_class(name)
+        objects = FileStorage.__objects
+        fragments = FileStorage.__fragments
+        for key in [key for key in fragments if key not in objects]:
+            del fragments[key]
+        for key, obj in objects.items():
+            if key not in fragments:
+                fragments[key] = self.__fragment(key, obj)
+                obj._dirty = False
+        if class_layout:
+            for name in sorted(FileStorage.__dirty):
+                self.__write_files(self.__segment_paths(name),
+                                   FileStorage.__classes.get(name, {}),
+                                   self.__codec_for(name))
+        else:
+            self.__write_files(self.__segment_paths(), fragments,
+                               FileStorage.__codec)
+        FileStorage.__dirty = set()
+        if FileStorage.__records is not None:
+            self.__unmap()
+            self.__open_records(FileStorage.__codec)
+        FileStorage.__journal_records = 0
+        if os.path.exists(FileStorage.__journal_path):
+            os.remove(FileStorage.__journal_path)
+        FileStorage.__generation = self.__generation_of()
+        self.__write_sidecar(FileStorage.__text_path,
+                             FileStorage.__text_indexes, len)
+        views = {name: view for name, (cls_name, view) in
+                 FileStorage.__materialized.items()
+                 if FileStorage.__records is None and view.built}
+        self.__write_sidecar(FileStorage.__views_path, views,
+                             lambda view: len(view["groups"]))
+
+    def __generation_of(self):
+        """
+        __generation_of identifies the content of the data files, so that the
+        indexes and views saved next to them are not reused once the files
+        were rewritten without them
+
+        :return (list): holds the path, size and crc32 of each data file
+        """
+        if FileStorage.__layout == "class":
+            paths = [path for name in avaliable_classes
+                     for path in self.__segment_paths(name)]
+        else:
+            paths = self.__segment_paths()
+        generation = []
+        for path in paths:
+            try:
+                with open(path, "rb") as infile:
+                    checksum = 0
+                    for chunk in iter(lambda: infile.read(
+                            FileStorage.__buffer_size), b""):
+                        checksum = zlib.crc32(chunk, checksum)
+            except OSError:
+                continue
+            generation.append([path, os.path.getsize(path), checksum])
+        return generation
+
+    def __write_sidecar(self, path, parts, size):
+        """
+        __write_sidecar saves the text indexes or the materialized views
+        parts to path, one json object per line. The first line holds the
+        dump of every part and each next line what changed since the line
+        before, the file being written again once the appended lines hold
+        more entries than half the first one. Every line holds the
+        generation of the data files it goes with
+
+        :param path(str): is the path of the file
+        :param parts(dict): maps the names to the indexes or views
+        :param size(function): returns the number of entries of a dump
+        """
+        changes = {name: part.dump_changes() for name, part in parts.items()}
+        saved = FileStorage.__sidecars.pop(path, None)
+        generation = FileStorage.__generation
+        appended = sum(size(change) for change in changes.values()
+                       if change is not None)
+        if saved is not None and saved["names"] == sorted(parts) and \
+                None not in changes.values() and \
+                2 * (saved["appended"] + appended) <= saved["total"]:
+            if appended or saved["generation"] != generation:
+                with open(path, "a", encoding="utf-8") as out:
+                    out.write(json.dumps({"generation": generation,
+                                          "parts": changes},
+                                         default=str) + "\n")
+            saved["generation"] = generation
+            saved["appended"] += appended
+            FileStorage.__sidecars[path] = saved
+            return
+        dumps = {name: part.dump() for name, part in parts.items()}
+        with atomic_writer(path, FileStorage.__buffer_size) as out:
+            out.write(json.dumps({"generation": generation, "parts": dumps},
+                                 default=str) + "\n")
+        FileStorage.__sidecars[path] = {
+            "generation": generation, "names": sorted(parts), "appended": 0,
+            "total": sum(map(size, dumps.values()))}
+
+    def __write_files(self, paths, keys, codec):
+        """
+        __write_files writes the fragments of keys to the segment files
+        paths through temporary files that replace them once all are
+        complete
+
+        :param paths(list): is the paths of the segment files
+        :param keys(iterable): is the keys of the objects to write
+        :param codec(BinaryCodec): is the codec that encoded the fragments
+        """
+        binary = FileStorage.__format == "binary"
+        with ExitStack() as stack:
+            outfiles = [stack.enter_context(atomic_writer(
+                path, FileStorage.__buffer_size, binary)) for path in paths]
+            if binary:
+                self.__write_binary(outfiles, keys, codec)
+            else:
+                self.__write_json(outfiles, keys)
+
+    def __write_json(self, outfiles, keys):
+        """
+        __write_json writes the fragments of keys to outfiles as json
+        objects, each fragment going to the segment of its key
+
+        :param outfiles(list): is the text files of the segments
+        :param keys(iterable): is the keys of the objects to write
+        """
+        fragments = FileStorage.__fragments
+        count = len(outfiles)
+        separators = ["{"] * count
+        for key in keys:
+            i = segment_of(key, count)
+            outfiles[i].write(separators[i])
+            outfiles[i].write(fragments[key])
+            separators[i] = ", "
+        for outfile, separator in zip(outfiles, separators):
+            outfile.write("{}" if separator == "{" else "}")
+
+    def __write_binary(self, outfiles, keys, codec):
+        """
+        __write_binary writes the schemas, the fragments of keys and the
+        records not decoded yet to outfiles, followed by the index of the
+        records. Every segment holds all the schemas of codec
+
+        :param outfiles(list): is the binary files of the segments
+        :param keys(iterable): is the keys of the objects to write
+        :param codec(BinaryCodec): is the codec that encoded the fragments
+        """
+        fragments = FileStorage.__fragments
+        count = len(outfiles)
+        schemas = codec.schema_records()
+        positions = [outfile.write(MAGIC) + outfile.write(schemas)
+                     for outfile in outfiles]
+        positions_by_key = [[] for outfile in outfiles]
+        for key in keys:
+            i = segment_of(key, count)
+            positions_by_key[i].append((key, positions[i]))
+            positions[i] += outfiles[i].write(fragments[key])
+        records = FileStorage.__records
+        if records is not None:
+            view = FileStorage.__view
+            for i in range(len(records)):
+                key = records.key(i)
+                if key in FileStorage.__taken.get(key.partition(".")[0], ()):
+                    continue
+                start = records.position(i)
+                end = start + header.size + header.unpack_from(view, start)[1]
+                i = segment_of(key, count)
+                positions_by_key[i].append((key, positions[i]))
+                positions[i] += outfiles[i].write(view[start:end])
+        for outfile, segment_keys, pos in zip(outfiles, positions_by_key,
+                                              positions):
+            segment_keys.sort()
+            outfile.write(index_record(segment_keys))
+            outfile.write(trailer_record(len(MAGIC), pos))
+
+    def __open_records(self, codec):
+        """
+        __open_records maps __binary_path to memory and reads its index, so
+        that its objects are decoded on demand
+
+        :param codec(BinaryCodec): is the codec learning the schemas of the
+        file
+        :return (bool): is False when the file has no index
+        """
+        view = map_view(FileStorage.__binary_path)
+        try:
+            records = RecordIndex(view, codec)
+        except ValueError:
+            close_view(view)
+            return False
+        FileStorage.__view = view
+        FileStorage.__records = records
+        FileStorage.__taken = {name: set(objs) for name, objs in
+                               FileStorage.__classes.items() if objs}
+        return True
+
+    def __close_records(self):
+        """
+        __close_records decodes the objects not requested yet and unmaps
+        __binary_path
+        """
+        self.__load_all()
+        self.__unmap()
+
+    def __unmap(self):
+        """
+        __unmap forgets the objects not requested yet and unmaps
+        __binary_path
+        """
+        if FileStorage.__records is None:
+            return
+        FileStorage.__records = None
+        FileStorage.__taken = {}
+        close_view(FileStorage.__view)
+        FileStorage.__view = None
+
+    def __load(self, name, key=None):
+        """
+        __load decodes the objects of the class name that were not requested
+        yet, or only the object stored under key. The indexes of the class
+        are rebuilt at once when the whole class is decoded
+
+        :param name(str): is the name of the class
+        :param key(str): is the key of the only object to decode
+        :return (BaseModel): is the object stored under key, or None
+        """
+        self.__read_class(name)
+        records = FileStorage.__records
+        if records is None:
+            return None
+        taken = FileStorage.__taken.setdefault(name, set())
+        single = key is not None
+        if single:
+            pos = None if key in taken else records.find(key)
+            if pos is None:
+                return None
+            positions = [(key, pos)]
+        else:
+            span = records.span(name)
+            if len(span) == len(taken):
+                return None
+            positions = ((records.key(i), records.position(i))
+                         for i in span)
+        view = FileStorage.__view
+        obj = None
+        for key, pos in positions:
+            if key in taken:
+                continue
+            key, name, attrs = FileStorage.__codec.decode(view, pos)
+            obj = FileStorage.__models[name](**attrs)
+            taken.add(key)
+            FileStorage.__objects[key] = obj
+            FileStorage.__classes.setdefault(name, {})[key] = obj
+            FileStorage.__count += 1
+            FileStorage.__fragments[key] = bytes(view[
+                pos:pos + header.size + header.unpack_from(view, pos)[1]])
+            if FileStorage.__batch_objects is not None:
+                FileStorage.__batch_objects[key] = obj
+                FileStorage.__batch_taken.setdefault(name, set()).add(key)
+            if single:
+                for index in FileStorage.__indexes.get(name, ()):
+                    index.add(key, obj)
+        if not single:
+            for index in FileStorage.__indexes.get(name, ()):
+                index.build(FileStorage.__classes[name])
+        return obj
+
+    def __load_all(self):
+        """
+        __load_all decodes every object that was not requested yet
+        """
+        if FileStorage.__records is not None or FileStorage.__unloaded:
+            for name in avaliable_classes:
+                self.__load(name)
+
+    def __take(self, key):
+        """
+        __take removes key from the objects left to decode, as the object was
+        replaced or deleted without being requested
+
+        :param key(str): is the storage key
+        :return (bool): is True when key was left to decode
+        """
+        records = FileStorage.__records
+        if records is None:
+            return False
+        taken = FileStorage.__taken.setdefault(key.partition(".")[0], set())
+        if key in taken or records.find(key) is None:
+            return False
+        taken.add(key)
+        return True
 
     def reload(self):
         """
         reload loads the file __file_path and deserialzes the json to __objects
+        then replays the journal on top of it. A torn record at the end of the
+        journal, left by a save that did not complete, is cut off so that the
+        next records are not appended to it. The file is decoded one object at
+        a time and the json text of each object is kept as its fragment, so the
+        next save does not encode it again. In the binary format the objects
+        are read from __binary_path instead, and in the lazy mode only the
+        index of the file is read. The segments of the data file are decoded in
+        parallel worker processes when there are several, the objects being
+        built here. The text indexes saved to __text_path are reused when they
+        go with the data files read, only the objects added, deleted or
+        replayed from the journal being indexed again, except in the lazy mode
+        where the objects are indexed when they are decoded. The groups of the
+        materialized views saved to __views_path are reused the same way, until
+        an object is added or deleted and they are counted again. The indexes
+        are built and the saved ones read when first used. In the class layout
+        no file is read until its class is requested
         """
+        objects = {}
+        fragments = {}
+        codec = BinaryCodec()
+        self.__unmap()
         try:
-            with open(FileStorage.__file_path) as infile:
-                json_data = json.load(infile)
-                if isinstance(json_data, dict):
-                    for key in json_data:
-                        json_data[key] = avaliable_classes[json_data[key]
-                                                           ["__class__"]](
-                            **json_data[key])
-                    FileStorage.__objects = json_data
+            if FileStorage.__format == "binary" and FileStorage.__lazy and \
+                    self.__open_records(codec):
+                FileStorage.__taken = {}
+            elif FileStorage.__layout == "single":
+                self.__read(self.__segment_paths(), codec, objects,
+                            fragments)
+            FileStorage.__objects = objects
+            FileStorage.__exposed = False
         except BaseException:
+            fragments = {}
+            codec = BinaryCodec()
+        FileStorage.__codec = codec
+        FileStorage.__codecs = {}
+        FileStorage.__unloaded = set(avaliable_classes) \
+            if FileStorage.__layout == "class" else set()
+        FileStorage.__dirty = set()
+        FileStorage.__pending.clear()
+        FileStorage.__fragments = fragments
+        FileStorage.__journal_records = 0
+        replayed = []
+        try:
+            with open(FileStorage.__journal_path, "rb") as log:
+                end = 0
+                for line in log:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("torn journal record")
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    self.__replay(record)
+                    replayed.append(record["key"])
+                    FileStorage.__journal_records += 1
+                    end += len(line)
+            if end < os.path.getsize(FileStorage.__journal_path):
+                os.truncate(FileStorage.__journal_path, end)
+        except OSError:
             pass
+        FileStorage.__sidecars = {}
+        if FileStorage.__records is None:
+            FileStorage.__generation = self.__generation_of()
+            saved_text = self.__read_sidecar(FileStorage.__text_path, len,
+                                             self.__merge_words)
+            saved_views = self.__read_sidecar(
+                FileStorage.__views_path, lambda view: len(view["groups"]),
+                self.__merge_groups)
+        for name, index in FileStorage.__text_indexes.items():
+            if FileStorage.__records is None:
+                index.load(lambda name=name: saved_text().get(name))
+        for name, (cls_name, view) in FileStorage.__materialized.items():
+            if FileStorage.__records is None:
+                view.load(lambda name=name: saved_views().get(name))
+            else:
+                view.clear()
+        self.__reindex()
+        for key in replayed:
+            obj = FileStorage.__objects.get(key)
+            for index in FileStorage.__indexes.get(key.partition(".")[0], ()):
+                if obj is None:
+                    index.discard(key)
+                else:
+                    index.add(key, obj)
+
+    def __read_sidecar(self, path, size, merge):
+        """
+        __read_sidecar returns a function reading the text indexes or the
+        materialized views saved to path by __write_sidecar the first time
+        it is called, so that they are only read when first used
+
+        :param path(str): is the path of the file
+        :param size(function): returns the number of entries of a dump
+        :param merge(function): applies the changes of a line to a dump
+        :return (function): returns the dumps by name, empty when the file
+        cannot be read or goes with other data files
+        """
+        content = []
+        generation = FileStorage.__generation
+
+        def read():
+            if not content:
+                try:
+                    with open(path, encoding="utf-8") as infile:
+                        lines = iter(infile)
+                        line = json.loads(next(lines))
+                        parts = line["parts"]
+                        total = sum(map(size, parts.values()))
+                        appended = 0
+                        for text in lines:
+                            line = json.loads(text)
+                            for name, changes in line["parts"].items():
+                                merge(parts[name], changes)
+                                appended += size(changes)
+                    if line["generation"] != generation:
+                        parts = None
+                except (OSError, ValueError, StopIteration, KeyError,
+                        TypeError, AttributeError):
+                    parts = None
+                if isinstance(parts, dict):
+                    FileStorage.__sidecars[path] = {
+                        "generation": generation, "names": sorted(parts),
+                        "appended": appended, "total": total}
+                content.append(parts if isinstance(parts, dict) else {})
+            return content[0]
+        return read
+
+    @staticmethod
+    def __merge_words(docs, changes):
+        """
+        __merge_words applies the words dumped by TextIndex.dump_changes to
+        the words dumped by TextIndex.dump
+
+        :param docs(dict): is the output of dump
+        :param changes(dict): is the output of dump_changes
+        """
+        for key, doc in changes.items():
+            if doc is None:
+                docs.pop(key, None)
+            else:
+                docs[key] = doc
+
+    @staticmethod
+    def __merge_groups(view, changes):
+        """
+        __merge_groups applies the groups dumped by
+        MaterializedView.dump_changes to the groups dumped by
+        MaterializedView.dump
+
+        :param view(dict): is the output of dump, its groups being turned
+        into a dict
+        :param changes(dict): is the output of dump_changes
+        """
+        groups = view["groups"]
+        if not isinstance(groups, dict):
+            groups = view["groups"] = dict(groups)
+        for value, group in changes["groups"]:
+            if group is None:
+                groups.pop(value, None)
+            else:
+                groups[value] = group
+
+    def __read(self, paths, codec, objects, fragments):
+        """
+        __read decodes the objects stored in the segment files paths. A
+        single file is decoded one object at a time, several segments are
+        decoded in parallel worker processes. The garbage collector is
+        paused meanwhile, as its passes over the many objects being built
+        would find nothing to free
+
+        :param paths(list): is the paths of the segment files
+        :param codec(BinaryCodec): is the codec learning the schemas of the
+        files
+        :param objects(dict): receives the objects by key
+        :param fragments(dict): receives the json text or the record bytes
+        of the objects by key
+        """
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            if len(paths) > 1:
+                for schemas, rows in read_segments(
+                        paths, FileStorage.__format,
+                        FileStorage.__buffer_size):
+                    codec.load_schemas(memoryview(schemas), 0)
+                    for key, name, attrs, fragment in rows:
+                        objects[key] = FileStorage.__models[name](**attrs)
+                        fragments[key] = fragment
+            elif FileStorage.__format == "binary":
+                with open_view(paths[0]) as view:
+                    for key, name, attrs, start, end in \
+                            codec.iter_records(view):
+                        objects[key] = FileStorage.__models[name](**attrs)
+                        fragments[key] = bytes(view[start:end])
+            else:
+                with open(paths[0], encoding="utf-8") as file:
+                    for key, data, text in iter_entries(
+                            file, FileStorage.__buffer_size):
+                        objects[key] = FileStorage.__models[
+                            data["__class__"]](**data)
+                        fragments[key] = json.dumps(key) + ": " + text
+        finally:
+            if collecting:
+                gc.enable()
+
+    def __read_class(self, name):
+        """
+        __read_class reads the objects of the class name from its files the
+        first time the class is requested in the class layout. The objects
+        stored since the reload take precedence over the ones read
+
+        :param name(str): is the name of the class
+        """
+        if name not in FileStorage.__unloaded:
+            return
+        FileStorage.__unloaded.discard(name)
+        objects = {}
+        fragments = {}
+        try:
+            self.__read(self.__segment_paths(name), self.__codec_for(name),
+                        objects, fragments)
+        except (OSError, ValueError):
+            return
+        classes = FileStorage.__classes.setdefault(name, {})
+        for key, obj in objects.items():
+            if key in FileStorage.__objects:
+                if FileStorage.__pending.get(key) == "new":
+                    FileStorage.__pending[key] = "update"
+                continue
+            FileStorage.__objects[key] = obj
+            FileStorage.__fragments[key] = fragments[key]
+            FileStorage.__count += 1
+            classes[key] = obj
+            if FileStorage.__batch_objects is not None:
+                FileStorage.__batch_objects[key] = obj
+        for index in FileStorage.__indexes.get(name, ()):
+            index.build(classes)
+
+    def __replay(self, record):
+        """
+        __replay applies a single journal record to __objects
+
+        :param record(dict): is a journal record with op, key and data
+        """
+        name = record["key"].partition(".")[0]
+        self.__read_class(name)
+        FileStorage.__dirty.add(name)
+        self.__take(record["key"])
+        FileStorage.__fragments.pop(record["key"], None)
+        if record["op"] == "delete":
+            FileStorage.__objects.pop(record["key"], None)
+            return
+        data = record["data"]
+        FileStorage.__objects[record["key"]] = FileStorage.__models[
+            data["__class__"]](**data)
@@ -0,0 +1,1202 @@
+#!/usr/bin/python3
+"""Defines the secondary indexes the storage engines keep over the
+ attributes of the stored objects"""
+
+import bisect
+import heapq
+import math
+import re
+import zlib
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """
+    haversine returns the great-circle distance between two points
+
+    :param lat1(float): is the latitude of the first point in degrees
+    :param lon1(float): is the longitude of the first point in degrees
+    :param lat2(float): is the latitude of the second point in degrees
+    :param lon2(float): is the longitude of the second point in degrees
+    :return (float): is the distance in kilometers
+    """
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * \
+        math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def tokenize(text):
+    """
+    tokenize splits a text into lowercase words
+
+    :param text(str): is the text to split
+    :return (list[str]): is the list of words
+    """
+    return re.findall(r"\w+", text.lower())
+
+
+class HashIndex:
+    """Maps each value of an attribute to the objects holding it"""
+
+    def __init__(self, attr):
+        """
+        __init__ instantiates a HashIndex object
+
+        :param attr(str): is the name of the indexed attribute
+        """
+        self.attr = attr
+        self.__buckets = {}
+        self.__values = {}
+        self.__deferred = None
+
+    def add(self, key, obj):
+        """
+        add indexes obj under the current value of its attribute, moving it
+        out of the bucket of its previous value
+
+        :param key(str): is the storage key of obj
+        :param obj(BaseModel): is the object to index
+        """
+        if self.__deferred is not None:
+            self.__deferred[key] = obj
+            return
+        value = getattr(obj, self.attr, None)
+        try:
+            hash(value)
+        except TypeError:
+            self.discard(key)
+            return
+        if key in self.__values:
+            if self.__values[key] == value:
+                self.__buckets[value][key] = obj
+                return
+            self.discard(key)
+        self.__values[key] = value
+        self.__buckets.setdefault(value, {})[key] = obj
+
+    def discard(self, key):
+        """
+        discard removes the object stored under key from the index
+
+        :param key(str): is the storage key of the object
+        """
+        if self.__deferred is not None:
+            self.__deferred.pop(key, None)
+            return
+        if key not in self.__values:
+            return
+        value = self.__values.pop(key)
+        bucket = self.__buckets[value]
+        del bucket[key]
+        if not bucket:
+            del self.__buckets[value]
+
+    def clear(self):
+        """
+        clear removes every object from the index
+        """
+        self.__buckets.clear()
+        self.__values.clear()
+        self.__deferred = None
+
+    def build(self, objects):
+        """
+        build replaces the content of the index with the given objects,
+        which are only bucketed when the index is first used
+
+        :param objects(dict): maps the storage keys to the objects
+        """
+        self.clear()
+        self.__deferred = dict(objects)
+
+    def __ready(self):
+        """
+        __ready buckets the objects given to build
+        """
+        if self.__deferred is None:
+            return
+        objects = self.__deferred
+        self.__deferred = None
+        for key, obj in objects.items():
+            self.add(key, obj)
+
+    def find(self, value):
+        """
+        find returns the objects whose attribute equals value
+
+        :param value(any): is the value to look up
+        :return (dict): is a key value pair that maps the storage keys to
+        the objects
+        """
+        self.__ready()
+        try:
+            return dict(self.__buckets.get(value, {}))
+        except TypeError:
+            return {}
+
+    def estimate(self, value):
+        """
+        estimate returns the number of objects whose attribute equals value
+
+        :param value(any): is the value to look up
+        :return (int): is the number of objects
+        """
+        self.__ready()
+        try:
+            return len(self.__buckets.get(value, {}))
+        except TypeError:
+            return 0
+
+    def groups(self):
+        """
+        groups yields each value of the attribute with the objects holding it
+
+        :return (generator): yields (value, objects) tuples, objects being a
+        view of the objects of the bucket of value
+        """
+        self.__ready()
+        for value, bucket in self.__buckets.items():
+            yield value, bucket.values()
+
+
+class RangeIndex:
+    """Keeps the objects sorted by the value of an attribute so they can be
+    scanned by ranges of values. The objects whose value cannot be sorted
+    are kept apart"""
+
+    def __init__(self, attr):
+        """
+        __init__ instantiates a RangeIndex object
+
+        :param attr(str): is the name of the indexed attribute
+        """
+        self.attr = attr
+        self.__values = []
+        self.__keys = []
+        self.__objects = {}
+        self.__current = {}
+        self.__others = {}
+        self.__deferred = None
+
+    def __len__(self):
+        """
+        __len__ returns the number of indexed objects
+
+        :return (int): is the number of indexed objects
+        """
+        self.__ready()
+        return len(self.__values)
+
+    def add(self, key, obj):
+        """
+        add indexes obj under the current value of its attribute. Values that
+        cannot be ordered with the others, like None, strings among numbers
+        or NaN, are left out of the sorted values and kept with others
+
+        :param key(str): is the storage key of obj
+        :param obj(BaseModel): is the object to index
+        """
+        if self.__deferred is not None:
+            self.__deferred[key] = obj
+            return
+        value = getattr(obj, self.attr, None)
+        if key in self.__current:
+            if self.__current[key] == value:
+                self.__objects[key] = obj
+                return
+            self.discard(key)
+        self.__others.pop(key, None)
+        if value is None or isinstance(value, (bool, str)) or value != value:
+            self.__others[key] = obj
+            return
+        try:
+            i = bisect.bisect_left(self.__keys, key, *self.__ties(value))
+        except TypeError:
+            self.__others[key] = obj
+            return
+        self.__values.insert(i, value)
+        self.__keys.insert(i, key)
+        self.__objects[key] = obj
+        self.__current[key] = value
+
+    def discard(self, key):
+        """
+        discard removes the object stored under key from the index
+
+        :param key(str): is the storage key of the object
+        """
+        if self.__deferred is not None:
+            self.__deferred.pop(key, None)
+            return
+        self.__others.pop(key, None)
+        if key not in self.__current:
+            return
+        value = self.__current.pop(key)
+        del self.__objects[key]
+        i = bisect.bisect_left(self.__keys, key, *self.__ties(value))
+        del self.__values[i]
+        del self.__keys[i]
+
+    def __ties(self, value):
+        """
+        __ties returns the bounds of the run of entries holding value, where
+        the entries are sorted by key
+
+        :param value(any): is the value to look up
+        :return (tuple): is the first position of the run and the position
+        after it
+        """
+        return (bisect.bisect_left(self.__values, value),
+                bisect.bisect_right(self.__values, value))
+
+    def clear(self):
+        """
+        clear removes every object from the index
+        """
+        self.__values.clear()
+        self.__keys.clear()
+        self.__objects.clear()
+        self.__current.clear()
+        self.__others.clear()
+        self.__deferred = None
+
+    def build(self, objects):
+        """
+        build replaces the content of the index with the given objects. They
+        are only sorted when the index is first used, so that building it
+        does not read the indexed attribute of every object
+
+        :param objects(dict): maps the storage keys to the objects
+        """
+        self.clear()
+        self.__deferred = dict(objects)
+
+    def __ready(self):
+        """
+        __ready sorts the objects given to build, once instead of inserting
+        them one by one
+        """
+        if self.__deferred is None:
+            return
+        objects = self.__deferred
+        self.__deferred = None
+        entries = []
+        for key, obj in objects.items():
+            value = getattr(obj, self.attr, None)
+            if value is None or isinstance(value, (bool, str)) or \
+                    value != value:
+                self.__others[key] = obj
+                continue
+            entries.append((value, key))
+            self.__objects[key] = obj
+            self.__current[key] = value
+        try:
+            entries.sort()
+        except TypeError:
+            self.clear()
+            for key, obj in objects.items():
+                self.add(key, obj)
+            return
+        self.__values[:] = [value for value, key in entries]
+        self.__keys[:] = [key for value, key in entries]
+
+    def bounds(self, low=None, high=None, low_inclusive=True,
+               high_inclusive=True):
+        """
+        bounds returns the positions delimiting the values between low and
+        high in the sorted index
+
+        :param low(any): is the lower bound, None for no lower bound
+        :param high(any): is the upper bound, None for no upper bound
+        :param low_inclusive(bool): whether values equal to low are included
+        :param high_inclusive(bool): whether values equal to high are included
+        :return (tuple): is the start and end position
+        """
+        self.__ready()
+        start, end = 0, len(self.__values)
+        if low is not None:
+            bisect_low = bisect.bisect_left if low_inclusive else \
+                bisect.bisect_right
+            start = bisect_low(self.__values, low)
+        if high is not None:
+            bisect_high = bisect.bisect_right if high_inclusive else \
+                bisect.bisect_left
+            end = bisect_high(self.__values, high)
+        return start, max(start, end)
+
+    def estimate(self, low=None, high=None, low_inclusive=True,
+                 high_inclusive=True):
+        """
+        estimate returns the number of objects whose value is between low and
+        high
+
+        :return (int): is the number of objects
+        """
+        start, end = self.bounds(low, high, low_inclusive, high_inclusive)
+        return end - start
+
+    def scan(self, low=None, high=None, low_inclusive=True,
+             high_inclusive=True, reverse=False):
+        """
+        scan yields the objects whose value is between low and high, ordered
+        by value
+
+        :param reverse(bool): whether to yield the largest values first
+        :return (generator): yields (key, object) tuples
+        """
+        start, end = self.bounds(low, high, low_inclusive, high_inclusive)
+        positions = range(end - 1, start - 1, -1) if reverse else \
+            range(start, end)
+        keys = self.__keys
+        for i in positions:
+            if i >= len(keys):
+                return
+            key = keys[i]
+            yield key, self.__objects[key]
+
+    def others(self):
+        """
+        others returns the objects left out of the sorted values, since their
+        value is None or cannot be ordered with the others
+
+        :return (dict): maps the storage keys to the objects
+        """
+        self.__ready()
+        return self.__others
+
+
+class PartitionedIndex:
+    """Keeps a RangeIndex per value of a partition attribute, eg. the places
+    of each city sorted by price, so the first objects of a partition are
+    read without looking at the other partitions"""
+
+    def __init__(self, partition_attr, attr):
+        """
+        __init__ instantiates a PartitionedIndex object
+
+        :param partition_attr(str): is the name of the attribute the objects
+        are partitioned by
+        :param attr(str): is the name of the attribute the objects of each
+        partition are sorted by
+        """
+        self.partition_attr = partition_attr
+        self.attr = attr
+        self.__partitions = {}
+        self.__sizes = {}
+        self.__values = {}
+        self.__deferred = None
+
+    def __len__(self):
+        """
+        __len__ returns the number of indexed objects
+
+        :return (int): is the number of indexed objects
+        """
+        self.__ready()
+        return len(self.__values)
+
+    def add(self, key, obj):
+        """
+        add indexes obj in the partition of its current partition value
+
+        :param key(str): is the storage key of obj
+        :param obj(BaseModel): is the object to index
+        """
+        if self.__deferred is not None:
+            self.__deferred[key] = obj
+            return
+        value = getattr(obj, self.partition_attr, None)
+        try:
+            hash(value)
+        except TypeError:
+            self.discard(key)
+            return
+        if key in self.__values:
+            if self.__values[key] == value:
+                self.__partitions[value].add(key, obj)
+                return
+            self.discard(key)
+        self.__values[key] = value
+        if value not in self.__partitions:
+            self.__partitions[value] = RangeIndex(self.attr)
+            self.__sizes[value] = 0
+        self.__partitions[value].add(key, obj)
+        self.__sizes[value] += 1
+
+    def discard(self, key):
+        """
+        discard removes the object stored under key from the index
+
+        :param key(str): is the storage key of the object
+        """
+        if self.__deferred is not None:
+            self.__deferred.pop(key, None)
+            return
+        if key not in self.__values:
+            return
+        value = self.__values.pop(key)
+        self.__partitions[value].discard(key)
+        self.__sizes[value] -= 1
+        if not self.__sizes[value]:
+            del self.__partitions[value]
+            del self.__sizes[value]
+
+    def clear(self):
+        """
+        clear removes every object from the index
+        """
+        self.__partitions.clear()
+        self.__sizes.clear()
+        self.__values.clear()
+        self.__deferred = None
+
+    def build(self, objects):
+        """
+        build replaces the content of the index with the given objects. They
+        are split in partitions when the index is first used, and each
+        partition is sorted the first time it is used
+
+        :param objects(dict): maps the storage keys to the objects
+        """
+        self.clear()
+        self.__deferred = dict(objects)
+
+    def __ready(self):
+        """
+        __ready splits the objects given to build in partitions
+        """
+        if self.__deferred is None:
+            return
+        objects = self.__deferred
+        self.__deferred = None
+        partitions = {}
+        for key, obj in objects.items():
+            value = getattr(obj, self.partition_attr, None)
+            try:
+                partitions.setdefault(value, {})[key] = obj
+            except TypeError:
+                continue
+            self.__values[key] = value
+        for value, members in partitions.items():
+            self.__partitions[value] = RangeIndex(self.attr)
+            self.__partitions[value].build(members)
+            self.__sizes[value] = len(members)
+
+    def find(self, value):
+        """
+        find returns the sorted index of a partition
+
+        :param value(any): is the partition value
+        :return (RangeIndex): is the index or None when no object has value
+        """
+        self.__ready()
+        try:
+            return self.__partitions.get(value)
+        except TypeError:
+            return None
+
+
+def positions(mask):
+    """
+    positions returns the positions of the bits set in a bitmap
+
+    :param mask(int): is the bitmap
+    :return (generator): yields the positions in increasing order
+    """
+    text = bin(mask)[:1:-1]
+    position = text.find("1")
+    while position != -1:
+        yield position
+        position = text.find("1", position + 1)
+
+
+class BitmapIndex:
+    """Indexes the values of a list attribute, eg. the amenity_ids of the
+    places, as bitmaps held in ints. Each value gets a dense number and each
+    object a dense row, the bitset of an object has the bit of each of its
+    values set and the posting of a value has the row of each of its objects
+    set, so the objects holding several values are found by ANDing the
+    postings of the values"""
+
+    def __init__(self, attr):
+        """
+        __init__ instantiates a BitmapIndex object
+
+        :param attr(str): is the name of the indexed list attribute
+        """
+        self.attr = attr
+        self.__numbers = {}
+        self.__values = []
+        self.__postings = []
+        self.__rows = {}
+        self.__keys = []
+        self.__free = []
+        self.__bits = {}
+        self.__objects = {}
+        self.__deferred = None
+
+    def __len__(self):
+        """
+        __len__ returns the number of indexed objects
+
+        :return (int): is the number of indexed objects
+        """
+        self.__ready()
+        return len(self.__rows)
+
+    def number(self, value, create=False):
+        """
+        number returns the dense number of a value
+
+        :param value(any): is the value, eg. an amenity id
+        :param create(bool): whether to number a value seen for the first
+        time
+        :return (int): is the number or None for an unknown value
+        """
+        self.__ready()
+        try:
+            number = self.__numbers.get(value)
+        except TypeError:
+            return None
+        if number is None and create:
+            number = self.__numbers[value] = len(self.__values)
+            self.__values.append(value)
+            self.__postings.append(0)
+        return number
+
+    def add(self, key, obj):
+        """
+        add indexes the values of the list attribute of obj, replacing the
+        values it was indexed under
+
+        :param key(str): is the storage key of obj
+        :param obj(BaseModel): is the object to index
+        """
+        if self.__deferred is not None:
+            self.__deferred[key] = obj
+            return
+        values = getattr(obj, self.attr, None)
+        bits = 0
+        if isinstance(values, (list, tuple, set)):
+            for value in values:
+                number = self.number(value, create=True)
+                if number is not None:
+                    bits |= 1 << number
+        self.__objects[key] = obj
+        row = self.__rows.get(key)
+        if row is None:
+            row = self.__free.pop() if self.__free else len(self.__keys)
+            if row == len(self.__keys):
+                self.__keys.append(key)
+            else:
+                self.__keys[row] = key
+            self.__rows[key] = row
+            old = 0
+        else:
+            old = self.__bits[key]
+            if old == bits:
+                return
+        self.__bits[key] = bits
+        postings = self.__postings
+        for number in positions(old & ~bits):
+            postings[number] &= ~(1 << row)
+        for number in positions(bits & ~old):
+            postings[number] |= 1 << row
+
+    def discard(self, key):
+        """
+        discard removes the object stored under key from the index, its row
+        being reused by the next object added
+
+        :param key(str): is the storage key of the object
+        """
+        if self.__deferred is not None:
+            self.__deferred.pop(key, None)
+            return
+        row = self.__rows.pop(key, None)
+        if row is None:
+            return
+        postings = self.__postings
+        for number in positions(self.__bits.pop(key)):
+            postings[number] &= ~(1 << row)
+        del self.__objects[key]
+        self.__keys[row] = None
+        self.__free.append(row)
+
+    def clear(self):
+        """
+        clear removes every object from the index, keeping the numbers of
+        the values
+        """
+        self.__postings = [0] * len(self.__values)
+        self.__rows.clear()
+        self.__keys.clear()
+        self.__free.clear()
+        self.__bits.clear()
+        self.__objects.clear()
+        self.__deferred = None
+
+    def build(self, objects):
+        """
+        build replaces the content of the index with the given objects,
+        which are only indexed when the index is first used
+
+        :param objects(dict): maps the storage keys to the objects
+        """
+        self.clear()
+        self.__deferred = dict(objects)
+
+    def __ready(self):
+        """
+        __ready indexes the objects given to build
+        """
+        if self.__deferred is None:
+            return
+        objects = self.__deferred
+        self.__deferred = None
+        for key, obj in objects.items():
+            self.add(key, obj)
+
+    def bits(self, key):
+        """
+        bits returns the bitset of the values of an object
+
+        :param key(str): is the storage key of the object
+        :return (int): has the bit of the number of each value set, None
+        when the object is not indexed
+        """
+        self.__ready()
+        return self.__bits.get(key)
+
+    def mask(self, values=(), keys=None):
+        """
+        mask returns the bitmap of the rows of the objects holding every
+        value
+
+        :param values(iterable): is the values, none for every object
+        :param keys(iterable): is the keys of the objects to keep, None for
+        every object
+        :return (int): is the bitmap
+        """
+        self.__ready()
+        if keys is None:
+            mask = (1 << len(self.__keys)) - 1
+            for row in self.__free:
+                mask &= ~(1 << row)
+        else:
+            mask = 0
+            for key in keys:
+                row = self.__rows.get(key)
+                if row is not None:
+                    mask |= 1 << row
+        for value in values:
+            number = self.number(value)
+            if number is None:
+                return 0
+            mask &= self.__postings[number]
+        return mask
+
+    def find(self, values=(), mask=None):
+        """
+        find returns the objects holding every value
+
+        :param values(iterable): is the values
+        :param mask(int): is the bitmap of the rows to look at, every row
+        when None
+        :return (dict): is a key value pair that maps the storage keys to
+        the objects
+        """
+        found = self.mask(values)
+        if mask is not None:
+            found &= mask
+        keys = self.__keys
+        objects = self.__objects
+        return {keys[row]: objects[keys[row]] for row in positions(found)}
+
+    def estimate(self, values=(), mask=None):
+        """
+        estimate returns the number of objects holding every value
+
+        :return (int): is the number of objects
+        """
+        found = self.mask(values)
+        if mask is not None:
+            found &= mask
+        return found.bit_count()
+
+    def counts(self, mask=None):
+        """
+        counts returns the number of objects holding each value
+
+        :param mask(int): is the bitmap of the rows to count, every row when
+        None
+        :return (dict): maps each value held by an object to its count
+        """
+        self.__ready()
+        counts = {}
+        for value, posting in zip(self.__values, self.__postings):
+            count = (posting if mask is None else posting & mask).bit_count()
+            if count:
+                counts[value] = count
+        return counts
+
+
+class GeoIndex:
+    """Buckets the objects in a grid of latitude/longitude cells so the
+    objects near a point only require looking at a few cells"""
+
+    def __init__(self, lat_attr="latitude", lon_attr="longitude",
+                 cell_size=0.1):
+        """
+        __init__ instantiates a GeoIndex object
+
+        :param lat_attr(str): is the name of the latitude attribute
+        :param lon_attr(str): is the name of the longitude attribute
+        :param cell_size(float): is the side of a cell in degrees
+        """
+        self.attr = (lat_attr, lon_attr)
+        self.__cell_size = cell_size
+        self.__columns = math.ceil(360 / cell_size)
+        self.__cells = {}
+        self.__points = {}
+        self.__deferred = None
+
+    def __len__(self):
+        """
+        __len__ returns the number of indexed objects
+
+        :return (int): is the number of indexed objects
+        """
+        self.__ready()
+        return len(self.__points)
+
+    def __cell(self, lat, lon):
+        """
+        __cell returns the grid cell holding a point
+
+        :return (tuple): is the row and column of the cell
+        """
+        return (math.floor((lat + 90) / self.__cell_size),
+                math.floor((lon + 180) / self.__cell_size) % self.__columns)
+
+    def add(self, key, obj):
+        """
+        add indexes obj under the cell of its current coordinates. Objects
+        whose coordinates are not numbers are left out of the index
+
+        :param key(str): is the storage key of obj
+        :param obj(BaseModel): is the object to index
+        """
+        if self.__deferred is not None:
+            self.__deferred[key] = obj
+            return
+        lat = getattr(obj, self.attr[0], None)
+        lon = getattr(obj, self.attr[1], None)
+        point = self.__points.get(key)
+        if point is not None and point[0] == lat and point[1] == lon:
+            self.__cells[point[2]][key] = obj
+            return
+        self.discard(key)
+        if not all(isinstance(value, (int, float)) and
+                   not isinstance(value, bool) and
+                   math.isfinite(value) for value in (lat, lon)) or \
+                not -90 <= lat <= 90:
+            return
+        cell = self.__cell(lat, lon)
+        self.__points[key] = (lat, lon, cell)
+        self.__cells.setdefault(cell, {})[key] = obj
+
+    def discard(self, key):
+        """
+        discard removes the object stored under key from the index
+
+        :param key(str): is the storage key of the object
+        """
+        if self.__deferred is not None:
+            self.__deferred.pop(key, None)
+            return
+        point = self.__points.pop(key, None)
+        if point is None:
+            return
+        cell = self.__cells[point[2]]
+        del cell[key]
+        if not cell:
+            del self.__cells[point[2]]
+
+    def clear(self):
+        """
+        clear removes every object from the index
+        """
+        self.__cells.clear()
+        self.__points.clear()
+        self.__deferred = None
+
+    def build(self, objects):
+        """
+        build replaces the content of the index with the given objects,
+        which are only put in their cells when the index is first used
+
+        :param objects(dict): maps the storage keys to the objects
+        """
+        self.clear()
+        self.__deferred = dict(objects)
+
+    def __ready(self):
+        """
+        __ready puts the objects given to build in their cells
+        """
+        if self.__deferred is None:
+            return
+        objects = self.__deferred
+        self.__deferred = None
+        for key, obj in objects.items():
+            self.add(key, obj)
+
+    def __candidates(self, min_lat, min_lon, max_lat, max_lon):
+        """
+        __candidates yields the objects of the cells overlapping a bounding
+        box, which may cross the antimeridian when min_lon > max_lon
+
+        :return (generator): yields (key, latitude, longitude, object)
+        """
+        self.__ready()
+        low = self.__cell(max(min_lat, -90), min_lon)
+        high = self.__cell(min(max_lat, 90), max_lon)
+        columns = (high[1] - low[1]) % self.__columns + 1
+        if max_lon - min_lon >= 360:
+            columns = self.__columns
+        if (high[0] - low[0] + 1) * columns > len(self.__cells):
+            cells = [cell for cell in self.__cells
+                     if low[0] <= cell[0] <= high[0] and
+                     (cell[1] - low[1]) % self.__columns < columns]
+        else:
+            cells = [(row, (low[1] + column) % self.__columns)
+                     for row in range(low[0], high[0] + 1)
+                     for column in range(columns)]
+        for cell in cells:
+            for key, obj in self.__cells.get(cell, {}).items():
+                lat, lon = self.__points[key][:2]
+                yield key, lat, lon, obj
+
+    def nearby(self, lat, lon, radius_km, limit=None):
+        """
+        nearby returns the objects within radius_km of a point, closest first
+
+        :param lat(float): is the latitude of the point
+        :param lon(float): is the longitude of the point
+        :param radius_km(float): is the search radius in kilometers
+        :param limit(int): is the maximum number of objects to return
+        :return (list): is a list of (distance in kilometers, key, object)
+        """
+        lat_delta = radius_km / KM_PER_DEGREE
+        if abs(lat) + lat_delta >= 90:
+            lon_delta = 180
+        else:
+            lon_delta = min(180, lat_delta / math.cos(
+                math.radians(abs(lat) + lat_delta)))
+        found = []
+        for key, plat, plon, obj in self.__candidates(
+                lat - lat_delta, lon - lon_delta, lat + lat_delta,
+                lon + lon_delta):
+            distance = haversine(lat, lon, plat, plon)
+            if distance <= radius_km:
+                found.append((distance, key, obj))
+        if limit is not None:
+            return heapq.nsmallest(limit, found, key=lambda item: item[:2])
+        return sorted(found, key=lambda item: item[:2])
+
+    def within_bbox(self, min_lat, min_lon, max_lat, max_lon, limit=None):
+        """
+        within_bbox returns the objects inside a bounding box, closest to its
+        center first. The box crosses the antimeridian when min_lon > max_lon
+
+        :param min_lat(float): is the southern edge of the box
+        :param min_lon(float): is the western edge of the box
+        :param max_lat(float): is the northern edge of the box
+        :param max_lon(float): is the eastern edge of the box
+        :param limit(int): is the maximum number of objects to return
+        :return (list): is a list of (distance in kilometers, key, object)
+        """
+        lon_span = (max_lon - min_lon) % 360
+        if max_lon - min_lon >= 360:
+            lon_span = 360
+        center_lat = (min_lat + max_lat) / 2
+        center_lon = min_lon + lon_span / 2
+        found = []
+        for key, lat, lon, obj in self.__candidates(
+                min_lat, min_lon, max_lat, min_lon + lon_span):
+            if min_lat <= lat <= max_lat and \
+                    (lon - min_lon) % 360 <= lon_span:
+                found.append((haversine(center_lat, center_lon, lat, lon),
+                              key, obj))
+        if limit is not None:
+            return heapq.nsmallest(limit, found, key=lambda item: item[:2])
+        return sorted(found, key=lambda item: item[:2])
+
+
+class TextIndex:
+    """Maps the words of some text attributes to the objects holding them
+    and ranks the objects matching a search with BM25. The words can be
+    saved with dump and dump_changes and restored with load, the objects
+    attached by the next build then keeping their restored words unless
+    they were added or discarded since"""
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, attrs):
+        """
+        __init__ instantiates a TextIndex object
+
+        :param attrs(list[str]): is the list of the indexed attributes
+        """
+        self.attr = tuple(attrs)
+        self.changed = False
+        self.__postings = {}
+        self.__docs = {}
+        self.__lengths = {}
+        self.__objects = {}
+        self.__total_length = 0
+        self.__saved = None
+        self.__trusted = False
+        self.__deferred = None
+        self.__touched = set()
+        self.__changes = set()
+        self.__cleared = True
+
+    def __len__(self):
+        """
+        __len__ returns the number of indexed objects
+
+        :return (int): is the number of indexed objects
+        """
+        self.__ready()
+        return len(self.__docs)
+
+    def __text(self, obj):
+        """
+        __text joins the text attributes of obj
+
+        :param obj(BaseModel): is the object
+        :return (str): is the text of obj
+        """
+        return "\n".join(value for value in
+                         (getattr(obj, attr, "") for attr in self.attr)
+                         if isinstance(value, str))
+
+    def add(self, key, obj):
+        """
+        add indexes the words of the text attributes of obj, unless they did
+        not change since obj was last indexed
+
+        :param key(str): is the storage key of obj
+        :param obj(BaseModel): is the object to index
+        """
+        if self.__deferred is not None:
+            self.__deferred[key] = obj
+            self.__touched.add(key)
+            return
+        self.__ready()
+        text = self.__text(obj)
+        checksum = zlib.crc32(text.encode("utf-8"))
+        doc = self.__docs.get(key)
+        self.__objects[key] = obj
+        if doc is not None and doc[0] == checksum:
+            return
+        self.discard(key)
+        self.__objects[key] = obj
+        terms = {}
+        for term in tokenize(text):
+            terms[term] = terms.get(term, 0) + 1
+        self.__insert(key, checksum, terms)
+
+    def __insert(self, key, checksum, terms):
+        """
+        __insert adds the posting of key to the list of each of its terms
+
+        :param key(str): is the storage key of the object
+        :param checksum(int): is the crc32 of the indexed text
+        :param terms(dict): maps the terms to their frequency in the text
+        """
+        self.__docs[key] = (checksum, terms)
+        self.__lengths[key] = sum(terms.values())
+        for term, frequency in terms.items():
+            self.__postings.setdefault(term, {})[key] = frequency
+            self.__total_length += frequency
+        self.__changes.add(key)
+        self.changed = True
+
+    def discard(self, key):
+        """
+        discard removes the object stored under key from the index
+
+        :param key(str): is the storage key of the object
+        """
+        if self.__deferred is not None:
+            self.__deferred.pop(key, None)
+            self.__touched.add(key)
+            return
+        self.__ready()
+        self.__objects.pop(key, None)
+        doc = self.__docs.pop(key, None)
+        if doc is None:
+            return
+        del self.__lengths[key]
+        for term, frequency in doc[1].items():
+            postings = self.__postings[term]
+            del postings[key]
+            if not postings:
+                del self.__postings[term]
+            self.__total_length -= frequency
+        self.__changes.add(key)
+        self.changed = True
+
+    def clear(self):
+        """
+        clear removes every object from the index
+        """
+        self.__postings.clear()
+        self.__docs.clear()
+        self.__lengths.clear()
+        self.__objects.clear()
+        self.__total_length = 0
+        self.__saved = None
+        self.__trusted = False
+        self.__deferred = None
+        self.__touched = set()
+        self.__changes = set()
+        self.__cleared = True
+        self.changed = True
+
+    def build(self, objects):
+        """
+        build makes the index hold exactly the given objects once it is
+        first used, only reading again the text of the objects that changed
+        since they were indexed. Right after load, only the objects added or
+        discarded since are read again
+
+        :param objects(dict): maps the storage keys to the objects
+        """
+        if self.__deferred is not None:
+            self.__trusted = False
+        self.__deferred = dict(objects)
+        self.__touched = set()
+
+    def __ready(self):
+        """
+        __ready attaches the objects given to build, indexing the words of
+        the ones whose text changed
+        """
+        self.__restore()
+        if self.__deferred is None:
+            return
+        objects = self.__deferred
+        touched = self.__touched
+        trusted = self.__trusted
+        self.__deferred = None
+        self.__touched = set()
+        self.__trusted = False
+        for key in [key for key in self.__docs if key not in objects]:
+            self.discard(key)
+        for key, obj in objects.items():
+            if trusted and key in self.__docs and key not in touched:
+                self.__objects[key] = obj
+            else:
+                self.add(key, obj)
+
+    def dump(self):
+        """
+        dump returns the content of the index in a form json can serialize
+
+        :return (dict): maps the storage keys to the checksum and terms of
+        their text
+        """
+        self.__ready()
+        self.__changes = set()
+        self.__cleared = False
+        self.changed = False
+        return {key: list(doc) for key, doc in self.__docs.items()}
+
+    def dump_changes(self):
+        """
+        dump_changes returns the words of the objects indexed again or
+        discarded since the last dump or load, in a form json can serialize
+
+        :return (dict): maps the storage keys to the checksum and terms of
+        their text, None for the discarded objects. The whole dict is None
+        when the index was cleared since, and has to be dumped whole
+        """
+        self.__ready()
+        if self.__cleared:
+            return None
+        changes = {key: list(self.__docs[key]) if key in self.__docs else None
+                   for key in self.__changes}
+        self.__changes = set()
+        self.changed = False
+        return changes
+
+    def load(self, docs):
+        """
+        load replaces the content of the index with the output of dump. The
+        objects must then be attached again with build
+
+        :param docs(dict|function): is the output of dump, or a function
+        returning it that is called the first time the index is used, None
+        when nothing was saved
+        """
+        self.clear()
+        self.__saved = docs if callable(docs) else lambda: docs
+        self.__trusted = True
+        self.changed = False
+
+    def __restore(self):
+        """
+        __restore inserts the words given to load the first time they are
+        needed
+        """
+        if self.__saved is None:
+            return
+        docs = self.__saved()
+        self.__saved = None
+        if not isinstance(docs, dict):
+            self.__trusted = False
+            self.changed = True
+            return
+        for key, (checksum, terms) in docs.items():
+            self.__insert(key, checksum, terms)
+        self.__changes = set()
+        self.__cleared = False
+        self.changed = False
+
+    def search(self, text, limit=None):
+        """
+        search returns the objects holding any word of text, best match first
+
+        :param text(str): is the text to search for
+        :param limit(int): is the maximum number of objects to return
+        :return (list): is a list of (score, key, object)
+        """
+        self.__ready()
+        count = len(self.__docs)
+        if not count:
+            return []
+        average_length = self.__total_length / count or 1
+        scores = {}
+        for term in set(tokenize(text)):
+            postings = self.__postings.get(term, {})
+            idf = math.log(1 + (count - len(postings) + 0.5) /
+                           (len(postings) + 0.5))
+            for key, frequency in postings.items():
+                length = self.__lengths[key]
+                scores[key] = scores.get(key, 0) + idf * frequency * \
+                    (self.k1 + 1) / (frequency + self.k1 * (
+                        1 - self.b + self.b * length / average_length))
+        found = [(-score, key) for key, score in scores.items()
+                 if key in self.__objects]
+        found = heapq.nsmallest(limit, found) if limit is not None else \
+            sorted(found)
+        return [(-score, key, self.__objects[key]) for score, key in found]
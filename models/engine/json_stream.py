@@ -0,0 +1,134 @@
+#!/usr/bin/python3
+"""Defines functions that read the entries of a json object from a file one
+ at a time and write files through a buffer, so that a large file never has
+ to be held in memory whole"""
+
+from contextlib import contextmanager
+import json
+import os
+import re
+
+
+CHUNK_SIZE = 1 << 20
+
+decoder = json.JSONDecoder()
+whitespace = re.compile(r"[ \t\n\r]*")
+delimiters = frozenset(" \t\n\r,:]}")
+
+
+def iter_entries(infile, chunk_size=CHUNK_SIZE):
+    """
+    iter_entries reads the json object held in infile chunk by chunk and
+    yields its entries one at a time. Only the entry being decoded and one
+    chunk are held in memory. A value is only taken once the character
+    after it is read, so that a number cut by the end of a chunk is not
+    decoded short
+
+    :param infile(file): is the text file to read
+    :param chunk_size(int): is the number of characters read at a time
+    :return (generator): yields the key, the decoded value and the json
+    text of the value of each entry
+    """
+    buf = ""
+    pos = 0
+    eof = False
+    state = "start"
+    while state != "end":
+        pos = whitespace.match(buf, pos).end()
+        if pos == len(buf) or state in ("key", "value"):
+            if pos == len(buf):
+                if eof:
+                    raise ValueError("unexpected end of json data")
+                buf, eof = read_more(infile, buf, pos, chunk_size)
+                pos = 0
+                continue
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                buf, eof = read_more(infile, buf, pos, chunk_size)
+                pos = 0
+                continue
+            if not eof and (end == len(buf) or buf[end] not in delimiters):
+                buf, eof = read_more(infile, buf, pos, chunk_size)
+                pos = 0
+                continue
+            if state == "key":
+                if not isinstance(value, str):
+                    raise ValueError("object keys must be strings")
+                key = value
+                state = "colon"
+            else:
+                yield key, value, buf[pos:end]
+                state = "next"
+            pos = end
+            if pos > chunk_size:
+                buf = buf[pos:]
+                pos = 0
+            continue
+        char = buf[pos]
+        pos += 1
+        if state == "start" and char == "{":
+            state = "first"
+        elif state in ("first", "next") and char == "}":
+            state = "end"
+        elif state == "first":
+            pos -= 1
+            state = "key"
+        elif state == "next" and char == ",":
+            state = "key"
+        elif state == "colon" and char == ":":
+            state = "value"
+        else:
+            raise ValueError("unexpected {} at {} of json data".format(
+                repr(char), state))
+    while True:
+        if whitespace.match(buf, pos).end() != len(buf):
+            raise ValueError("extra data after json object")
+        if eof:
+            return
+        buf, eof = read_more(infile, buf, len(buf), chunk_size)
+        pos = 0
+
+
+def read_more(infile, buf, pos, chunk_size):
+    """
+    read_more drops the characters of buf before pos and appends the next
+    chunk of infile
+
+    :param infile(file): is the text file to read
+    :param buf(str): is the buffer
+    :param pos(int): is the position of the first character to keep
+    :param chunk_size(int): is the number of characters to read
+    :return (tuple): is the new buffer and whether the file is exhausted
+    """
+    chunk = infile.read(chunk_size)
+    return buf[pos:] + chunk, not chunk
+
+
+@contextmanager
+def atomic_writer(path, buffer_size=CHUNK_SIZE, binary=False):
+    """
+    atomic_writer opens a temporary file next to path for writing and moves
+    it over path when the with block exits, so that path is never left half
+    written. The temporary file is removed if the block raises
+
+    :param path(str): is the path of the file to write
+    :param buffer_size(int): is the size in bytes of the write buffer
+    :param binary(bool): whether to open the file in binary mode
+    :return (file): is the temporary file open for writing
+    """
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "wb" if binary else "w",
+                  encoding=None if binary else "utf-8",
+                  buffering=buffer_size) as outfile:
+            yield outfile
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
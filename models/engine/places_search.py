@@ -0,0 +1,133 @@
+#!/usr/bin/python3
+"""Defines the places_search function that serves the filter bar of the
+ places listing: the places of some states and cities having some
+ amenities within a price range, one page at a time, with the number of
+ matching places per amenity and per price bucket"""
+
+from models.city import City
+from models.place import Place
+import bisect
+import heapq
+import itertools
+
+price_buckets = (0, 50, 100, 200, 500)
+
+
+def bucket_labels(buckets):
+    """
+    bucket_labels returns the names of the price buckets
+
+    :param buckets(tuple): is the increasing lower bounds of the buckets
+    :return (list): is the list of names, eg. "50-100" for the prices from
+    50 up to 100 excluded and "500+" for the last bucket
+    """
+    return ["{}-{}".format(low, high) for low, high in
+            zip(buckets, buckets[1:])] + ["{}+".format(buckets[-1])]
+
+
+def is_number(value):
+    """
+    is_number checks that a value is an int or a float
+
+    :param value(any): is the value
+    :return (bool): whether value is a number
+    """
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def order_key(obj):
+    """
+    order_key orders the places by price then id, the places without a
+    price last
+
+    :param obj(Place): is the place
+    :return (tuple): is the sort key
+    """
+    price = obj.price_by_night
+    return (not is_number(price), price if is_number(price) else 0, obj.id)
+
+
+def places_search(storage, states=None, cities=None, amenities=None,
+                  price_range=None, max_guest=None, page=1, per_page=20,
+                  buckets=price_buckets):
+    """
+    places_search returns the places of the given states and cities that
+    have every given amenity, a price in price_range and room for max_guest
+    guests. The filters are turned into a query, which reads the places
+    from the index expected to return the fewest of them and checks the
+    other filters on those only, the cities of the states being read from
+    the City.state_id index. Without any filter, and when every place has
+    a price, the counts are read from the indexes alone
+
+    :param storage(FileStorage): is the storage engine holding the places
+    :param states(list): is the ids of the states, None for any state
+    :param cities(list): is the ids of the cities, added to the cities of
+    the states
+    :param amenities(list): is the ids of the amenities a place must have
+    :param price_range(tuple): is the lowest and highest price, both
+    included, None for no bound
+    :param max_guest(int): is the number of guests a place must fit
+    :param page(int): is the number of the page, from 1
+    :param per_page(int): is the number of places of a page
+    :param buckets(tuple): is the increasing lower bounds of the price
+    buckets
+    :return (dict): holds the total number of matching places, the page
+    and per_page, the places of the page ordered by price and the facets,
+    the number of matching places per amenity id and per price bucket
+    """
+    if page < 1 or per_page < 1:
+        raise ValueError("page and per_page must be positive")
+    conditions = {}
+    if states or cities:
+        city_ids = set(cities or ())
+        for state_id in states or ():
+            city_ids.update(city.id for city in storage.find_by(
+                City, "state_id", state_id).values())
+        conditions["city_id__in"] = city_ids
+    if amenities:
+        conditions["amenity_ids__contains"] = list(amenities)
+    low, high = price_range or (None, None)
+    if low is not None:
+        conditions["price_by_night__gte"] = low
+    if high is not None:
+        conditions["price_by_night__lte"] = high
+    if max_guest is not None:
+        conditions["max_guest__gte"] = max_guest
+    buckets = tuple(buckets)
+    labels = bucket_labels(buckets)
+    offset = (page - 1) * per_page
+    bitmap = storage.get_index(Place, "amenity_ids", bitmap=True)
+    prices = storage.get_index(Place, "price_by_night", ordered=True)
+    total = storage.count(Place)
+    if not conditions and bitmap is not None and prices is not None and \
+            prices.estimate() == total:
+        places = storage.query(Place).order_by("price_by_night") \
+            .limit(offset + per_page)
+        return {"total": total, "page": page,
+                "per_page": per_page,
+                "places": list(itertools.islice(places, offset, None)),
+                "facets": {"amenities": bitmap.counts(), "price": {
+                    label: prices.estimate(low, high, True, False)
+                    for label, low, high in zip(
+                        labels, buckets, buckets[1:] + (None,))}}}
+    found = storage.query(Place).where(**conditions).all()
+    price_counts = dict.fromkeys(labels, 0)
+    for obj in found:
+        price = obj.price_by_night
+        if is_number(price) and price >= buckets[0]:
+            price_counts[labels[bisect.bisect_right(buckets, price) - 1]] += 1
+    if bitmap is not None:
+        amenity_counts = bitmap.counts(bitmap.mask(keys=(
+            "Place." + obj.id for obj in found)))
+    else:
+        amenity_counts = {}
+        for obj in found:
+            if not isinstance(obj.amenity_ids, list):
+                continue
+            for amenity_id in set(obj.amenity_ids):
+                amenity_counts[amenity_id] = \
+                    amenity_counts.get(amenity_id, 0) + 1
+    return {"total": len(found), "page": page, "per_page": per_page,
+            "places": heapq.nsmallest(offset + per_page, found,
+                                      key=order_key)[offset:],
+            "facets": {"amenities": amenity_counts, "price": price_counts}}
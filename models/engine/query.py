@@ -0,0 +1,302 @@
+#!/usr/bin/python3
+"""Defines the Query class that filters, orders and limits the objects of
+ a storage engine, reading them through the most selective index"""
+
+import heapq
+import itertools
+import operator
+
+
+operators = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "in": lambda value, values: value in values,
+    "contains": lambda value, values: all(item in value for item in values)}
+
+
+class Query:
+    """Creates a Query object over the objects of one class"""
+
+    def __init__(self, storage, cls):
+        """
+        __init__ instantiates a Query object
+
+        :param storage(FileStorage): is the storage engine holding the objects
+        :param cls(type): is the class of the queried objects
+        """
+        self.__storage = storage
+        self.__cls = cls
+        self.__conditions = []
+        self.__order = None
+        self.__limit = None
+
+    def where(self, **conditions):
+        """
+        where adds conditions that the objects must all match. A condition is
+        written attr=value, or attr__op=value where op is one of eq, ne, lt,
+        lte, gt, gte, in, or contains for the list attributes holding every
+        given value
+
+        :param conditions(dict): is a dict of conditions
+        :return (Query): is this query
+        """
+        for name, value in conditions.items():
+            attr, _, op = name.partition("__")
+            op = op or "eq"
+            if op not in operators:
+                raise ValueError("unknown operator {}".format(op))
+            self.__conditions.append((attr, op, value))
+        return self
+
+    def order_by(self, attr):
+        """
+        order_by orders the objects by the attribute attr, largest first when
+        attr starts with -
+
+        :param attr(str): is the name of the attribute
+        :return (Query): is this query
+        """
+        self.__order = (attr.lstrip("-"), attr.startswith("-"))
+        return self
+
+    def limit(self, count):
+        """
+        limit sets the maximum number of objects returned
+
+        :param count(int): is the maximum number of objects
+        :return (Query): is this query
+        """
+        if count < 0:
+            raise ValueError("limit must not be negative")
+        self.__limit = count
+        return self
+
+    def __iter__(self):
+        """
+        __iter__ yields the matching objects, reading them lazily from the
+        chosen index
+
+        :return (generator): yields the objects
+        """
+        plan = self.__plan()
+        matches = (obj for key, obj in plan["source"]() if self.__match(obj))
+        if self.__order is not None and plan["order"] != "index":
+            attr, reverse = self.__order
+            if self.__limit is not None:
+                pick = heapq.nlargest if reverse else heapq.nsmallest
+                matches = iter(pick(self.__limit, matches,
+                                    key=sort_key(attr)))
+            else:
+                matches = iter(sorted(matches, key=sort_key(attr),
+                                      reverse=reverse))
+        if self.__limit is not None:
+            matches = itertools.islice(matches, self.__limit)
+        return matches
+
+    def all(self):
+        """
+        all returns the matching objects
+
+        :return (list): is the list of objects
+        """
+        return list(self)
+
+    def first(self):
+        """
+        first returns the first matching object
+
+        :return (BaseModel): is the object or None if nothing matches
+        """
+        return next(iter(self), None)
+
+    def explain(self):
+        """
+        explain describes how the query is executed
+
+        :return (dict): holds the chosen plan, the index it reads, the
+        estimated number of objects read from it and how they are ordered
+        """
+        plan = self.__plan()
+        return {"plan": plan["plan"], "index": plan["index"],
+                "estimated_rows": plan["rows"], "order": plan["order"],
+                "limit": self.__limit}
+
+    def __match(self, obj):
+        """
+        __match checks that obj matches every condition
+
+        :param obj(BaseModel): is the object to check
+        :return (bool): whether obj matches
+        """
+        for attr, op, value in self.__conditions:
+            try:
+                if not operators[op](getattr(obj, attr, None), value):
+                    return False
+            except TypeError:
+                return False
+        return True
+
+    def __plan(self):
+        """
+        __plan lists the ways of reading the objects and picks the one that
+        reads the fewest. The objects a sorted index leaves out, like the
+        ones whose value is None, are read from it as well
+
+        :return (dict): is the chosen plan
+        """
+        storage = self.__storage
+        cls = self.__cls
+        name = cls.__name__
+        total = storage.count(cls)
+        plans = [{"plan": "class scan", "index": name, "rows": total,
+                  "cost": total, "order": None,
+                  "source": lambda: storage.all(cls).items()}]
+        bounds = {}
+        for attr, op, value in self.__conditions:
+            hash_index = storage.get_index(cls, attr)
+            if hash_index is not None and op in ("eq", "in"):
+                values = [value] if op == "eq" else list(value)
+                rows = sum(hash_index.estimate(val) for val in values)
+                plans.append({
+                    "plan": "hash index", "rows": rows, "cost": rows,
+                    "index": "{}.{}".format(name, attr), "order": None,
+                    "source": hash_source(hash_index, values)})
+            bitmap_index = storage.get_index(cls, attr, bitmap=True) \
+                if op == "contains" else None
+            if bitmap_index is not None:
+                rows = bitmap_index.estimate(value)
+                plans.append({
+                    "plan": "bitmap index", "rows": rows, "cost": rows,
+                    "index": "{}.{}".format(name, attr), "order": None,
+                    "source": bitmap_source(bitmap_index, value)})
+            if op in ("eq", "lt", "lte", "gt", "gte"):
+                bounds.setdefault(attr, [None, None])
+                if op in ("eq", "gt", "gte"):
+                    bounds[attr][0] = (value, op != "gt")
+                if op in ("eq", "lt", "lte"):
+                    bounds[attr][1] = (value, op != "lt")
+        order_attr, reverse = self.__order or (None, False)
+        if order_attr is not None:
+            bounds.setdefault(order_attr, [None, None])
+        scans = {attr: (low and low[0], high and high[0],
+                        low[1] if low else True, high[1] if high else True)
+                 for attr, (low, high) in bounds.items()}
+        for attr, args in scans.items():
+            range_index = storage.get_index(cls, attr, ordered=True)
+            if range_index is None:
+                continue
+            try:
+                rows = range_index.estimate(*args) + \
+                    len(range_index.others())
+            except TypeError:
+                continue
+            plans.append({
+                "plan": "range index", "rows": rows, "cost": rows,
+                "index": "{}.{}".format(name, attr),
+                "order": "index" if attr == order_attr else None,
+                "source": range_source(range_index, args,
+                                       attr == order_attr and reverse)})
+        for within, op, value in self.__conditions:
+            if op != "eq":
+                continue
+            for attr, args in scans.items():
+                index = storage.get_index(cls, attr, ordered=True,
+                                          within=within)
+                if index is None:
+                    continue
+                partition = index.find(value)
+                try:
+                    rows = partition.estimate(*args) + \
+                        len(partition.others()) if partition else 0
+                except TypeError:
+                    continue
+                plans.append({
+                    "plan": "partitioned index", "rows": rows, "cost": rows,
+                    "index": "{}.{} per {}".format(name, attr, within),
+                    "order": "index" if attr == order_attr else None,
+                    "source": range_source(partition, args,
+                                           attr == order_attr and reverse)
+                    if partition else lambda: iter(())})
+        best = min(plans, key=lambda plan: plan["cost"])
+        if self.__limit is not None:
+            for plan in plans:
+                if plan["order"] == "index" and best["rows"]:
+                    plan["cost"] = min(plan["rows"], self.__limit *
+                                       plan["rows"] / best["rows"])
+        best = min(plans, key=lambda plan: (plan["cost"],
+                                            plan["order"] != "index"))
+        if order_attr is not None and best["order"] != "index":
+            best["order"] = "sort" if self.__limit is None else "top-k heap"
+        return best
+
+
+def hash_source(index, values):
+    """
+    hash_source returns a function reading the objects holding any of the
+    values from a hash index
+
+    :param index(HashIndex): is the index to read
+    :param values(list): is the list of values to look up
+    :return (function): returns an iterable of (key, object)
+    """
+    def source():
+        seen = set()
+        for value in values:
+            for key, obj in index.find(value).items():
+                if key not in seen:
+                    seen.add(key)
+                    yield key, obj
+    return source
+
+
+def bitmap_source(index, values):
+    """
+    bitmap_source returns a function reading the objects holding every value
+    from a bitmap index
+
+    :param index(BitmapIndex): is the index to read
+    :param values(list): is the list of values
+    :return (function): returns an iterable of (key, object)
+    """
+    return lambda: index.find(values).items()
+
+
+def range_source(index, args, reverse):
+    """
+    range_source returns a function reading the objects between two bounds
+    from a range index, followed by the objects left out of its sorted
+    values, or preceded by them when the largest values are read first,
+    which is where sort_key puts the objects missing the attribute
+
+    :param index(RangeIndex): is the index to read
+    :param args(tuple): is the low, high, low_inclusive and high_inclusive
+    arguments of the scan
+    :param reverse(bool): whether to read the largest values first
+    :return (function): returns an iterable of (key, object)
+    """
+    def source():
+        others = list(index.others().items())
+        if reverse:
+            yield from others
+        yield from index.scan(*args, reverse=reverse)
+        if not reverse:
+            yield from others
+    return source
+
+
+def sort_key(attr):
+    """
+    sort_key returns a key function ordering the objects by attr, with the
+    objects missing attr last
+
+    :param attr(str): is the name of the attribute
+    :return (function): is the key function
+    """
+    def key(obj):
+        value = getattr(obj, attr, None)
+        return (value is None, value)
+    return key
@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+"""Defines functions that spread the stored objects over several segment
+ files by the hash of their key and decode the segments in parallel worker
+ processes. The workers only decode, the objects are built by the caller"""
+
+from models.engine.binary_format import BinaryCodec, open_view
+from models.engine.json_stream import CHUNK_SIZE, iter_entries
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import json
+import os
+import zlib
+
+
+def segment_paths(path, count):
+    """
+    segment_paths returns the paths of the segment files of path
+
+    :param path(str): is the path of the data file
+    :param count(int): is the number of segments
+    :return (list): is [path] for a single segment, else path suffixed with
+    the number of each segment
+    """
+    if count == 1:
+        return [path]
+    return ["{}.{}".format(path, i) for i in range(count)]
+
+
+def segment_of(key, count):
+    """
+    segment_of returns the segment holding key. The hash does not depend on
+    the process, so a key stays in the same segment across runs
+
+    :param key(str): is the storage key
+    :param count(int): is the number of segments
+    :return (int): is the number of the segment
+    """
+    if count == 1:
+        return 0
+    return zlib.crc32(key.encode("utf-8")) % count
+
+
+def read_segment(path, format="json", buffer_size=CHUNK_SIZE):
+    """
+    read_segment decodes every object of a segment file
+
+    :param path(str): is the path of the segment file
+    :param format(str): is "json" or "binary"
+    :param buffer_size(int): is the size of the chunks read from a json file
+    :return (tuple): is the schema records of the file and the list of the
+    key, the class name, the dict of the attributes and the fragment of
+    each object
+    """
+    rows = []
+    if format == "binary":
+        codec = BinaryCodec()
+        with open_view(path) as view:
+            for key, name, attrs, start, end in codec.iter_records(view):
+                rows.append((key, name, attrs, bytes(view[start:end])))
+        return codec.schema_records(), rows
+    with open(path, encoding="utf-8") as infile:
+        for key, data, text in iter_entries(infile, buffer_size):
+            rows.append((key, data["__class__"], data,
+                         json.dumps(key) + ": " + text))
+    return b"", rows
+
+
+def read_segments(paths, format="json", buffer_size=CHUNK_SIZE,
+                  workers=None):
+    """
+    read_segments decodes the segment files in a pool of worker processes.
+    Each worker sends back the objects of a whole segment at once
+
+    :param paths(list): is the paths of the segment files
+    :param format(str): is "json" or "binary"
+    :param buffer_size(int): is the size of the chunks read from a json file
+    :param workers(int): is the number of worker processes, by default one
+    per segment up to the number of cpus. With a single worker the segments
+    are decoded in the calling process
+    :return (generator): yields the result of read_segment for each path
+    in order
+    """
+    if workers is None:
+        workers = min(len(paths), os.cpu_count() or 1)
+    if workers <= 1:
+        yield from map(read_segment, paths, repeat(format),
+                       repeat(buffer_size))
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(read_segment, paths, repeat(format),
+                                repeat(buffer_size))
@@ -0,0 +1,458 @@
+#!/usr/bin/python3
+"""Defines the SQLiteStorage class that persists objects to a sqlite
+ database with one table per class"""
+
+from models.base_model import BaseModel
+from models.engine.file_storage import avaliable_classes, hash_indexes, \
+    range_indexes, text_indexes
+from models.engine.indexes import TextIndex
+from models.engine.query import Query
+from models.engine.places_search import places_search
+from models.engine.aggregation import aggregate
+from contextlib import contextmanager
+import datetime
+import json
+import sqlite3
+
+
+CREATE_TABLE = 'CREATE TABLE IF NOT EXISTS "{}" ' \
+    '(id TEXT PRIMARY KEY, data TEXT NOT NULL)'
+SELECT_ONE = 'SELECT data FROM "{}" WHERE id = ?'
+CREATE_INDEX = 'CREATE INDEX IF NOT EXISTS "{0}_{1}" ' \
+    'ON "{0}" (json_extract(data, \'$.{1}\'))'
+SELECT_ALL = 'SELECT id, data FROM "{}"'
+COUNT_OTHERS = 'SELECT COUNT(*) FROM "{}" ' \
+    'WHERE id NOT IN (SELECT value FROM json_each(?))'
+SELECT_BY = 'SELECT id, data FROM "{0}" ' \
+    'WHERE json_extract(data, \'$.{1}\') = ?'
+SELECT_RANGE = 'SELECT id, data FROM "{0}" ' \
+    'WHERE json_extract(data, \'$.{1}\') IS NOT NULL{2} ' \
+    'ORDER BY json_extract(data, \'$.{1}\') {3} LIMIT ?'
+UPSERT = 'INSERT INTO "{}" (id, data) VALUES (?, ?) ' \
+    'ON CONFLICT(id) DO UPDATE SET data = excluded.data'
+DELETE = 'DELETE FROM "{}" WHERE id = ?'
+
+
+class SQLiteStorage:
+    """Creates a SQLiteStorage object that persists objects to a sqlite
+    database, loading them lazily"""
+
+    def __init__(self, db_path="hbnb.db"):
+        """
+        __init__ instantiates a SQLiteStorage object
+
+        :param db_path(str): is the path of the sqlite database file
+        """
+        self.__db_path = db_path
+        self.__connection = None
+        self.__objects = {}
+        self.__classes = {name: {} for name in avaliable_classes}
+        self.__loaded = set()
+        self.__pending = {}
+        self.__removed = {}
+        self.__batch_depth = 0
+        self.__batch_saved = False
+
+    def all(self, cls=None):
+        """
+        all loads every stored object, or only the objects of type cls when
+        it is given, and returns them
+
+        :param cls(type): is the class of the objects to return
+        :return (dict): is a new dict that maps object id to their
+        respective objects
+        """
+        if cls is None:
+            for name in avaliable_classes:
+                self.__load_class(name)
+            return dict(self.__objects)
+        if not isinstance(cls, type):
+            raise TypeError("cls must be a class")
+        self.__load_class(cls.__name__)
+        return dict(self.__classes[cls.__name__])
+
+    def count(self, cls=None):
+        """
+        count returns the number of stored objects, or the number of objects
+        of type cls when it is given, counting the rows of the classes that
+        are not loaded without reading them
+
+        :param cls(type): is the class of the objects to count
+        :return (int): is the number of objects
+        """
+        if cls is None:
+            return sum(self.__count_class(name) for name in avaliable_classes)
+        return self.__count_class(cls.__name__)
+
+    def add_index(self, cls, attr):
+        """
+        add_index creates a database index on the attribute attr of the
+        objects of type cls
+
+        :param cls(type): is the class of the indexed objects
+        :param attr(str): is the name of the indexed attribute
+        """
+        with self.__connection:
+            self.__connection.execute(CREATE_INDEX.format(cls.__name__, attr))
+
+    def find_by(self, cls, attr, value):
+        """
+        find_by returns the objects of type cls whose attribute attr equals
+        value, reading the matching rows and checking the unsaved objects
+
+        :param cls(type): is the class of the objects
+        :param attr(str): is the name of the attribute
+        :param value(any): is the value to look up
+        :return (dict): is a key value pair that maps object id to their
+        respective objects
+        """
+        name = cls.__name__
+        found = {}
+        rows = self.__connection.execute(
+            SELECT_BY.format(name, attr), (value,))
+        for id, data in rows:
+            key = "{}.{}".format(name, id)
+            if key in self.__pending or key in self.__removed:
+                continue
+            obj = self.__objects.get(key)
+            if obj is None:
+                obj = cls(**json.loads(data))
+                self.__objects[key] = self.__classes[name][key] = obj
+            found[key] = obj
+        for key, op in self.__pending.items():
+            obj = self.__objects.get(key)
+            if op != "delete" and obj.__class__.__name__ == name and \
+                    getattr(obj, attr, None) == value:
+                found[key] = obj
+        return found
+
+    def get_index(self, cls, attr, ordered=False, within=None,
+                  bitmap=False):
+        """
+        get_index returns None as the database indexes cannot serve queries
+        over the objects held in memory
+
+        :return (None): is None
+        """
+        return None
+
+    def query(self, cls):
+        """
+        query starts a query over the objects of type cls, which scans the
+        objects of the class
+
+        :param cls(type): is the class of the queried objects
+        :return (Query): is the query
+        """
+        return Query(self, cls)
+
+    def aggregate(self, cls, group_by=None, metrics=None, label=None,
+                  **conditions):
+        """
+        aggregate groups the objects of type cls by the attribute group_by
+        and computes metrics over each group, eg. aggregate(Place,
+        group_by="city_id", metrics={"avg": "price_by_night", "count": "*"},
+        label="name"). See models.engine.aggregation.aggregate
+
+        :param cls(type): is the class of the objects
+        :param group_by(str): is the name of the attribute to group by,
+        following the attributes referring to other classes with dots
+        :param metrics(dict): maps the name of each metric to its attribute
+        :param label(str): is the attribute of the class group_by refers to
+        added to each group
+        :param conditions(dict): is a dict of conditions the objects must
+        match, written like in Query.where
+        :return (dict): maps each group value to the dict of its metrics
+        """
+        return aggregate(self, cls, group_by, metrics, label, conditions,
+                         avaliable_classes)
+
+    def places_search(self, states=None, cities=None, amenities=None,
+                      price_range=None, max_guest=None, page=1, per_page=20):
+        """
+        places_search returns a page of the places matching the filters with
+        the number of matching places per amenity and per price bucket, eg.
+        places_search(states=[state.id], amenities=[wifi.id],
+        price_range=(50, 150)). See models.engine.places_search
+
+        :param states(list): is the ids of the states
+        :param cities(list): is the ids of the cities
+        :param amenities(list): is the ids of the amenities a place must have
+        :param price_range(tuple): is the lowest and highest price
+        :param max_guest(int): is the number of guests a place must fit
+        :param page(int): is the number of the page, from 1
+        :param per_page(int): is the number of places of a page
+        :return (dict): holds the total, the page, per_page, the places and
+        the facets
+        """
+        return places_search(self, states, cities, amenities, price_range,
+                             max_guest, page, per_page)
+
+    def search(self, cls, text, limit=20):
+        """
+        search returns the objects of type cls whose text attributes hold any
+        word of text, best match first, ranking the objects of the class
+        through a throwaway index over the attributes of text_indexes, or
+        the name for the classes missing from it
+
+        :param cls(type): is the class of the objects
+        :param text(str): is the text to search for
+        :param limit(int): is the maximum number of objects to return
+        :return (list): is the list of objects
+        """
+        index = TextIndex(text_indexes.get(cls.__name__, ["name"]))
+        index.build(self.all(cls))
+        return [obj for score, key, obj in index.search(text, limit)]
+
+    def find_range(self, cls, attr, low=None, high=None, limit=None,
+                   reverse=False):
+        """
+        find_range returns the objects of type cls whose attribute attr is
+        between low and high, both included, ordered by attr. Objects whose
+        row does not hold attr are left out
+
+        :param cls(type): is the class of the objects
+        :param attr(str): is the name of the attribute
+        :param low(any): is the lower bound, None for no lower bound
+        :param high(any): is the upper bound, None for no upper bound
+        :param limit(int): is the maximum number of objects to return
+        :param reverse(bool): whether to return the largest values first
+        :return (list): is the list of objects
+        """
+        name = cls.__name__
+        where = ""
+        params = []
+        for bound, op in [(low, ">="), (high, "<=")]:
+            if bound is None:
+                continue
+            where += " AND json_extract(data, '$.{}') {} ?".format(attr, op)
+            if isinstance(bound, datetime.datetime):
+                bound = bound.isoformat()
+            params.append(bound)
+        params.append(-1 if limit is None else limit + len(self.__pending))
+        sql = SELECT_RANGE.format(name, attr, where,
+                                  "DESC" if reverse else "ASC")
+        found = {}
+        for id, data in self.__connection.execute(sql, params):
+            key = "{}.{}".format(name, id)
+            if key in self.__pending or key in self.__removed:
+                continue
+            obj = self.__objects.get(key)
+            if obj is None:
+                obj = cls(**json.loads(data))
+                self.__objects[key] = self.__classes[name][key] = obj
+            found[key] = obj
+        for key, op in self.__pending.items():
+            obj = self.__objects.get(key)
+            value = getattr(obj, attr, None)
+            if op == "delete" or obj.__class__.__name__ != name or \
+                    value is None:
+                continue
+            if (low is None or value >= low) and \
+                    (high is None or value <= high):
+                found[key] = obj
+        found = sorted(found.values(), key=lambda obj: getattr(obj, attr),
+                       reverse=reverse)
+        return found if limit is None else found[:limit]
+
+    def new(self, obj: BaseModel):
+        """
+        new creates a new entry for the input obj, inserted into the database
+        on the next save
+
+        :param obj(BaseModel): new object to be stored
+        """
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        self.__pending[key] = "upsert"
+        self.__removed.pop(key, None)
+        self.__objects[key] = obj
+        self.__classes.setdefault(obj.__class__.__name__, {})[key] = obj
+
+    def get(self, cls, id):
+        """
+        get returns the object of type cls with the given id, reading it from
+        the database the first time it is requested
+
+        :param cls(type): is the class of the object
+        :param id(str): is the id of the object
+        :return (BaseModel): is the object or None if it is not stored
+        """
+        key = "{}.{}".format(cls.__name__, id)
+        obj = self.__objects.get(key)
+        if obj is not None or key in self.__removed or \
+                cls.__name__ in self.__loaded:
+            return obj
+        row = self.__connection.execute(
+            SELECT_ONE.format(cls.__name__), (id,)).fetchone()
+        if row is None:
+            return None
+        obj = cls(**json.loads(row[0]))
+        self.__objects[key] = obj
+        self.__classes[cls.__name__][key] = obj
+        return obj
+
+    def delete(self, obj: BaseModel):
+        """
+        delete removes obj, deleting its row on the next save
+
+        :param obj(BaseModel): is the object to be removed
+        """
+        name = obj.__class__.__name__
+        key = "{}.{}".format(name, obj.id)
+        if self.__objects.pop(key, None) is None:
+            return
+        self.__classes[name].pop(key, None)
+        self.__pending[key] = "delete"
+        self.__removed[key] = obj
+
+    def mark_dirty(self, obj: BaseModel):
+        """
+        mark_dirty records that a stored object changed so that the next
+        save writes its row
+
+        :param obj(BaseModel): is the object that changed
+        """
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        if key in self.__objects:
+            self.__pending[key] = "upsert"
+
+    def save(self):
+        """
+        save upserts the rows of the changed objects and deletes the rows of
+        the removed ones in a single transaction
+        """
+        if self.__batch_depth:
+            self.__batch_saved = True
+            return
+        upserts = {}
+        deletes = {}
+        for key, op in self.__pending.items():
+            name, id = key.split(".", 1)
+            if op == "delete":
+                deletes.setdefault(name, []).append((id,))
+                continue
+            obj = self.__objects[key]
+            upserts.setdefault(name, []).append(
+                (id, json.dumps(obj.to_dict())))
+            obj._dirty = False
+        with self.__connection:
+            for name, rows in upserts.items():
+                self.__connection.executemany(UPSERT.format(name), rows)
+            for name, rows in deletes.items():
+                self.__connection.executemany(DELETE.format(name), rows)
+        self.__pending.clear()
+        self.__removed.clear()
+
+    @contextmanager
+    def batch(self):
+        """
+        batch defers every save made inside the with block to a single
+        transaction when the block exits. The changes pending before the
+        block are saved first so that if the block raises, the changed
+        objects can be restored from the database
+        """
+        if self.__batch_depth:
+            self.__batch_depth += 1
+            try:
+                yield self
+            finally:
+                self.__batch_depth -= 1
+            return
+        self.save()
+        self.__batch_saved = False
+        self.__batch_depth = 1
+        try:
+            yield self
+        except BaseException:
+            self.__batch_depth = 0
+            self.__rollback()
+            raise
+        finally:
+            self.__batch_depth = 0
+        if self.__batch_saved:
+            self.save()
+
+    def reload(self):
+        """
+        reload opens the database, creating the tables of the missing classes,
+        and drops the loaded objects so they are read again on demand
+        """
+        if self.__connection is None:
+            self.__connection = sqlite3.connect(self.__db_path)
+            self.__connection.execute("PRAGMA journal_mode=WAL")
+            self.__connection.execute("PRAGMA synchronous=NORMAL")
+        with self.__connection:
+            for name in avaliable_classes:
+                self.__connection.execute(CREATE_TABLE.format(name))
+            for declared in [hash_indexes, range_indexes]:
+                for name, attrs in declared.items():
+                    for attr in attrs:
+                        self.__connection.execute(
+                            CREATE_INDEX.format(name, attr))
+        self.__objects.clear()
+        for objs in self.__classes.values():
+            objs.clear()
+        self.__loaded.clear()
+        self.__pending.clear()
+        self.__removed.clear()
+
+    def close(self):
+        """
+        close closes the database connection
+        """
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+
+    def __count_class(self, name):
+        """
+        __count_class returns the number of objects of the class name: the
+        rows without pending changes plus the unsaved new or changed objects
+
+        :param name(str): is the name of the class
+        :return (int): is the number of objects
+        """
+        if name in self.__loaded:
+            return len(self.__classes[name])
+        pending = [key.partition(".")[2] for key in self.__pending
+                   if key.partition(".")[0] == name]
+        rows = self.__connection.execute(COUNT_OTHERS.format(name),
+                                         (json.dumps(pending),)).fetchone()[0]
+        return rows + sum(1 for id in pending
+                          if self.__pending[name + "." + id] == "upsert")
+
+    def __load_class(self, name):
+        """
+        __load_class reads every row of the class name that is not loaded yet
+
+        :param name(str): is the name of the class
+        """
+        if name in self.__loaded:
+            return
+        cls = avaliable_classes[name]
+        objs = self.__classes[name]
+        for id, data in self.__connection.execute(SELECT_ALL.format(name)):
+            key = "{}.{}".format(name, id)
+            if key not in self.__objects and key not in self.__removed:
+                objs[key] = self.__objects[key] = cls(**json.loads(data))
+        self.__loaded.add(name)
+
+    def __rollback(self):
+        """
+        __rollback discards the pending changes, restoring the changed objects
+        from their rows
+        """
+        for key in self.__pending:
+            name, id = key.split(".", 1)
+            obj = self.__objects.pop(key, None) or self.__removed.get(key)
+            self.__classes[name].pop(key, None)
+            row = self.__connection.execute(
+                SELECT_ONE.format(name), (id,)).fetchone()
+            if row is None:
+                continue
+            obj.set_attributes(avaliable_classes[name](
+                **json.loads(row[0])).get_attributes())
+            obj._dirty = False
+            self.__classes[name][key] = self.__objects[key] = obj
+        self.__pending.clear()
+        self.__removed.clear()
@@ -1,22 +1,27 @@
 #!/usr/bin/python3
 """This module defines a Place class"""
-from models.base_model import BaseModel
+import models
+from models.base_model import BaseModel, ListDefault
+from models.amenity import Amenity
+from models.review import Review
 
 
 class Place(BaseModel):
     """Defines a Place object"""
 
-    city_id = ""
-    user_id = ""
-    name = ""
-    description = ""
-    number_rooms = 0
-    number_bathrooms = 0
-    max_guest = 0
-    price_by_night = 0
-    latitude = 0.0
-    longitude = 0.0
-    amenity_ids = []
+    __slots__ = ()
+
+    city_id: str = ""
+    user_id: str = ""
+    name: str = ""
+    description: str = ""
+    number_rooms: int = 0
+    number_bathrooms: int = 0
+    max_guest: int = 0
+    price_by_night: int = 0
+    latitude: float = 0.0
+    longitude: float = 0.0
+    amenity_ids: list = ListDefault()
 
     def __init__(self, *args, **kwargs):
         """
@@ -26,3 +31,44 @@ class Place(BaseModel):
         :param kwargs(dict): is a dict of key/value pairs to init the object
         """
         super().__init__(*args, **kwargs)
+
+    @property
+    def reviews(self):
+        """
+        reviews returns the reviews of this place
+
+        :return (list[Review]): is the list of reviews whose place_id is the
+        id of this place
+        """
+        return list(models.storage.find_by(
+            Review, "place_id", self.id).values())
+
+    @property
+    def review_count(self):
+        """
+        review_count returns the number of reviews of this place, read from
+        the reviews_by_place view of the storage when it keeps one so that
+        places can be ordered by it without reading their reviews
+
+        :return (int): is the number of reviews whose place_id is the id of
+        this place
+        """
+        if hasattr(models.storage, "view"):
+            return models.storage.view("reviews_by_place").get(
+                self.id)["count"]
+        return len(models.storage.find_by(Review, "place_id", self.id))
+
+    @property
+    def amenities(self):
+        """
+        amenities returns the amenities of this place
+
+        :return (list[Amenity]): is the list of stored amenities whose id is
+        in amenity_ids
+        """
+        amenities = []
+        for amenity_id in self.amenity_ids:
+            amenity = models.storage.get(Amenity, amenity_id)
+            if amenity is not None:
+                amenities.append(amenity)
+        return amenities
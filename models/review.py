@@ -6,9 +6,11 @@ from models.base_model import BaseModel
 class Review(BaseModel):
     """Defines a Review object"""
 
-    place_id = ""
-    user_id = ""
-    text = ""
+    __slots__ = ()
+
+    place_id: str = ""
+    user_id: str = ""
+    text: str = ""
 
     def __init__(self, *args, **kwargs):
         """
@@ -1,11 +1,16 @@
 #!/usr/bin/python3
 """This module define a State class"""
+import models
 from models.base_model import BaseModel
+from models.city import City
 
 
 class State(BaseModel):
     """Defines a State object"""
-    name = ""
+
+    __slots__ = ()
+
+    name: str = ""
 
     def __init__(self, *args, **kwargs):
         """
@@ -15,3 +20,13 @@ class State(BaseModel):
         :param kwargs(dict): is a dict of key/value pairs to init the object
         """
         super().__init__(*args, **kwargs)
+
+    @property
+    def cities(self):
+        """
+        cities returns the cities of this state
+
+        :return (list[City]): is the list of cities whose state_id is the id
+        of this state
+        """
+        return list(models.storage.find_by(City, "state_id", self.id).values())
@@ -1,15 +1,20 @@
 #!/usr/bin/python3
 """This module defines a User class"""
+import models
 from models.base_model import BaseModel
+from models.place import Place
+from models.review import Review
 
 
 class User(BaseModel):
     """Define a User object"""
 
-    email = ""
-    password = ""
-    first_name = ""
-    last_name = ""
+    __slots__ = ()
+
+    email: str = ""
+    password: str = ""
+    first_name: str = ""
+    last_name: str = ""
 
     def __init__(self, *args, **kwargs):
         """
@@ -19,3 +24,24 @@ class User(BaseModel):
         :param kwargs(dict): is a dict of key/value pairs to init the object
         """
         super().__init__(*args, **kwargs)
+
+    @property
+    def places(self):
+        """
+        places returns the places owned by this user
+
+        :return (list[Place]): is the list of places whose user_id is the id
+        of this user
+        """
+        return list(models.storage.find_by(Place, "user_id", self.id).values())
+
+    @property
+    def reviews(self):
+        """
+        reviews returns the reviews written by this user
+
+        :return (list[Review]): is the list of reviews whose user_id is the
+        id of this user
+        """
+        return list(models.storage.find_by(
+            Review, "user_id", self.id).values())
@@ -0,0 +1,30 @@
+#!/usr/bin/python3
+"""Runs each test module in a temporary working directory, so that the data
+ file and the files saved next to it never touch the ones of the repository.
+ A test module saving objects imports setUpModule and tearDownModule"""
+import os
+import sys
+import tempfile
+
+saved = []
+
+
+def setUpModule():
+    """
+    setUpModule moves to a new temporary working directory, making the paths
+    of sys.path absolute so that the repository can still be imported from
+    """
+    saved.append((os.getcwd(), sys.path[:], tempfile.TemporaryDirectory()))
+    sys.path[:] = [os.path.abspath(path or os.curdir) for path in sys.path]
+    os.chdir(saved[-1][2].name)
+
+
+def tearDownModule():
+    """
+    tearDownModule goes back to the previous working directory and sys.path
+    and removes the temporary directory
+    """
+    cwd, path, workdir = saved.pop()
+    os.chdir(cwd)
+    sys.path[:] = path
+    workdir.cleanup()
@@ -7,8 +7,14 @@ from console import HBNBCommand
 from unittest.mock import patch
 from io import StringIO
 import os
+import tempfile
 from models import storage
 from models.engine.file_storage import FileStorage
+from models.engine.sqlite_storage import SQLiteStorage
+from models.user import User
+from models.city import City
+from models.place import Place
+from tests import setUpModule, tearDownModule
 
 
 class TestConsolePrompt(unittest.TestCase):
@@ -107,3 +113,93 @@ or <class name>.update(<id>, <dictionary representation>)
         \n"""
         self.assertFalse(HBNBCommand().onecmd("help update"))
         self.assertEqual(output, sys.stdout.getvalue())
+
+
+class TestConsoleCountAll(unittest.TestCase):
+
+    def setUp(self):
+        storage.all().clear()
+
+    @patch('sys.stdout', new=StringIO())
+    def test_count(self):
+        HBNBCommand().onecmd("create State")
+        HBNBCommand().onecmd("create State")
+        HBNBCommand().onecmd("create City")
+        sys.stdout.truncate(0)
+        sys.stdout.seek(0)
+        HBNBCommand().onecmd(HBNBCommand().precmd("State.count()"))
+        self.assertEqual("2\n", sys.stdout.getvalue())
+
+    @patch('sys.stdout', new=StringIO())
+    def test_all_class(self):
+        HBNBCommand().onecmd("create State")
+        HBNBCommand().onecmd("create City")
+        sys.stdout.truncate(0)
+        sys.stdout.seek(0)
+        HBNBCommand().onecmd("all City")
+        output = sys.stdout.getvalue()
+        self.assertIn("[City]", output)
+        self.assertNotIn("[State]", output)
+
+    @patch('sys.stdout', new=StringIO())
+    def test_search(self):
+        HBNBCommand().onecmd("create User")
+        user_id = sys.stdout.getvalue().strip()
+        storage.get(User, user_id).first_name = "Betty"
+        HBNBCommand().onecmd("create User")
+        sys.stdout.truncate(0)
+        sys.stdout.seek(0)
+        HBNBCommand().onecmd(HBNBCommand().precmd('User.search("betty")'))
+        output = sys.stdout.getvalue()
+        self.assertIn(user_id, output)
+        self.assertEqual(1, output.count("[User]"))
+        sys.stdout.truncate(0)
+        sys.stdout.seek(0)
+        HBNBCommand().onecmd("search User")
+        self.assertEqual("** search text missing **\n", sys.stdout.getvalue())
+
+    @patch('sys.stdout', new=StringIO())
+    def test_search_sqlite(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        sqlite = SQLiteStorage(os.path.join(tmpdir.name, "hbnb.db"))
+        sqlite.reload()
+        self.addCleanup(sqlite.close)
+        user = User()
+        user.first_name = "Betty"
+        sqlite.new(user)
+        sqlite.save()
+        with patch("console.storage", sqlite):
+            HBNBCommand().onecmd("search User betty")
+        self.assertIn(user.id, sys.stdout.getvalue())
+
+    @patch('sys.stdout', new=StringIO())
+    def test_aggregate(self):
+        HBNBCommand().onecmd("create City")
+        city_id = sys.stdout.getvalue().strip()
+        storage.get(City, city_id).name = "Ikeja"
+        for price in (80, 20):
+            HBNBCommand().onecmd("create Place")
+            place_id = sys.stdout.getvalue().split()[-1]
+            place = storage.get(Place, place_id)
+            place.city_id = city_id
+            place.price_by_night = price
+            place.save()
+        sys.stdout.truncate(0)
+        sys.stdout.seek(0)
+        HBNBCommand().onecmd(HBNBCommand().precmd(
+            'Place.aggregate("city_id:name", "avg=price_by_night", '
+            '"count=*")'))
+        self.assertEqual(
+            "{} {{'avg': 50.0, 'count': 2, 'label': 'Ikeja'}}\n".format(
+                city_id), sys.stdout.getvalue())
+        sys.stdout.truncate(0)
+        sys.stdout.seek(0)
+        HBNBCommand().onecmd("aggregate Place city_id median=price_by_night")
+        self.assertEqual("** unknown function median **\n",
+                         sys.stdout.getvalue())
+        sys.stdout.truncate(0)
+        sys.stdout.seek(0)
+        HBNBCommand().onecmd("aggregate Place")
+        self.assertEqual("** group by attribute missing **\n",
+                         sys.stdout.getvalue())
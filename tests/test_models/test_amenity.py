@@ -14,6 +14,7 @@ from models.engine.file_storage import FileStorage
 from datetime import datetime
 
 import unittest
+from tests import setUpModule, tearDownModule
 
 storage = FileStorage()
 
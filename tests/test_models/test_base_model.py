@@ -8,15 +8,23 @@ import sys
 from time import sleep
 from unittest.mock import patch
 import uuid
-from models.base_model import BaseModel
+from models.base_model import BaseModel, CompactModel, DictModel, \
+    compact_class
+from models.place import Place
 from models.engine.file_storage import FileStorage
 from datetime import datetime
 
 import unittest
+import tests
+from tests import tearDownModule
 
 storage = FileStorage()
-storage.all().clear()
-storage.save()
+
+
+def setUpModule():
+    tests.setUpModule()
+    storage.all().clear()
+    storage.save()
 
 
 def fake_uuid4():
@@ -158,6 +166,77 @@ class TestBaseModelStringRepresentation(unittest.TestCase):
             self.assertTrue(item in stdout_value)
 
 
+class TestBaseModelDirty(unittest.TestCase):
+
+    def test_new_object_is_dirty(self):
+        self.assertTrue(BaseModel()._dirty)
+
+    def test_kwargs_object_is_clean(self):
+        obj = BaseModel(**BaseModel().to_dict())
+        self.assertFalse(obj._dirty)
+
+    def test_setattr_marks_dirty(self):
+        obj = BaseModel(**BaseModel().to_dict())
+        obj.name = "Betty"
+        self.assertTrue(obj._dirty)
+
+    def test_dirty_flag_not_serialized(self):
+        obj = BaseModel()
+        self.assertNotIn("_dirty", obj.to_dict())
+        self.assertNotIn("_dirty", obj.__dict__)
+
+
+class TestBaseModelLazyDatetime(unittest.TestCase):
+
+    def setUp(self):
+        self.text = "2017-09-28T21:05:54.000000"
+        self.obj = BaseModel(id="1", created_at=self.text,
+                             updated_at=self.text)
+
+    def test_text_is_parsed_on_first_read(self):
+        self.assertEqual(str, type(self.obj._created_at))
+        self.assertEqual(datetime(2017, 9, 28, 21, 5, 54),
+                         self.obj.created_at)
+        self.assertIs(self.obj.created_at, self.obj.created_at)
+        self.assertEqual(str, type(self.obj._updated_at))
+
+    def test_key_order(self):
+        obj = BaseModel(id="1", name="Loft", created_at=self.text,
+                        updated_at=self.text)
+        self.assertEqual(["id", "created_at", "updated_at", "name",
+                          "__class__"], list(obj.to_dict()))
+        self.assertIn("{'id': '1', 'created_at': datetime", str(obj))
+        obj = compact_class(Place)(**obj.to_dict())
+        self.assertEqual(["id", "created_at", "updated_at", "name"],
+                         list(obj.get_attributes()))
+
+    def test_to_dict_reuses_text(self):
+        self.obj.created_at
+        self.assertEqual(self.text, self.obj.to_dict()["created_at"])
+        self.assertEqual(self.text, self.obj.to_dict()["updated_at"])
+        self.obj.updated_at = datetime(2017, 9, 28, 21, 5, 54)
+        self.assertEqual("2017-09-28T21:05:54",
+                         self.obj.to_dict()["updated_at"])
+
+    def test_invalid_values(self):
+        with self.assertRaises(TypeError):
+            self.obj.created_at = 1
+        self.obj.updated_at = "today"
+        with self.assertRaises(ValueError):
+            self.obj.updated_at
+
+    def test_set_attributes(self):
+        attrs = self.obj.get_attributes()
+        self.assertEqual(datetime(2017, 9, 28, 21, 5, 54),
+                         attrs["updated_at"])
+        obj = BaseModel(id="2")
+        obj.set_attributes(attrs)
+        self.assertEqual(attrs, obj.get_attributes())
+        obj.set_attributes({"id": "2"})
+        with self.assertRaises(AttributeError):
+            obj.created_at
+
+
 class TestBaseModelSave(unittest.TestCase):
     def setUp(self):
         try:
@@ -242,5 +321,86 @@ class TestBaseModelToDict(unittest.TestCase):
         self.assertEqual(str, type(dict_rep["created_at"]))
 
 
+class TestCompactModel(unittest.TestCase):
+
+    def setUp(self):
+        self.data = Place(name="Loft", foo="bar", **Place().to_dict())
+        self.data = self.data.to_dict()
+
+    def test_fields(self):
+        fields = Place.fields()
+        self.assertEqual(["id", "created_at", "updated_at", "city_id"],
+                         list(fields)[:4])
+        self.assertIs(float, fields["latitude"])
+        self.assertEqual({"id": str, "created_at": datetime,
+                          "updated_at": datetime}, BaseModel.fields())
+
+    def test_compact_class(self):
+        cls = compact_class(Place)
+        self.assertIs(cls, compact_class(Place))
+        self.assertIs(cls, compact_class(cls))
+        self.assertTrue(issubclass(cls, Place))
+        self.assertTrue(issubclass(cls, CompactModel))
+        self.assertEqual("Place", cls.__name__)
+
+    def test_no_dict(self):
+        obj = compact_class(Place)(**self.data)
+        self.assertFalse(hasattr(obj, "__dict__"))
+        self.assertFalse(hasattr(compact_class(BaseModel)(), "__dict__"))
+        self.assertIs(compact_class(Place), compact_class(type(Place())))
+        obj = Place(**self.data)
+        self.assertIsInstance(obj, Place)
+        self.assertIsInstance(obj, DictModel)
+        self.assertEqual("bar", obj.__dict__["foo"])
+
+    def test_kwargs(self):
+        obj = compact_class(Place)(**self.data)
+        self.assertEqual(self.data, obj.to_dict())
+        self.assertEqual("Loft", obj.name)
+        self.assertEqual("bar", obj.foo)
+        self.assertEqual(0, obj.max_guest)
+        self.assertEqual({"foo": "bar"}, obj._extra)
+        self.assertFalse(obj._dirty)
+        self.assertIn("'name': 'Loft'", str(obj))
+        with self.assertRaises(AttributeError):
+            obj.missing
+
+    def test_no_kwargs(self):
+        obj = compact_class(BaseModel)()
+        self.assertIsNone(obj._extra)
+        self.assertEqual(["id", "created_at", "updated_at"],
+                         list(obj.get_attributes()))
+
+    def test_setattr_marks_dirty(self):
+        obj = compact_class(Place)(**self.data)
+        with patch("models.storage.mark_dirty") as mark_dirty:
+            obj.description = "Quiet"
+            obj.age = 3
+        mark_dirty.assert_called_once_with(obj)
+        self.assertEqual(("Quiet", 3), (obj.description, obj.age))
+        del obj.age
+        del obj.description
+        self.assertEqual("", obj.description)
+        with self.assertRaises(AttributeError):
+            obj.age
+
+    def test_list_defaults_are_not_shared(self):
+        obj = compact_class(Place)(**self.data)
+        self.assertEqual([], obj.amenity_ids)
+        self.assertFalse(obj._dirty)
+        obj.amenity_ids.append("wifi")
+        self.assertEqual(["wifi"], obj.to_dict()["amenity_ids"])
+        self.assertEqual([], compact_class(Place)(**self.data).amenity_ids)
+
+    def test_set_attributes(self):
+        obj = compact_class(Place)(**self.data)
+        attrs = obj.get_attributes().copy()
+        obj.name = "Hut"
+        obj.age = 3
+        obj.set_attributes(attrs)
+        self.assertEqual(self.data, obj.to_dict())
+        self.assertEqual({"foo": "bar"}, obj._extra)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -8,14 +8,21 @@ from time import sleep
 from unittest.mock import patch
 import uuid
 from models.city import City
+from models.place import Place
 from models.engine.file_storage import FileStorage
 from datetime import datetime
 
 import unittest
+import tests
+from tests import tearDownModule
 
 storage = FileStorage()
-storage.all().clear()
-storage.save()
+
+
+def setUpModule():
+    tests.setUpModule()
+    storage.all().clear()
+    storage.save()
 
 
 def fake_uuid4():
@@ -237,5 +244,20 @@ class TestCityToDict(unittest.TestCase):
         self.assertIn("name", obj.to_dict().keys())
 
 
+class TestCityPlaces(unittest.TestCase):
+    def setUp(self):
+        storage.all().clear()
+
+    def test_places(self):
+        city = City()
+        place = Place()
+        place.city_id = city.id
+        place.save()
+        Place()
+        self.assertEqual([place], city.places)
+        storage.delete(place)
+        self.assertEqual([], city.places)
+
+
 if __name__ == "__main__":
     unittest.main()
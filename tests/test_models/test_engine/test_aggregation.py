@@ -0,0 +1,152 @@
+#!/usr/bin/python3
+"""This module contains unittest code for the aggregation module"""
+
+import models
+from models.engine.aggregation import MaterializedView, parse_metrics, \
+    parent_class
+from models.engine.file_storage import avaliable_classes
+from models.city import City
+from models.place import Place
+from models.review import Review
+from models.state import State
+import json
+import unittest
+from tests import setUpModule, tearDownModule
+
+
+class TestAggregate(unittest.TestCase):
+
+    def setUp(self):
+        models.storage.all().clear()
+        self.state = State()
+        self.state.name = "Lagos"
+        self.state.save()
+        self.cities = []
+        for name in ("Ikeja", "Lekki"):
+            city = City()
+            city.name = name
+            city.state_id = self.state.id
+            city.save()
+            self.cities.append(city)
+        self.places = []
+        for i, price in enumerate([80, 20, 150, 50, "free"]):
+            place = Place()
+            place.price_by_night = price
+            place.city_id = self.cities[i % 2].id
+            place.save()
+            self.places.append(place)
+
+    def test_group_by_indexed_attribute(self):
+        groups = models.storage.aggregate(
+            Place, group_by="city_id",
+            metrics={"avg": "price_by_night", "count": "*"})
+        ikeja, lekki = (city.id for city in self.cities)
+        self.assertEqual({ikeja: {"avg": 115.0, "count": 3},
+                          lekki: {"avg": 35.0, "count": 2}}, groups)
+
+    def test_group_by_scan_and_conditions(self):
+        groups = models.storage.aggregate(
+            Place, group_by="max_guest", price_by_night__gte=50,
+            metrics={"count": "*", "low": "min:price_by_night",
+                     "high": "max:price_by_night",
+                     "sum": "price_by_night"})
+        self.assertEqual({0: {"count": 3, "low": 50, "high": 150,
+                              "sum": 280}}, groups)
+
+    def test_label(self):
+        groups = models.storage.aggregate(Place, group_by="city_id",
+                                          label="name")
+        self.assertEqual(["Ikeja", "Lekki"], sorted(
+            row["label"] for row in groups.values()))
+
+    def test_join_to_parent(self):
+        groups = models.storage.aggregate(
+            Place, group_by="city_id.state_id", label="name",
+            metrics={"count": "*", "avg": "price_by_night",
+                     "high": "max:price_by_night"})
+        self.assertEqual({self.state.id: {"count": 5, "avg": 75.0,
+                                          "high": 150, "label": "Lagos"}},
+                         groups)
+
+    def test_count_attribute_and_empty_groups(self):
+        review = Review()
+        review.place_id = self.places[0].id
+        review.save()
+        groups = models.storage.aggregate(
+            Review, group_by="place_id",
+            metrics={"count": "text", "avg": "rating"})
+        self.assertEqual({self.places[0].id: {"count": 1, "avg": None}},
+                         groups)
+        self.assertEqual({None: {"count": 5}},
+                         models.storage.aggregate(Place))
+
+    def test_parse_metrics(self):
+        self.assertEqual([("avg", "avg", "price_by_night"),
+                          ("count", "count", None),
+                          ("top", "max", "max_guest")],
+                         parse_metrics({"avg": "price_by_night",
+                                        "count": "*",
+                                        "top": "max:max_guest"}))
+        with self.assertRaises(ValueError):
+            parse_metrics({"median": "price_by_night"})
+        with self.assertRaises(ValueError):
+            parse_metrics({"sum": "*"})
+
+    def test_parent_class(self):
+        self.assertIs(City, parent_class("city_id", avaliable_classes))
+        with self.assertRaises(ValueError):
+            parent_class("name", avaliable_classes)
+        with self.assertRaises(ValueError):
+            models.storage.aggregate(Place, group_by="name.state_id")
+
+
+class TestMaterializedView(unittest.TestCase):
+
+    def setUp(self):
+        self.view = MaterializedView("city_id", {"count": "*",
+                                                 "avg": "price_by_night"})
+        self.places = {}
+        for i, price in enumerate([80, 20, 150]):
+            place = Place(id=str(i), city_id="city-{}".format(i % 2),
+                          price_by_night=price)
+            self.places["Place." + place.id] = place
+        self.view.build(self.places)
+
+    def test_get_and_all(self):
+        self.assertEqual({"city-0": {"count": 2, "avg": 115.0},
+                          "city-1": {"count": 1, "avg": 20.0}},
+                         self.view.all())
+        self.assertEqual({"count": 0, "avg": None}, self.view.get("city-2"))
+        self.assertEqual(3, len(self.view))
+
+    def test_add_moves_object(self):
+        place = self.places["Place.0"]
+        place.city_id = "city-1"
+        self.view.add("Place.0", place)
+        self.assertEqual({"count": 2, "avg": 50.0}, self.view.get("city-1"))
+        self.assertEqual({"count": 1, "avg": 150.0},
+                         self.view.get("city-0"))
+
+    def test_discard(self):
+        self.view.discard("Place.1")
+        self.view.discard("Place.1")
+        self.assertNotIn("city-1", self.view.all())
+
+    def test_dump_and_load(self):
+        data = json.loads(json.dumps(self.view.dump()))
+        view = MaterializedView("city_id", {"count": "*",
+                                            "avg": "price_by_night"})
+        view.load(data)
+        self.assertEqual(self.view.all(), view.all())
+        self.assertEqual((True, False), (view.loaded, view.changed))
+        view.build(self.places)
+        self.assertEqual(self.view.all(), view.all())
+        self.assertFalse(view.changed)
+        del self.places["Place.1"]
+        view.build(self.places)
+        self.assertNotIn("city-1", view.all())
+        self.assertTrue(view.changed)
+
+    def test_min_and_max_are_refused(self):
+        with self.assertRaises(ValueError):
+            MaterializedView("city_id", {"max": "price_by_night"})
@@ -0,0 +1,166 @@
+#!/usr/bin/python3
+"""This module contains unittest code for the binary_format module"""
+
+import datetime
+import json
+import os
+import tempfile
+import uuid
+from models.engine.binary_format import MAGIC, BinaryCodec, RecordIndex, \
+    binary_to_json, decode_value, encode_value, index_record, \
+    json_to_binary, open_view, trailer_record
+import unittest
+from tests import setUpModule, tearDownModule
+
+
+class TestValues(unittest.TestCase):
+
+    def roundtrip(self, value):
+        out = bytearray()
+        encode_value(value, out)
+        decoded, pos = decode_value(memoryview(bytes(out)), 0)
+        self.assertEqual(len(out), pos)
+        return decoded, len(out)
+
+    def test_values(self):
+        for value in [None, True, False, 0, -7, 1 << 70, 2.5, "", "héllo",
+                      [1, "a", [None]], {"a": {"b": 1.5}},
+                      datetime.datetime(2022, 8, 8, 7, 29, 58, 657287),
+                      datetime.datetime(1900, 1, 1)]:
+            decoded, size = self.roundtrip(value)
+            self.assertEqual(value, decoded)
+            self.assertEqual(type(value), type(decoded))
+
+    def test_uuid(self):
+        value = "0b1e4bd5-3f6c-4f4e-a8a4-1f0c3f1b2c7e"
+        self.assertEqual((value, 17), self.roundtrip(value))
+        upper = value.upper()
+        self.assertEqual((upper, 41), self.roundtrip(upper))
+
+    def test_date(self):
+        value = datetime.date(2022, 8, 8)
+        self.assertEqual(("2022-08-08", 15), self.roundtrip(value))
+
+    def test_unsupported_value(self):
+        with self.assertRaises(TypeError):
+            encode_value({1, 2}, bytearray())
+
+
+class TestBinaryCodec(unittest.TestCase):
+
+    def test_encode_and_iter_records(self):
+        codec = BinaryCodec()
+        created = datetime.datetime(2022, 8, 8, 7, 29, 58, 657287)
+        records = [codec.encode("User", {"id": str(i), "created_at": created,
+                                         "first_name": "Betty"})
+                   for i in range(3)]
+        records.append(codec.encode("State", {"id": "s", "name": "Lagos"}))
+        self.assertEqual(2, len(codec))
+        data = MAGIC + codec.schema_records() + b"".join(records)
+        self.assertEqual(1, data.count(b"first_name"))
+        decoded = list(BinaryCodec().iter_records(memoryview(data)))
+        self.assertEqual(["User.0", "User.1", "User.2", "State.s"],
+                         [key for key, n, a, s, e in decoded])
+        key, name, attrs, start, end = decoded[1]
+        self.assertEqual("User", name)
+        self.assertEqual({"id": "1", "created_at": created,
+                          "first_name": "Betty"}, attrs)
+        self.assertEqual(records[1], data[start:end])
+
+    def test_invalid_data(self):
+        codec = BinaryCodec()
+        record = codec.encode("User", {"id": "1"})
+        for data in [b"", b"{}", MAGIC + codec.schema_records() + record[:-1],
+                     MAGIC + b"X\x00\x00\x00\x00"]:
+            with self.assertRaises(ValueError):
+                list(BinaryCodec().iter_records(memoryview(data)))
+
+
+class TestRecordIndex(unittest.TestCase):
+
+    def setUp(self):
+        codec = BinaryCodec()
+        data = bytearray(MAGIC + b"")
+        keys = []
+        for name, id in [("User", "b"), ("State", "x"), ("User", "a"),
+                         ("Place", "p"), ("User", "c")]:
+            record = codec.encode(name, {"name": "n", "id": id})
+            keys.append(("{}.{}".format(name, id), len(data)))
+            data += record
+        schemas = len(data)
+        data += codec.schema_records()
+        index = len(data)
+        data += index_record(sorted(keys))
+        data += trailer_record(schemas, index)
+        self.data = bytes(data)
+        self.codec = BinaryCodec()
+        self.index = RecordIndex(memoryview(self.data), self.codec)
+
+    def test_find(self):
+        self.assertEqual(5, len(self.index))
+        pos = self.index.find("User.a")
+        key, name, attrs = self.codec.decode(memoryview(self.data), pos)
+        self.assertEqual(("User.a", "User", {"name": "n", "id": "a"}),
+                         (key, name, attrs))
+        self.assertIsNone(self.index.find("User.d"))
+        self.assertIsNone(self.index.find("Amenity.a"))
+
+    def test_span(self):
+        self.assertEqual(["User.a", "User.b", "User.c"],
+                         [self.index.key(i) for i in self.index.span("User")])
+        self.assertEqual(0, len(self.index.span("Review")))
+
+    def test_file_without_index(self):
+        codec = BinaryCodec()
+        data = MAGIC + codec.schema_records() + codec.encode("User", {})
+        with self.assertRaises(ValueError):
+            RecordIndex(memoryview(data), codec)
+
+
+class TestConverters(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.json_path = os.path.join(self.tmpdir.name, "file.json")
+        self.bin_path = os.path.join(self.tmpdir.name, "file.bin")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_roundtrip(self):
+        ids = [str(uuid.uuid4()) for i in range(50)]
+        data = {"User.{}".format(id): {
+            "__class__": "User", "id": id,
+            "created_at": "2022-08-08T07:29:58.657287",
+            "updated_at": "2022-08-08T07:29:58", "email": "a@b.c"}
+            for id in ids}
+        data["Place.p"] = {"__class__": "Place", "id": "p",
+                           "created_at": "2022-08-08T07:29:58.657287",
+                           "updated_at": "2022-08-08T07:29:58.657287",
+                           "amenity_ids": ["a", "b"], "latitude": 6.52}
+        with open(self.json_path, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        json_to_binary(self.json_path, self.bin_path, 64)
+        self.assertLess(os.path.getsize(self.bin_path),
+                        os.path.getsize(self.json_path) / 2)
+        with open_view(self.bin_path) as view:
+            self.assertEqual(51, len(list(BinaryCodec().iter_records(view))))
+            index = RecordIndex(view, BinaryCodec())
+            self.assertEqual(50, len(index.span("User")))
+            self.assertIsNotNone(index.find("Place.p"))
+        os.remove(self.json_path)
+        binary_to_json(self.bin_path, self.json_path)
+        with open(self.json_path, "r", encoding="utf-8") as file:
+            self.assertEqual(data, json.load(file))
+
+    def test_empty_store(self):
+        with open(self.json_path, "w", encoding="utf-8") as file:
+            file.write("{}")
+        json_to_binary(self.json_path, self.bin_path)
+        binary_to_json(self.bin_path, self.json_path)
+        with open(self.json_path, "r", encoding="utf-8") as file:
+            self.assertEqual({}, json.load(file))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/python3
+"""This module contains unittest code for the columns module"""
+
+from models.engine import columns
+from models.engine.columns import ColumnStore, percentile
+from models.place import Place
+import math
+import unittest
+from unittest.mock import patch
+
+
+def place(id, **kwargs):
+    return Place(id=id, created_at="2022-08-08T07:29:58.657287",
+                 updated_at="2022-08-08T07:29:58.657287", **kwargs)
+
+
+class ColumnStoreTests:
+
+    def setUp(self):
+        self.store = ColumnStore(["price_by_night", "max_guest"])
+        self.places = {"Place.{}".format(i): place(
+            str(i), price_by_night=50 * (i + 1), max_guest=i + 2)
+            for i in range(4)}
+        self.store.build(self.places)
+
+    def test_filter(self):
+        self.assertEqual(["1", "2"], sorted(self.store.ids(
+            price_by_night__lt=160, max_guest__gte=3)))
+        self.assertEqual(["Place.3"], self.store.keys(price_by_night=200))
+        self.assertEqual(["0", "3"], sorted(self.store.ids(
+            max_guest__in=[2, 5])))
+        self.assertEqual(4, len(self.store.ids()))
+        self.assertEqual(2, self.store.count(max_guest__gt=3))
+
+    def test_aggregates(self):
+        self.assertEqual(500.0, self.store.sum("price_by_night"))
+        self.assertEqual(125.0, self.store.mean("price_by_night"))
+        self.assertEqual(175.0, self.store.mean("price_by_night",
+                                                max_guest__gte=4))
+        self.assertEqual((50.0, 200.0), (self.store.min("price_by_night"),
+                                         self.store.max("price_by_night")))
+        self.assertEqual(125.0, self.store.percentile("price_by_night", 50))
+        self.assertEqual([50.0, 162.5, 200.0], self.store.percentile(
+            "price_by_night", [0, 75, 100]))
+        self.assertIsNone(self.store.mean("price_by_night", max_guest=9))
+
+    def test_add_updates_row(self):
+        obj = self.places["Place.0"]
+        obj.price_by_night = 400
+        self.store.add("Place.0", obj)
+        self.assertEqual(["Place.0"], self.store.keys(
+            price_by_night__gt=200))
+        self.assertEqual(4, len(self.store))
+
+    def test_discard_moves_last_row(self):
+        self.store.discard("Place.1")
+        self.store.discard("Place.1")
+        self.assertEqual(3, len(self.store))
+        self.assertEqual(["0", "2", "3"], sorted(self.store.ids()))
+        self.assertEqual(["3"], self.store.ids(max_guest=5))
+        self.store.discard("Place.3")
+        self.assertEqual(["0", "2"], sorted(self.store.ids()))
+        self.store.add("Place.1", self.places["Place.1"])
+        self.assertEqual(["1"], self.store.ids(price_by_night=100))
+
+    def test_values_that_are_not_numbers(self):
+        obj = self.places["Place.0"]
+        obj.price_by_night = "cheap"
+        self.store.add("Place.0", obj)
+        self.assertEqual(["1"], self.store.ids(price_by_night__lt=120))
+        self.assertEqual(150.0, self.store.mean("price_by_night"))
+        self.assertEqual(3, len(self.store.values("price_by_night")))
+
+    def test_unknown_column_or_operator(self):
+        with self.assertRaises(ValueError):
+            self.store.ids(latitude__lt=1)
+        with self.assertRaises(ValueError):
+            self.store.ids(max_guest__like=1)
+
+    def test_empty(self):
+        self.store.clear()
+        self.assertEqual([], self.store.ids(max_guest__gte=1))
+        self.assertEqual(0.0, self.store.sum("max_guest"))
+        self.assertIsNone(self.store.percentile("max_guest", 50))
+
+
+class TestColumnStore(ColumnStoreTests, unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(columns, "numpy", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super().setUp()
+
+
+@unittest.skipIf(columns.numpy is None, "NumPy is not installed")
+class TestColumnStoreNumpy(ColumnStoreTests, unittest.TestCase):
+    pass
+
+
+class TestPercentile(unittest.TestCase):
+
+    def test_percentile(self):
+        self.assertIsNone(percentile([], 50))
+        self.assertEqual(3.0, percentile([3.0], 90))
+        self.assertEqual(2.5, percentile([1.0, 2.0, 3.0, 4.0], 50))
+        self.assertTrue(math.isclose(3.7, percentile([1.0, 2.0, 3.0, 4.0],
+                                                     90)))
@@ -1,19 +1,25 @@
 #!/usr/bin/python3
 """This module contains unittest code for the file_storage module"""
 
+import gc
 import models
 import os
 import json
-from datetime import datetime
-from models.engine.file_storage import FileStorage
+from datetime import date, datetime
+from models.engine.file_storage import FileStorage, avaliable_classes
+from models.engine.binary_format import BinaryCodec
+from models.engine.indexes import tokenize
+from models.engine.json_stream import atomic_writer, iter_entries
 from models.user import User
 from models.place import Place
 from models.city import City
 from models.review import Review
 from models.amenity import Amenity
-from models.base_model import BaseModel
+from models.base_model import BaseModel, CompactModel
 from models.state import State
 import unittest
+from unittest.mock import patch
+from tests import setUpModule, tearDownModule
 
 
 class TestFileStorageInit(unittest.TestCase):
@@ -182,6 +188,19 @@ class TestFileStorageSave(unittest.TestCase):
         self.assertTrue("Amenity.{}".format(amenity.id)
                         in content)
 
+    def test_failed_save_keeps_previous_file(self):
+        user = User()
+        models.storage.save()
+        user.first_name = "Betty"
+        with patch("models.engine.json_stream.os.fsync",
+                   side_effect=OSError):
+            with self.assertRaises(OSError):
+                models.storage.save()
+        self.assertFalse(os.path.exists("file.json.tmp"))
+        with open("file.json", "r", encoding="utf-8") as file:
+            content = json.load(file)
+        self.assertNotIn("first_name", content["User.{}".format(user.id)])
+
     def test_reload_with_arg(self):
         with self.assertRaises(TypeError):
             models.storage.reload("some random arg")
@@ -193,5 +212,1216 @@ class TestFileStorageSave(unittest.TestCase):
             self.assertDictEqual({}, models.storage.all())
 
 
+class TestFileStorageJournal(unittest.TestCase):
+
+    def setUp(self):
+        models.storage.all().clear()
+        for path in ["file.json", "file.json.journal"]:
+            try:
+                os.remove(path)
+            except BaseException:
+                pass
+        models.storage.save()
+        models.storage.configure(journal=True)
+
+    def tearDown(self):
+        models.storage.configure(journal=False, checkpoint_interval=1000)
+        try:
+            os.remove("file.json.journal")
+        except BaseException:
+            pass
+
+    def test_save_appends_to_journal(self):
+        user = User()
+        models.storage.save()
+        with open("file.json", "r", encoding="utf-8") as file:
+            self.assertNotIn(user.id, file.read())
+        with open("file.json.journal", "r", encoding="utf-8") as file:
+            records = [json.loads(line) for line in file]
+        self.assertEqual(1, len(records))
+        self.assertEqual("new", records[0]["op"])
+        self.assertEqual("User.{}".format(user.id), records[0]["key"])
+
+    def test_update_and_delete_records(self):
+        user = User()
+        models.storage.save()
+        user.first_name = "Betty"
+        user.save()
+        models.storage.delete(user)
+        models.storage.save()
+        with open("file.json.journal", "r", encoding="utf-8") as file:
+            ops = [json.loads(line)["op"] for line in file]
+        self.assertEqual(["new", "update", "delete"], ops)
+
+    def test_reload_replays_journal(self):
+        user = User()
+        state = State()
+        models.storage.save()
+        user.first_name = "Betty"
+        user.save()
+        models.storage.delete(state)
+        models.storage.save()
+        models.storage.all().clear()
+        models.storage.reload()
+        objs = models.storage.all()
+        self.assertNotIn("State.{}".format(state.id), objs)
+        self.assertEqual("Betty",
+                         objs["User.{}".format(user.id)].first_name)
+
+    def test_reload_ignores_truncated_record(self):
+        user = User()
+        models.storage.save()
+        with open("file.json.journal", "a", encoding="utf-8") as file:
+            file.write('{"op": "new", "key": "User.')
+        models.storage.all().clear()
+        models.storage.reload()
+        self.assertIn("User.{}".format(user.id), models.storage.all())
+
+    def test_reload_cuts_truncated_record(self):
+        user = User()
+        models.storage.save()
+        with open("file.json.journal", "a", encoding="utf-8") as file:
+            file.write('{"op": "new", "key": "User.')
+        models.storage.reload()
+        state = State()
+        models.storage.save()
+        models.storage.all().clear()
+        models.storage.reload()
+        self.assertIsNotNone(models.storage.get(User, user.id))
+        self.assertIsNotNone(models.storage.get(State, state.id))
+        with open("file.json.journal", "r", encoding="utf-8") as file:
+            self.assertEqual(2, len([json.loads(line) for line in file]))
+
+    def test_save_syncs_journal(self):
+        User()
+        with patch("os.fsync") as fsync:
+            models.storage.save()
+        fsync.assert_called_once()
+
+    def test_checkpoint_compacts_journal(self):
+        models.storage.configure(checkpoint_interval=2)
+        user = User()
+        state = State()
+        models.storage.save()
+        self.assertFalse(os.path.exists("file.json.journal"))
+        with open("file.json", "r", encoding="utf-8") as file:
+            content = file.read()
+        self.assertIn("User.{}".format(user.id), content)
+        self.assertIn("State.{}".format(state.id), content)
+
+    def test_configure_invalid_checkpoint_interval(self):
+        with self.assertRaises(ValueError):
+            models.storage.configure(checkpoint_interval=0)
+
+
+class TestFileStorageDirtyTracking(unittest.TestCase):
+
+    def setUp(self):
+        models.storage.all().clear()
+        models.storage.save()
+
+    def test_save_only_serializes_dirty_objects(self):
+        users = [User() for i in range(5)]
+        models.storage.save()
+        users[2].first_name = "Betty"
+        with patch.object(User, "to_dict", wraps=users[2].to_dict) as to_dict:
+            models.storage.save()
+        self.assertEqual(1, to_dict.call_count)
+        with open("file.json", "r", encoding="utf-8") as file:
+            content = json.load(file)
+        self.assertEqual(5, len(content))
+        self.assertEqual(
+            "Betty", content["User.{}".format(users[2].id)]["first_name"])
+
+    def test_save_skips_write_when_clean(self):
+        User()
+        models.storage.save()
+        with patch("builtins.open") as mock_open:
+            models.storage.save()
+        mock_open.assert_not_called()
+
+    def test_save_after_external_change(self):
+        User()
+        models.storage.save()
+        models.storage.all().clear()
+        models.storage.save()
+        with open("file.json", "r", encoding="utf-8") as file:
+            self.assertEqual({}, json.load(file))
+
+    def test_save_after_external_change_keeping_count(self):
+        a, b = BaseModel(), BaseModel()
+        models.storage.save()
+        del models.storage.all()["BaseModel." + a.id]
+        user = User(id=a.id)
+        models.storage.all()["User." + user.id] = user
+        models.storage.save()
+        models.storage.reload()
+        self.assertIsNone(models.storage.get(BaseModel, a.id))
+        self.assertEqual(["User." + user.id],
+                         list(models.storage.all(User)))
+        other = User(id=user.id)
+        models.storage.all()["User." + user.id] = other
+        other.first_name = "Betty"
+        models.storage.save()
+        models.storage.reload()
+        self.assertEqual("Betty", models.storage.get(User, user.id)
+                         .first_name)
+
+    def test_reloaded_objects_are_clean(self):
+        user = User()
+        models.storage.save()
+        models.storage.reload()
+        obj = models.storage.all()["User.{}".format(user.id)]
+        self.assertFalse(obj._dirty)
+        obj.email = "betty@holberton.io"
+        self.assertTrue(obj._dirty)
+
+    def test_save_after_reload_reuses_file_content(self):
+        users = [User() for i in range(3)]
+        models.storage.save()
+        models.storage.reload()
+        obj = models.storage.get(User, users[0].id)
+        obj.first_name = "Betty"
+        with patch.object(User, "to_dict", wraps=obj.to_dict) as to_dict:
+            models.storage.save()
+        self.assertEqual(1, to_dict.call_count)
+        with open("file.json", "r", encoding="utf-8") as file:
+            content = json.load(file)
+        self.assertEqual(3, len(content))
+        self.assertEqual(
+            "Betty", content["User.{}".format(users[0].id)]["first_name"])
+
+    def test_reload_in_small_chunks(self):
+        users = [User() for i in range(20)]
+        models.storage.save()
+        models.storage.configure(buffer_size=16)
+        try:
+            models.storage.reload()
+        finally:
+            models.storage.configure(buffer_size=1 << 20)
+        self.assertEqual(20, models.storage.count(User))
+        obj = models.storage.get(User, users[7].id)
+        self.assertEqual(users[7].created_at, obj.created_at)
+        with self.assertRaises(ValueError):
+            models.storage.configure(buffer_size=0)
+
+    def test_reload_keeps_objects_on_invalid_file(self):
+        user = User()
+        with open("file.json", "w", encoding="utf-8") as file:
+            file.write('{"User.1": {"__class__": "User", "id": "1"}, ')
+        models.storage.reload()
+        self.assertIs(user, models.storage.get(User, user.id))
+        self.assertIsNone(models.storage.get(User, "1"))
+
+
+class TestFileStorageBatch(unittest.TestCase):
+
+    def setUp(self):
+        models.storage.all().clear()
+        models.storage.save()
+
+    def test_batch_defers_saves(self):
+        with patch.object(FileStorage, "_FileStorage__write_snapshot") as w:
+            with models.storage.batch():
+                for i in range(10):
+                    User().save()
+                w.assert_not_called()
+        w.assert_called_once()
+
+    def test_batch_writes_on_exit(self):
+        with models.storage.batch():
+            user = User()
+            user.save()
+        with open("file.json", "r", encoding="utf-8") as file:
+            self.assertIn("User.{}".format(user.id), file.read())
+
+    def test_batch_without_save_does_not_write(self):
+        with patch.object(FileStorage, "_FileStorage__write_snapshot") as w:
+            with models.storage.batch():
+                User()
+        w.assert_not_called()
+
+    def test_batch_rollback(self):
+        user = User()
+        user.first_name = "Betty"
+        state = State()
+        models.storage.save()
+        state.name = "California"
+        with self.assertRaises(ValueError):
+            with models.storage.batch():
+                user.first_name = "Holberton"
+                user.save()
+                models.storage.delete(state)
+                city = City()
+                city.save()
+                raise ValueError
+        objs = models.storage.all()
+        self.assertEqual("Betty", user.first_name)
+        self.assertEqual("California", state.name)
+        self.assertIn("State.{}".format(state.id), objs)
+        self.assertNotIn("City.{}".format(city.id), objs)
+        models.storage.save()
+        with open("file.json", "r", encoding="utf-8") as file:
+            content = json.load(file)
+        self.assertEqual(2, len(content))
+        self.assertEqual(
+            "Betty", content["User.{}".format(user.id)]["first_name"])
+        self.assertEqual(
+            "California", content["State.{}".format(state.id)]["name"])
+
+    def test_nested_batch(self):
+        with patch.object(FileStorage, "_FileStorage__write_snapshot") as w:
+            with models.storage.batch():
+                with models.storage.batch():
+                    User().save()
+                w.assert_not_called()
+                User().save()
+        w.assert_called_once()
+
+
+class TestFileStorageClassIndex(unittest.TestCase):
+
+    def setUp(self):
+        models.storage.all().clear()
+
+    def test_all_with_class(self):
+        users = [User() for i in range(3)]
+        State()
+        objs = models.storage.all(User)
+        self.assertEqual(dict, type(objs))
+        self.assertEqual({"User.{}".format(user.id) for user in users},
+                         set(objs.keys()))
+        self.assertEqual({}, models.storage.all(Review))
+
+    def test_count(self):
+        for i in range(3):
+            User()
+        State()
+        self.assertEqual(3, models.storage.count(User))
+        self.assertEqual(1, models.storage.count(State))
+        self.assertEqual(0, models.storage.count(City))
+        self.assertEqual(4, models.storage.count())
+
+    def test_count_after_delete(self):
+        user = User()
+        User()
+        models.storage.delete(user)
+        self.assertEqual(1, models.storage.count(User))
+        self.assertNotIn("User.{}".format(user.id), models.storage.all(User))
+
+    def test_count_after_reload(self):
+        for i in range(3):
+            User()
+        models.storage.save()
+        models.storage.reload()
+        self.assertEqual(3, models.storage.count(User))
+
+    def test_index_follows_external_changes(self):
+        User()
+        models.storage.all().clear()
+        user = User()
+        self.assertEqual(1, models.storage.count(User))
+        self.assertEqual(["User.{}".format(user.id)],
+                         list(models.storage.all(User).keys()))
+
+    def test_all_with_invalid_class(self):
+        with self.assertRaises(TypeError):
+            models.storage.all("User")
+
+
+class TestFileStorageHashIndex(unittest.TestCase):
+
+    def setUp(self):
+        models.storage.all().clear()
+
+    def test_find_by_indexed_attribute(self):
+        place = Place()
+        reviews = [Review() for i in range(3)]
+        for review in reviews[:2]:
+            review.place_id = place.id
+            review.save()
+        found = models.storage.find_by(Review, "place_id", place.id)
+        self.assertEqual({"Review.{}".format(review.id): review
+                          for review in reviews[:2]}, found)
+
+    def test_find_by_follows_updates(self):
+        city = City()
+        city.state_id = "1"
+        city.save()
+        city.state_id = "2"
+        city.save()
+        self.assertEqual({}, models.storage.find_by(City, "state_id", "1"))
+        self.assertIn("City.{}".format(city.id),
+                      models.storage.find_by(City, "state_id", "2"))
+
+    def test_find_by_after_save(self):
+        city = City()
+        models.storage.save()
+        city.state_id = "1"
+        models.storage.save()
+        self.assertIn("City.{}".format(city.id),
+                      models.storage.find_by(City, "state_id", "1"))
+
+    def test_find_by_after_delete(self):
+        city = City()
+        city.state_id = "1"
+        city.save()
+        models.storage.delete(city)
+        self.assertEqual({}, models.storage.find_by(City, "state_id", "1"))
+
+    def test_find_by_after_reload(self):
+        review = Review()
+        review.user_id = "1"
+        review.save()
+        models.storage.reload()
+        self.assertIn("Review.{}".format(review.id),
+                      models.storage.find_by(Review, "user_id", "1"))
+
+    def test_find_by_unindexed_attribute(self):
+        user = User()
+        user.email = "betty@holberton.io"
+        User()
+        self.assertEqual(["User.{}".format(user.id)], list(
+            models.storage.find_by(User, "email", "betty@holberton.io")))
+
+    def test_add_index(self):
+        state = State()
+        state.name = "California"
+        state.save()
+        models.storage.add_index(State, "name")
+        self.assertIn("State.{}".format(state.id),
+                      models.storage.find_by(State, "name", "California"))
+        state.name = "Nevada"
+        state.save()
+        self.assertEqual(
+            {}, models.storage.find_by(State, "name", "California"))
+
+
+class TestFileStorageRangeIndex(unittest.TestCase):
+
+    def setUp(self):
+        models.storage.all().clear()
+        self.places = []
+        for price in [80, 20, 150, 50, 120]:
+            place = Place()
+            place.price_by_night = price
+            place.save()
+            self.places.append(place)
+
+    def prices(self, places):
+        return [place.price_by_night for place in places]
+
+    def test_find_range(self):
+        self.assertEqual([50, 80, 120], self.prices(
+            models.storage.find_range(Place, "price_by_night", 50, 120)))
+        self.assertEqual([20, 50], self.prices(
+            models.storage.find_range(Place, "price_by_night", high=50)))
+
+    def test_find_range_limit_and_reverse(self):
+        self.assertEqual([150, 120], self.prices(models.storage.find_range(
+            Place, "price_by_night", limit=2, reverse=True)))
+
+    def test_find_range_follows_updates_and_deletes(self):
+        self.places[0].price_by_night = 10
+        self.places[0].save()
+        models.storage.delete(self.places[1])
+        self.assertEqual([10, 50], self.prices(
+            models.storage.find_range(Place, "price_by_night", high=50)))
+
+    def test_find_range_created_at(self):
+        user = User()
+        self.assertEqual([user], models.storage.find_range(
+            User, "created_at", low=user.created_at))
+        self.assertEqual([], models.storage.find_range(
+            User, "created_at", high=datetime(2000, 1, 1)))
+
+    def test_find_range_unindexed_attribute(self):
+        self.assertEqual([], models.storage.find_range(
+            Place, "latitude", low=1.0))
+        self.assertEqual(5, len(models.storage.find_range(
+            Place, "latitude", low=0.0)))
+
+    def test_find_range_after_reload(self):
+        models.storage.save()
+        models.storage.reload()
+        self.assertEqual([120, 150], self.prices(
+            models.storage.find_range(Place, "price_by_night", low=100)))
+
+    def test_reload_leaves_datetimes_unparsed(self):
+        models.storage.save()
+        models.storage.reload()
+        objs = list(models.storage.all(Place).values())
+        self.assertEqual({str}, {type(obj._created_at) for obj in objs})
+        models.storage.save()
+        self.assertEqual({str}, {type(obj._updated_at) for obj in objs})
+        self.assertEqual(5, len(models.storage.find_range(
+            Place, "created_at", low=self.places[0].created_at)))
+
+
+class TestFileStorageGeoIndex(unittest.TestCase):
+
+    def setUp(self):
+        models.storage.all().clear()
+        self.lagos = Place()
+        self.lagos.latitude = 6.5244
+        self.lagos.longitude = 3.3792
+        self.lagos.save()
+        self.ikeja = Place()
+        self.ikeja.latitude = 6.6018
+        self.ikeja.longitude = 3.3515
+        self.ikeja.save()
+
+    def test_nearby(self):
+        self.assertEqual([self.ikeja, self.lagos],
+                         models.storage.nearby(6.6, 3.35, 20))
+        self.assertEqual([self.ikeja],
+                         models.storage.nearby(6.6, 3.35, 20, limit=1))
+        self.assertEqual([], models.storage.nearby(9.07, 7.39, 20))
+
+    def test_within_bbox(self):
+        self.assertEqual([self.lagos],
+                         models.storage.within_bbox(6.4, 3.3, 6.55, 3.4))
+
+    def test_nearby_follows_updates_and_deletes(self):
+        self.lagos.latitude = 9.0765
+        self.lagos.longitude = 7.3986
+        self.lagos.save()
+        self.assertEqual([self.lagos], models.storage.nearby(9.07, 7.39, 20))
+        models.storage.delete(self.lagos)
+        self.assertEqual([], models.storage.nearby(9.07, 7.39, 20))
+
+    def test_nearby_after_reload(self):
+        models.storage.save()
+        models.storage.reload()
+        found = models.storage.nearby(6.6, 3.35, 20)
+        self.assertEqual([self.ikeja.id, self.lagos.id],
+                         [obj.id for obj in found])
+
+
+class TestFileStorageColumns(unittest.TestCase):
+
+    def setUp(self):
+        models.storage.all().clear()
+        self.cheap = Place()
+        self.cheap.price_by_night = 80
+        self.cheap.max_guest = 4
+        self.cheap.save()
+        self.dear = Place()
+        self.dear.price_by_night = 300
+        self.dear.max_guest = 6
+        self.dear.save()
+
+    def test_filter_and_aggregate(self):
+        places = models.storage.columns(Place)
+        self.assertEqual([self.cheap.id], places.ids(
+            price_by_night__lt=100, max_guest__gte=4))
+        self.assertEqual(190.0, places.mean("price_by_night"))
+        self.assertEqual(300.0, places.percentile("price_by_night", 100))
+
+    def test_columns_follow_updates_and_deletes(self):
+        self.dear.price_by_night = 90
+        self.dear.save()
+        places = models.storage.columns(Place)
+        self.assertEqual(2, places.count(price_by_night__lt=100))
+        models.storage.delete(self.cheap)
+        self.assertEqual([self.dear.id], places.ids(price_by_night__lt=100))
+        Place().save()
+        self.assertEqual(1, places.count(max_guest__lt=5))
+
+    def test_columns_after_reload(self):
+        models.storage.save()
+        models.storage.reload()
+        self.assertEqual([self.dear.id], models.storage.columns(Place).ids(
+            max_guest__gt=4))
+
+    def test_class_without_columns(self):
+        Review().save()
+        reviews = models.storage.columns(Review)
+        self.assertEqual((), reviews.attrs)
+        self.assertEqual(1, reviews.count())
+        with self.assertRaises(ValueError):
+            reviews.ids(rating=4)
+
+
+class TestFileStorageViews(unittest.TestCase):
+
+    def setUp(self):
+        models.storage.all().clear()
+        self.place = Place()
+        self.reviews = []
+        for i in range(3):
+            review = Review()
+            review.place_id = self.place.id
+            review.user_id = "user-{}".format(i % 2)
+            self.reviews.append(review)
+        models.storage.save()
+
+    def tearDown(self):
+        models.storage.configure(layout="single")
+        for name in avaliable_classes:
+            if os.path.exists("file.json." + name):
+                os.remove("file.json." + name)
+        if os.path.exists("file.json.views"):
+            os.remove("file.json.views")
+
+    def test_view(self):
+        view = models.storage.view("reviews_by_place")
+        self.assertEqual({"count": 3}, view.get(self.place.id))
+        self.assertEqual({"count": 0}, view.get("none"))
+        self.assertEqual({"user-0": {"count": 2}, "user-1": {"count": 1}},
+                         models.storage.view("reviews_by_user").all())
+
+    def test_view_follows_new_changes_and_deletes(self):
+        review = Review()
+        review.place_id = self.place.id
+        self.assertEqual(4, models.storage.view(
+            "reviews_by_place").get(self.place.id)["count"])
+        self.reviews[0].place_id = "other"
+        view = models.storage.view("reviews_by_place")
+        self.assertEqual({"count": 3}, view.get(self.place.id))
+        self.assertEqual({"count": 1}, view.get("other"))
+        models.storage.delete(self.reviews[0])
+        self.assertEqual({"count": 0}, view.get("other"))
+        self.assertNotIn("other", view.all())
+
+    def test_view_is_restored_on_reload(self):
+        with open("file.json.views") as infile:
+            saved = json.load(infile)
+        self.assertEqual([[self.place.id, [3, 3]]],
+                         saved["parts"]["reviews_by_place"]["groups"])
+        self.assertEqual("file.json", saved["generation"][0][0])
+        self.reviews[2].place_id = "other"
+        models.storage.save()
+        models.storage.reload()
+        view = models.storage.view("reviews_by_place")
+        self.assertTrue(view.loaded)
+        self.assertEqual(2, view.get(self.place.id)["count"])
+        self.assertEqual(1, view.get("other")["count"])
+
+    def test_save_appends_changed_groups(self):
+        for i in range(4):
+            review = Review()
+            review.place_id = "place-{}".format(i)
+        models.storage.save()
+        models.storage.reload()
+        review = models.storage.get(Review, self.reviews[0].id)
+        review.place_id = "other"
+        review.save()
+        with open("file.json.views") as infile:
+            lines = [json.loads(line) for line in infile]
+        self.assertEqual(2, len(lines))
+        self.assertEqual([[self.place.id, [2, 2]], ["other", [1, 1]]],
+                         sorted(lines[1]["parts"]["reviews_by_place"][
+                             "groups"]))
+        models.storage.reload()
+        view = models.storage.view("reviews_by_place")
+        self.assertTrue(view.loaded)
+        self.assertEqual(2, view.get(self.place.id)["count"])
+        self.assertEqual(1, view.get("other")["count"])
+
+    def test_view_of_other_data_is_not_reused(self):
+        with open("file.json.views") as infile:
+            saved = infile.read()
+        self.reviews[2].place_id = "other"
+        models.storage.save()
+        with open("file.json.views", "w") as outfile:
+            outfile.write(saved)
+        models.storage.reload()
+        view = models.storage.view("reviews_by_place")
+        self.assertEqual(2, view.get(self.place.id)["count"])
+        self.assertEqual(1, view.get("other")["count"])
+
+    def test_view_follows_the_keys_of_the_data(self):
+        with open("file.json", "r", encoding="utf-8") as file:
+            data = json.load(file)
+        del data["Review." + self.reviews[0].id]
+        with open("file.json", "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        models.storage.reload()
+        view = models.storage.view("reviews_by_place")
+        self.assertEqual(2, view.get(self.place.id)["count"])
+
+    def test_view_follows_the_journal(self):
+        models.storage.configure(journal=True)
+        try:
+            self.reviews[0].place_id = "other"
+            self.reviews[0].save()
+            models.storage.reload()
+            view = models.storage.view("reviews_by_place")
+            self.assertEqual(2, view.get(self.place.id)["count"])
+            self.assertEqual(1, view.get("other")["count"])
+        finally:
+            models.storage.configure(journal=False)
+            os.remove("file.json.journal")
+
+    def test_class_layout_reads_no_file(self):
+        models.storage.configure(layout="class")
+        models.storage.save()
+        models.storage.reload()
+        with patch("models.engine.file_storage.iter_entries",
+                   side_effect=iter_entries) as read:
+            view = models.storage.view("reviews_by_place")
+            self.assertEqual(3, view.get(self.place.id)["count"])
+        self.assertEqual([], read.call_args_list)
+        self.reviews = list(models.storage.all(Review).values())
+        models.storage.delete(self.reviews[0])
+        self.assertEqual(2, view.get(self.place.id)["count"])
+
+    def test_add_view(self):
+        models.storage.add_view("places_by_city", Place, "city_id",
+                                {"count": "*", "sum": "price_by_night"})
+        view = models.storage.view("places_by_city")
+        self.assertEqual({"": {"count": 1, "sum": 0}}, view.all())
+        with self.assertRaises(ValueError):
+            models.storage.add_view("cheapest", Place, "city_id",
+                                    {"min": "price_by_night"})
+
+
+class TestFileStorageBitmapIndex(unittest.TestCase):
+
+    def setUp(self):
+        models.storage.all().clear()
+        self.wifi = Amenity()
+        self.tv = Amenity()
+        self.both = Place()
+        self.both.amenity_ids = [self.wifi.id, self.tv.id]
+        self.wifi_only = Place()
+        self.wifi_only.amenity_ids = [self.wifi.id]
+        models.storage.save()
+
+    def find(self, *amenities):
+        return models.storage.query(Place).where(
+            amenity_ids__contains=[amenity.id for amenity in amenities]).all()
+
+    def test_bitmaps_follow_updates_and_deletes(self):
+        self.assertEqual([self.both], self.find(self.wifi, self.tv))
+        self.wifi_only.amenity_ids = [self.tv.id, self.wifi.id]
+        self.wifi_only.save()
+        self.assertEqual(2, len(self.find(self.wifi, self.tv)))
+        models.storage.delete(self.both)
+        self.assertEqual([self.wifi_only], self.find(self.tv))
+
+    def test_bitmaps_after_reload(self):
+        models.storage.reload()
+        index = models.storage.get_index(Place, "amenity_ids", bitmap=True)
+        key = "Place." + self.both.id
+        self.assertEqual(2, bin(index.bits(key)).count("1"))
+        self.assertEqual([self.both.id],
+                         [place.id for place in self.find(self.tv)])
+        self.assertEqual(self.both.to_dict(),
+                         models.storage.get(Place, self.both.id).to_dict())
+
+
+class TestFileStorageGetDelete(unittest.TestCase):
+
+    def setUp(self):
+        models.storage.all().clear()
+
+    def test_get(self):
+        city = City()
+        self.assertIs(city, models.storage.get(City, city.id))
+        self.assertIsNone(models.storage.get(State, city.id))
+
+    def test_delete(self):
+        city = City()
+        models.storage.delete(city)
+        self.assertNotIn("City.{}".format(city.id), models.storage.all())
+        self.assertIsNone(models.storage.get(City, city.id))
+
+
+class TestFileStorageTextIndex(unittest.TestCase):
+
+    def setUp(self):
+        models.storage.all().clear()
+        self.review = Review()
+        self.review.text = "Quiet room and fast wifi"
+        self.review.save()
+        self.other = Review()
+        self.other.text = "Noisy street"
+        self.other.save()
+
+    def tearDown(self):
+        if os.path.exists("file.json.fts"):
+            os.remove("file.json.fts")
+
+    def test_search(self):
+        self.assertEqual([self.review],
+                         models.storage.search(Review, "quiet wifi"))
+        self.assertEqual([], models.storage.search(Review, "garden"))
+        self.assertEqual(1, len(models.storage.search(Review, "quiet street",
+                                                      limit=1)))
+
+    def test_search_follows_updates_and_deletes(self):
+        self.other.text = "Quiet now"
+        self.other.save()
+        self.assertEqual(2, len(models.storage.search(Review, "quiet")))
+        models.storage.delete(self.review)
+        self.assertEqual([self.other], models.storage.search(Review, "quiet"))
+
+    def test_search_unindexed_class(self):
+        state = State()
+        state.name = "Lagos"
+        self.assertEqual([state], models.storage.search(State, "lagos"))
+
+    def test_reload_reuses_saved_index(self):
+        self.assertTrue(os.path.exists("file.json.fts"))
+        with patch("models.engine.indexes.tokenize",
+                   wraps=tokenize) as tokens:
+            models.storage.reload()
+            found = models.storage.search(Review, "wifi")
+        self.assertEqual(1, tokens.call_count)
+        self.assertEqual([self.review.id], [obj.id for obj in found])
+
+    def test_reload_rebuilds_index_of_other_data(self):
+        with open("file.json", "r", encoding="utf-8") as file:
+            data = json.load(file)
+        data["Review." + self.review.id]["text"] = "Garden view"
+        with open("file.json", "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        with patch("models.engine.indexes.tokenize",
+                   wraps=tokenize) as tokens:
+            models.storage.reload()
+            self.assertEqual(0, tokens.call_count)
+            found = models.storage.search(Review, "garden")
+        self.assertEqual(3, tokens.call_count)
+        self.assertEqual([self.review.id], [obj.id for obj in found])
+        self.assertEqual([], models.storage.search(Review, "wifi"))
+
+    def test_save_appends_changed_words(self):
+        models.storage.reload()
+        with open("file.json.fts", encoding="utf-8") as infile:
+            self.assertEqual(1, len(infile.readlines()))
+        review = models.storage.get(Review, self.other.id)
+        review.text = "Garden view"
+        review.save()
+        with open("file.json.fts", encoding="utf-8") as infile:
+            lines = [json.loads(line) for line in infile]
+        self.assertEqual(2, len(lines))
+        self.assertEqual(["Review." + self.other.id],
+                         list(lines[1]["parts"]["Review"]))
+        models.storage.reload()
+        self.assertEqual([self.other.id], [
+            obj.id for obj in models.storage.search(Review, "garden")])
+        self.assertEqual([], models.storage.search(Review, "noisy"))
+        review = models.storage.get(Review, self.review.id)
+        review.text = "Garden room"
+        review.save()
+        with open("file.json.fts", encoding="utf-8") as infile:
+            self.assertEqual(1, len(infile.readlines()))
+
+
+class TestFileStorageSaveCost(unittest.TestCase):
+
+    def setUp(self):
+        models.storage.all().clear()
+        places = []
+        for i in range(100):
+            place = Place()
+            place.name = "Loft {}".format(i)
+            places.append(place)
+        for i in range(300):
+            review = Review()
+            review.place_id = places[i % 100].id
+            review.text = "Great stay number {}".format(i)
+        models.storage.save()
+        models.storage.reload()
+
+    def tearDown(self):
+        for path in ("file.json.fts", "file.json.views"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_save_after_reload_appends_changes(self):
+        sizes = [os.path.getsize(path)
+                 for path in ("file.json.fts", "file.json.views")]
+        review = next(iter(models.storage.all(Review).values()))
+        review.text = "Noisy"
+        review.place_id = "other"
+        with patch("models.engine.indexes.TextIndex.dump") as text_dump, \
+                patch("models.engine.aggregation.MaterializedView.dump") \
+                as view_dump:
+            review.save()
+        self.assertEqual(0, text_dump.call_count + view_dump.call_count)
+        for size, path in zip(sizes, ("file.json.fts", "file.json.views")):
+            self.assertLess(os.path.getsize(path) - size, size // 10)
+
+    def test_reload_leaves_garbage_collector_on(self):
+        self.assertTrue(gc.isenabled())
+        models.storage.reload()
+        self.assertTrue(gc.isenabled())
+
+
+class TestFileStorageBinaryFormat(unittest.TestCase):
+
+    def setUp(self):
+        models.storage.all().clear()
+        models.storage.configure(format="binary")
+
+    def tearDown(self):
+        models.storage.configure(format="json")
+        if os.path.exists("file.bin"):
+            os.remove("file.bin")
+
+    def test_save_and_reload(self):
+        user = User()
+        user.first_name = "Betty"
+        place = Place()
+        place.amenity_ids = ["a", "b"]
+        place.latitude = 6.5244
+        models.storage.save()
+        self.assertTrue(os.path.exists("file.bin"))
+        models.storage.reload()
+        obj = models.storage.get(User, user.id)
+        self.assertIsNot(user, obj)
+        self.assertEqual(user.to_dict(), obj.to_dict())
+        self.assertEqual(place.to_dict(),
+                         models.storage.get(Place, place.id).to_dict())
+        self.assertFalse(obj._dirty)
+
+    def test_save_and_reload_date(self):
+        user = User()
+        user.updated_at = date(2022, 8, 8)
+        models.storage.save()
+        models.storage.reload()
+        self.assertEqual(datetime(2022, 8, 8),
+                         models.storage.get(User, user.id).updated_at)
+
+    def test_save_only_encodes_dirty_objects(self):
+        users = [User() for i in range(3)]
+        models.storage.save()
+        models.storage.reload()
+        models.storage.get(User, users[1].id).first_name = "Betty"
+        with patch.object(BinaryCodec, "encode", autospec=True,
+                          side_effect=BinaryCodec.encode) as encode:
+            models.storage.save()
+        self.assertEqual(1, encode.call_count)
+        models.storage.reload()
+        self.assertEqual(
+            "Betty", models.storage.get(User, users[1].id).first_name)
+        self.assertEqual(3, models.storage.count(User))
+
+    def test_delete(self):
+        users = [User() for i in range(2)]
+        models.storage.save()
+        models.storage.delete(users[0])
+        models.storage.save()
+        models.storage.reload()
+        self.assertIsNone(models.storage.get(User, users[0].id))
+        self.assertEqual(1, models.storage.count(User))
+
+    def test_invalid_format(self):
+        with self.assertRaises(ValueError):
+            models.storage.configure(format="xml")
+
+
+class TestFileStorageLazy(unittest.TestCase):
+
+    def setUp(self):
+        models.storage.all().clear()
+        models.storage.configure(format="binary")
+        self.users = [User() for i in range(3)]
+        self.place = Place()
+        self.place.city_id = "1"
+        models.storage.save()
+        models.storage.configure(lazy=True)
+        models.storage.reload()
+
+    def tearDown(self):
+        models.storage.configure(lazy=False, format="json")
+        if os.path.exists("file.bin"):
+            os.remove("file.bin")
+
+    def decoded(self, method, *args):
+        with patch.object(BinaryCodec, "decode", autospec=True,
+                          side_effect=BinaryCodec.decode) as decode:
+            result = method(*args)
+        return result, decode.call_count
+
+    def test_reload_decodes_nothing(self):
+        with patch.object(BinaryCodec, "decode") as decode:
+            models.storage.reload()
+            self.assertEqual(4, models.storage.count())
+            self.assertEqual(3, models.storage.count(User))
+            self.assertEqual(0, models.storage.count(State))
+        decode.assert_not_called()
+
+    def test_get_decodes_one_object(self):
+        obj, count = self.decoded(models.storage.get, User, self.users[1].id)
+        self.assertEqual(1, count)
+        self.assertEqual(self.users[1].to_dict(), obj.to_dict())
+        self.assertIs(obj, models.storage.get(User, self.users[1].id))
+        self.assertIsNone(models.storage.get(User, "missing"))
+        self.assertIsNone(models.storage.get(State, self.users[1].id))
+
+    def test_all_class(self):
+        objs, count = self.decoded(models.storage.all, User)
+        self.assertEqual(3, count)
+        self.assertEqual({"User.{}".format(user.id) for user in self.users},
+                         set(objs))
+        self.assertEqual(4, len(models.storage.all()))
+        self.assertEqual(1, len(models.storage.find_by(Place, "city_id",
+                                                       "1")))
+
+    def test_save_keeps_objects_not_requested(self):
+        obj = models.storage.get(User, self.users[0].id)
+        obj.first_name = "Betty"
+        User().save()
+        models.storage.reload()
+        self.assertEqual(5, models.storage.count())
+        self.assertEqual(
+            "Betty", models.storage.get(User, self.users[0].id).first_name)
+        self.assertEqual("1", models.storage.get(
+            Place, self.place.id).city_id)
+
+    def test_delete_object_not_requested(self):
+        user = User(**self.users[2].to_dict())
+        models.storage.delete(user)
+        self.assertEqual(2, models.storage.count(User))
+        self.assertIsNone(models.storage.get(User, user.id))
+        models.storage.save()
+        models.storage.reload()
+        self.assertEqual(2, models.storage.count(User))
+
+    def test_batch_rollback_keeps_decoded_objects(self):
+        with self.assertRaises(ValueError):
+            with models.storage.batch():
+                obj = models.storage.get(User, self.users[0].id)
+                obj.first_name = "Betty"
+                models.storage.delete(User(**self.users[1].to_dict()))
+                raise ValueError
+        self.assertIs(obj, models.storage.get(User, self.users[0].id))
+        self.assertNotIn("first_name", obj.__dict__)
+        self.assertIsNotNone(models.storage.get(User, self.users[1].id))
+        self.assertEqual(4, models.storage.count())
+
+
+class TestFileStorageSegments(unittest.TestCase):
+
+    def setUp(self):
+        models.storage.all().clear()
+        models.storage.configure(segments=3)
+
+    def tearDown(self):
+        models.storage.configure(segments=1, format="json")
+        for i in range(3):
+            for path in ["file.json.{}".format(i), "file.bin.{}".format(i)]:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def save_and_reload(self):
+        users = [User() for i in range(20)]
+        users[0].first_name = "Betty"
+        models.storage.save()
+        models.storage.reload()
+        self.assertEqual(20, models.storage.count(User))
+        obj = models.storage.get(User, users[0].id)
+        self.assertIsNot(users[0], obj)
+        self.assertEqual(users[0].to_dict(), obj.to_dict())
+        self.assertFalse(obj._dirty)
+        return users
+
+    def test_save_and_reload(self):
+        self.save_and_reload()
+        keys = []
+        for i in range(3):
+            with open("file.json.{}".format(i)) as infile:
+                keys.append(set(json.load(infile)))
+        self.assertTrue(all(keys))
+        self.assertEqual(20, len(set.union(*keys)))
+        self.assertEqual(20, sum(len(segment) for segment in keys))
+
+    def test_save_and_reload_binary(self):
+        models.storage.configure(format="binary")
+        users = self.save_and_reload()
+        models.storage.delete(models.storage.get(User, users[1].id))
+        models.storage.get(User, users[2].id).last_name = "Holberton"
+        with patch.object(BinaryCodec, "encode", autospec=True,
+                          side_effect=BinaryCodec.encode) as encode:
+            models.storage.save()
+        self.assertEqual(1, encode.call_count)
+        models.storage.reload()
+        self.assertEqual(19, models.storage.count(User))
+        self.assertEqual("Holberton",
+                         models.storage.get(User, users[2].id).last_name)
+
+    def test_invalid_segments(self):
+        with self.assertRaises(ValueError):
+            models.storage.configure(segments=0)
+        with self.assertRaises(ValueError):
+            models.storage.configure(lazy=True)
+
+
+class TestFileStorageClassLayout(unittest.TestCase):
+
+    def setUp(self):
+        models.storage.all().clear()
+        models.storage.configure(layout="class")
+        self.users = [User() for i in range(3)]
+        self.state = State()
+        self.state.name = "Lagos"
+        models.storage.save()
+
+    def tearDown(self):
+        models.storage.configure(layout="single", format="json",
+                                 journal=False)
+        for name in avaliable_classes:
+            for path in ["file.json.", "file.bin."]:
+                if os.path.exists(path + name):
+                    os.remove(path + name)
+        if os.path.exists("file.json.journal"):
+            os.remove("file.json.journal")
+
+    def reads(self, method, *args):
+        with patch("models.engine.file_storage.iter_entries",
+                   side_effect=iter_entries) as read:
+            result = method(*args)
+        return [call.args[0].name for call in read.call_args_list], result
+
+    def writes(self, method, *args):
+        with patch("models.engine.file_storage.atomic_writer",
+                   side_effect=atomic_writer) as write:
+            method(*args)
+        return [call.args[0] for call in write.call_args_list
+                if not call.args[0].endswith((".fts", ".views"))]
+
+    def test_save_writes_class_files(self):
+        with open("file.json.User") as infile:
+            self.assertEqual(3, len(json.load(infile)))
+        with open("file.json.State") as infile:
+            self.assertIn("State." + self.state.id, json.load(infile))
+        with open("file.json.Review") as infile:
+            self.assertEqual({}, json.load(infile))
+
+    def test_reload_reads_requested_classes(self):
+        self.assertEqual([], self.reads(models.storage.reload)[0])
+        paths, state = self.reads(models.storage.get, State, self.state.id)
+        self.assertEqual(["file.json.State"], paths)
+        self.assertEqual("Lagos", state.name)
+        paths, count = self.reads(models.storage.count, User)
+        self.assertEqual((["file.json.User"], 3), (paths, count))
+        self.assertEqual((["file.json.Review"], 0),
+                         self.reads(models.storage.count, Review))
+        self.assertEqual(4, len(models.storage.all()))
+
+    def test_save_writes_changed_classes(self):
+        models.storage.reload()
+        models.storage.get(User, self.users[0].id).first_name = "Betty"
+        self.assertEqual(["file.json.User"], self.writes(models.storage.save))
+        self.assertEqual([], self.writes(models.storage.save))
+        models.storage.reload()
+        self.assertEqual(
+            "Betty", models.storage.get(User, self.users[0].id).first_name)
+
+    def test_new_and_delete_in_unloaded_classes(self):
+        models.storage.reload()
+        State()
+        models.storage.delete(User(**self.users[0].to_dict()))
+        models.storage.new(User(**self.users[1].to_dict()))
+        models.storage.delete(User(**self.users[1].to_dict()))
+        models.storage.save()
+        models.storage.reload()
+        self.assertEqual(2, models.storage.count(State))
+        self.assertEqual(1, models.storage.count(User))
+        self.assertIsNotNone(models.storage.get(User, self.users[2].id))
+
+    def test_binary_format(self):
+        models.storage.configure(format="binary")
+        models.storage.save()
+        models.storage.reload()
+        place = Place()
+        place.name = "Loft"
+        models.storage.get(User, self.users[0].id).first_name = "Betty"
+        models.storage.save()
+        self.assertTrue(os.path.exists("file.bin.Place"))
+        models.storage.reload()
+        self.assertEqual("Loft", models.storage.get(Place, place.id).name)
+        self.assertEqual(
+            "Betty", models.storage.get(User, self.users[0].id).first_name)
+        self.assertEqual(5, models.storage.count())
+
+    def test_journal_replay(self):
+        models.storage.configure(journal=True)
+        models.storage.reload()
+        models.storage.delete(models.storage.get(User, self.users[0].id))
+        models.storage.save()
+        models.storage.reload()
+        self.assertEqual(2, models.storage.count(User))
+        self.assertEqual(["file.json.User"],
+                         self.writes(models.storage.checkpoint))
+        models.storage.reload()
+        self.assertEqual(2, models.storage.count(User))
+
+    def test_journal_replay_and_external_change(self):
+        models.storage.configure(journal=True)
+        models.storage.reload()
+        models.storage.get(User, self.users[0].id).first_name = "Betty"
+        models.storage.save()
+        models.storage.reload()
+        models.storage.count(User)
+        del models.storage.all()["User." + self.users[1].id]
+        user = User(id=self.users[1].id + "-new")
+        models.storage.all()["User." + user.id] = user
+        models.storage.save()
+        models.storage.checkpoint()
+        models.storage.reload()
+        self.assertEqual(sorted([self.users[0].id, self.users[2].id,
+                                 user.id]),
+                         sorted(obj.id for obj in
+                                models.storage.all(User).values()))
+        self.assertEqual(
+            "Betty", models.storage.get(User, self.users[0].id).first_name)
+
+    def test_invalid_layout(self):
+        with self.assertRaises(ValueError):
+            models.storage.configure(layout="table")
+        with self.assertRaises(ValueError):
+            models.storage.configure(lazy=True)
+
+
+class TestFileStorageCompact(unittest.TestCase):
+
+    def setUp(self):
+        models.storage.all().clear()
+        self.review = Review()
+        self.review.place_id = "1"
+        self.review.text = "Great"
+        self.review.rating = 5
+        models.storage.save()
+        models.storage.configure(compact=True)
+        models.storage.reload()
+
+    def tearDown(self):
+        models.storage.configure(compact=False, format="json")
+        if os.path.exists("file.bin"):
+            os.remove("file.bin")
+
+    def test_reload_builds_compact_objects(self):
+        obj = models.storage.get(Review, self.review.id)
+        self.assertIsInstance(obj, Review)
+        self.assertIsInstance(obj, CompactModel)
+        self.assertEqual(self.review.to_dict(), obj.to_dict())
+        found = models.storage.find_by(Review, "place_id", "1")
+        self.assertEqual([obj], list(found.values()))
+
+    def test_save_and_reload_binary(self):
+        models.storage.configure(format="binary")
+        obj = models.storage.get(Review, self.review.id)
+        obj.text = "Quiet"
+        models.storage.save()
+        models.storage.reload()
+        obj = models.storage.get(Review, self.review.id)
+        self.assertIsInstance(obj, CompactModel)
+        self.assertEqual(("Quiet", 5), (obj.text, obj.rating))
+
+    def test_batch_rollback(self):
+        obj = models.storage.get(Review, self.review.id)
+        with self.assertRaises(ValueError):
+            with models.storage.batch():
+                obj.text = "Quiet"
+                obj.stars = 2
+                raise ValueError
+        self.assertEqual(self.review.to_dict(), obj.to_dict())
+
+
 if __name__ == "__main__":
     unittest.main()
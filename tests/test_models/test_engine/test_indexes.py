@@ -0,0 +1,332 @@
+#!/usr/bin/python3
+"""This module contains unittest code for the indexes module"""
+
+from models.engine.indexes import HashIndex, RangeIndex, GeoIndex, \
+    TextIndex, PartitionedIndex, BitmapIndex, haversine, tokenize, \
+    positions
+from models.place import Place
+import unittest
+
+
+def place(id, **kwargs):
+    return Place(id=id, created_at="2022-08-08T07:29:58.657287",
+                 updated_at="2022-08-08T07:29:58.657287", **kwargs)
+
+
+class TestHashIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = HashIndex("city_id")
+        self.places = {"Place.{}".format(i): place(str(i), city_id=str(i % 2))
+                       for i in range(4)}
+        self.index.build(self.places)
+
+    def test_find(self):
+        self.assertEqual(["Place.0", "Place.2"],
+                         sorted(self.index.find("0")))
+        self.assertEqual({}, self.index.find("2"))
+        self.assertEqual(2, self.index.estimate("1"))
+
+    def test_add_moves_object(self):
+        obj = self.places["Place.0"]
+        obj.city_id = "1"
+        self.index.add("Place.0", obj)
+        self.assertEqual(["Place.2"], list(self.index.find("0")))
+        self.assertEqual(3, self.index.estimate("1"))
+
+    def test_discard(self):
+        self.index.discard("Place.0")
+        self.index.discard("Place.0")
+        self.assertEqual(["Place.2"], list(self.index.find("0")))
+
+    def test_groups(self):
+        groups = {value: sorted(obj.id for obj in objects)
+                  for value, objects in self.index.groups()}
+        self.assertEqual({"0": ["0", "2"], "1": ["1", "3"]}, groups)
+
+    def test_unhashable_value(self):
+        obj = self.places["Place.0"]
+        obj.city_id = ["0"]
+        self.index.add("Place.0", obj)
+        self.assertEqual(["Place.2"], list(self.index.find("0")))
+        self.assertEqual({}, self.index.find(["0"]))
+
+
+class TestRangeIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = RangeIndex("price_by_night")
+        self.places = {"Place.{}".format(i): place(str(i),
+                                                   price_by_night=i * 10)
+                       for i in range(10)}
+        self.index.build(self.places)
+
+    def keys(self, *args, **kwargs):
+        return [key for key, obj in self.index.scan(*args, **kwargs)]
+
+    def test_scan(self):
+        self.assertEqual(["Place.2", "Place.3", "Place.4"],
+                         self.keys(20, 40))
+        self.assertEqual(["Place.3"], self.keys(20, 40, low_inclusive=False,
+                                                high_inclusive=False))
+        self.assertEqual(["Place.9", "Place.8"], self.keys(80, reverse=True))
+        self.assertEqual(10, len(self.keys()))
+        self.assertEqual([], self.keys(45, 49))
+
+    def test_estimate(self):
+        self.assertEqual(3, self.index.estimate(20, 40))
+        self.assertEqual(5, self.index.estimate(high=45))
+        self.assertEqual(10, len(self.index))
+
+    def test_add_and_discard(self):
+        obj = self.places["Place.0"]
+        obj.price_by_night = 35
+        self.index.add("Place.0", obj)
+        self.assertEqual(["Place.3", "Place.0", "Place.4"],
+                         self.keys(30, 40))
+        self.index.discard("Place.3")
+        self.assertEqual(["Place.0", "Place.4"], self.keys(30, 40))
+        self.assertEqual(9, len(self.index))
+
+    def test_build_is_deferred(self):
+        index = RangeIndex("created_at")
+        index.build(self.places)
+        index.add("Place.10", place("10"))
+        index.discard("Place.0")
+        self.assertEqual(str, type(self.places["Place.1"]._created_at))
+        self.assertEqual(10, len(index))
+        self.assertEqual(tuple, type(self.places["Place.1"]._created_at))
+
+    def test_equal_values(self):
+        for key in ["Place.5", "Place.1", "Place.3"]:
+            obj = self.places[key]
+            obj.price_by_night = 25
+            self.index.add(key, obj)
+        self.assertEqual(["Place.1", "Place.3", "Place.5"], self.keys(25, 25))
+        self.index.discard("Place.3")
+        self.assertEqual(["Place.1", "Place.5"], self.keys(25, 25))
+
+    def test_unordered_values_are_skipped(self):
+        obj = self.places["Place.0"]
+        obj.price_by_night = "cheap"
+        self.index.add("Place.0", obj)
+        self.assertEqual(9, len(self.index))
+        self.assertEqual(["Place.0"], list(self.index.others()))
+        obj.price_by_night = float("nan")
+        self.index.add("Place.0", obj)
+        self.assertEqual(9, len(self.index))
+        obj.price_by_night = 5
+        self.index.add("Place.0", obj)
+        self.assertEqual({}, self.index.others())
+        obj.price_by_night = None
+        self.index.add("Place.0", obj)
+        self.index.discard("Place.0")
+        self.assertEqual({}, self.index.others())
+
+    def test_build_with_mixed_values(self):
+        self.places["Place.0"].price_by_night = "cheap"
+        self.index.build(self.places)
+        self.assertEqual(9, len(self.index))
+        self.assertEqual(["Place.1", "Place.2"], self.keys(10, 20))
+        self.assertEqual({"Place.0": self.places["Place.0"]},
+                         self.index.others())
+
+
+class TestPartitionedIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = PartitionedIndex("city_id", "price_by_night")
+        self.places = {"Place.{}".format(i): place(
+            str(i), city_id=str(i % 2), price_by_night=50 * (4 - i))
+            for i in range(4)}
+        self.index.build(self.places)
+
+    def keys(self, value):
+        return [key for key, obj in self.index.find(value).scan()]
+
+    def test_find(self):
+        self.assertEqual(["Place.2", "Place.0"], self.keys("0"))
+        self.assertEqual(["Place.3", "Place.1"], self.keys("1"))
+        self.assertIsNone(self.index.find("2"))
+        self.assertIsNone(self.index.find(["0"]))
+        self.assertEqual(4, len(self.index))
+
+    def test_add_moves_object(self):
+        obj = self.places["Place.0"]
+        obj.city_id = "1"
+        self.index.add("Place.0", obj)
+        self.assertEqual(["Place.2"], self.keys("0"))
+        self.assertEqual(["Place.3", "Place.1", "Place.0"], self.keys("1"))
+
+    def test_discard_drops_empty_partitions(self):
+        self.index.discard("Place.0")
+        self.index.discard("Place.0")
+        self.index.discard("Place.2")
+        self.assertIsNone(self.index.find("0"))
+        self.assertEqual(2, len(self.index))
+
+
+class TestBitmapIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = BitmapIndex("amenity_ids")
+        amenities = [["wifi", "tv"], ["wifi"], ["tv", "pets"], []]
+        self.places = {"Place.{}".format(i): place(str(i), amenity_ids=ids)
+                       for i, ids in enumerate(amenities)}
+        self.index.build(self.places)
+
+    def test_find(self):
+        self.assertEqual(["Place.0", "Place.1"],
+                         sorted(self.index.find(["wifi"])))
+        self.assertEqual(["Place.0"], list(self.index.find(["wifi", "tv"])))
+        self.assertEqual({}, self.index.find(["wifi", "pool"]))
+        self.assertEqual(4, len(self.index.find()))
+        self.assertEqual(2, self.index.estimate(["tv"]))
+
+    def test_numbers_and_bits(self):
+        self.assertEqual([0, 1, 2], [self.index.number(value) for value in
+                                     ("wifi", "tv", "pets")])
+        self.assertIsNone(self.index.number("pool"))
+        self.assertEqual(0b110, self.index.bits("Place.2"))
+        self.assertEqual(0, self.index.bits("Place.3"))
+
+    def test_add_replaces_values(self):
+        obj = self.places["Place.1"]
+        obj.amenity_ids = ["pets"]
+        self.index.add("Place.1", obj)
+        self.assertEqual(["Place.0"], list(self.index.find(["wifi"])))
+        self.assertEqual(["Place.1", "Place.2"],
+                         sorted(self.index.find(["pets"])))
+
+    def test_discard_reuses_row(self):
+        self.index.discard("Place.0")
+        self.index.discard("Place.0")
+        self.assertEqual(["Place.1"], list(self.index.find(["wifi"])))
+        self.index.add("Place.4", place("4", amenity_ids=["tv"]))
+        self.assertEqual(["Place.2", "Place.4"],
+                         sorted(self.index.find(["tv"])))
+        self.assertEqual(4, len(self.index))
+
+    def test_mask_and_counts(self):
+        mask = self.index.mask(keys=["Place.0", "Place.2"])
+        self.assertEqual({"wifi": 1, "tv": 2, "pets": 1},
+                         self.index.counts(mask))
+        self.assertEqual({"wifi": 2, "tv": 2, "pets": 1},
+                         self.index.counts())
+        self.assertEqual(["Place.2"], list(self.index.find(["pets"], mask)))
+
+    def test_positions(self):
+        self.assertEqual([], list(positions(0)))
+        self.assertEqual([0, 3, 64], list(positions(1 | 8 | 1 << 64)))
+
+
+class TestGeoIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = GeoIndex()
+        coordinates = {"lagos": (6.5244, 3.3792),
+                       "ikeja": (6.6018, 3.3515),
+                       "abuja": (9.0765, 7.3986),
+                       "fiji": (-17.7134, 178.0650),
+                       "samoa": (-13.7590, -172.1046)}
+        self.places = {name: place(name, latitude=lat, longitude=lon)
+                       for name, (lat, lon) in coordinates.items()}
+        self.index.build(self.places)
+
+    def keys(self, found):
+        return [key for distance, key, obj in found]
+
+    def test_haversine(self):
+        self.assertAlmostEqual(111.195, haversine(0, 0, 0, 1), places=3)
+        self.assertAlmostEqual(0, haversine(6.5, 3.3, 6.5, 3.3))
+
+    def test_nearby(self):
+        found = self.index.nearby(6.5244, 3.3792, 20)
+        self.assertEqual(["lagos", "ikeja"], self.keys(found))
+        self.assertAlmostEqual(0, found[0][0])
+        self.assertEqual(["lagos", "ikeja", "abuja"],
+                         self.keys(self.index.nearby(6.5, 3.3, 1000)))
+        self.assertEqual(["lagos"],
+                         self.keys(self.index.nearby(6.5, 3.3, 1000, 1)))
+        self.assertEqual([], self.keys(self.index.nearby(0, 0, 100)))
+
+    def test_nearby_across_antimeridian(self):
+        self.assertEqual(["fiji", "samoa"], self.keys(
+            self.index.nearby(-17.7, 179.9, 1500)))
+
+    def test_within_bbox(self):
+        self.assertEqual(["ikeja", "lagos"], self.keys(
+            self.index.within_bbox(6.55, 3.3, 6.7, 3.4)
+            + self.index.within_bbox(6.4, 3.3, 6.55, 3.4)))
+        self.assertEqual(["lagos", "ikeja", "abuja"], self.keys(
+            self.index.within_bbox(0, 0, 10, 10)))
+        self.assertEqual(["fiji", "samoa"], self.keys(
+            self.index.within_bbox(-20, 170, -10, -170)))
+
+    def test_add_and_discard(self):
+        obj = self.places["abuja"]
+        obj.latitude = 6.6
+        obj.longitude = 3.4
+        self.index.add("abuja", obj)
+        self.assertEqual(3, len(self.index.nearby(6.5, 3.3, 50)))
+        self.index.discard("lagos")
+        self.assertEqual(["ikeja", "abuja"],
+                         self.keys(self.index.nearby(6.6, 3.35, 50)))
+        self.assertEqual(4, len(self.index))
+
+    def test_invalid_coordinates_are_skipped(self):
+        obj = self.places["lagos"]
+        obj.latitude = "6.5"
+        self.index.add("lagos", obj)
+        self.assertEqual(4, len(self.index))
+
+
+class TestTextIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = TextIndex(["name", "description"])
+        self.places = {
+            "Place.0": place("0", name="Quiet loft",
+                             description="Fast wifi, quiet street"),
+            "Place.1": place("1", name="Beach house",
+                             description="Loud parties"),
+            "Place.2": place("2", name="Studio", description="Wifi")}
+        self.index.build(self.places)
+
+    def test_tokenize(self):
+        self.assertEqual(["fast", "wifi", "quiet_street", "2"],
+                         tokenize("Fast WiFi, quiet_street 2!"))
+
+    def test_search_ranks_matches(self):
+        found = self.index.search("quiet wifi")
+        self.assertEqual(["Place.0", "Place.2"], [key for s, key, o in found])
+        self.assertGreater(found[0][0], found[1][0])
+        self.assertIs(self.places["Place.0"], found[0][2])
+        self.assertEqual([], self.index.search("garden"))
+        self.assertEqual(1, len(self.index.search("wifi", limit=1)))
+
+    def test_add_and_discard(self):
+        obj = self.places["Place.1"]
+        obj.description = "Quiet"
+        self.index.add("Place.1", obj)
+        self.index.discard("Place.0")
+        self.assertEqual(["Place.1"],
+                         [key for s, key, o in self.index.search("quiet")])
+        self.assertEqual(2, len(self.index))
+
+    def test_dump_and_load(self):
+        other = TextIndex(["name", "description"])
+        other.load(self.index.dump())
+        self.assertFalse(other.changed)
+        self.assertEqual([], other.search("quiet"))
+        self.places["Place.2"].name = "Quiet studio"
+        del self.places["Place.1"]
+        other.build(self.places)
+        other.add("Place.2", self.places["Place.2"])
+        self.assertEqual(2, len(other))
+        self.assertEqual(["Place.0", "Place.2"],
+                         sorted(key for s, key, o in other.search("quiet")))
+
+
+if __name__ == "__main__":
+    unittest.main()
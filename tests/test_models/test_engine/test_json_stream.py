@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+"""This module contains unittest code for the json_stream module"""
+
+from io import StringIO
+import json
+import os
+import tempfile
+from models.engine.json_stream import atomic_writer, iter_entries
+import unittest
+from tests import setUpModule, tearDownModule
+
+
+class TestIterEntries(unittest.TestCase):
+
+    def entries(self, text, chunk_size=4):
+        return list(iter_entries(StringIO(text), chunk_size))
+
+    def test_entries(self):
+        text = ' {"User.1": {"id": "1", "name": "a \\"b\\" {"},\n' \
+            '"User.2" : {"id": "2"} } \n'
+        entries = self.entries(text)
+        self.assertEqual(["User.1", "User.2"], [key for key, v, t in entries])
+        self.assertEqual({"id": "1", "name": 'a "b" {'}, entries[0][1])
+        self.assertEqual('{"id": "2"}', entries[1][2])
+        self.assertEqual(entries, self.entries(text, 1 << 20))
+
+    def test_values_split_across_chunks(self):
+        text = '{"a": 12345, "b": -6.5e3, "c": true, "d": "xyz"}'
+        for chunk_size in range(1, len(text) + 1):
+            self.assertEqual(json.loads(text), {
+                key: value for key, value, t in self.entries(text,
+                                                             chunk_size)})
+
+    def test_empty_object(self):
+        self.assertEqual([], self.entries("{}"))
+        self.assertEqual([], self.entries("  {\n }  "))
+
+    def test_large_file(self):
+        data = {"Place.{}".format(i): {"id": str(i), "name": "x" * i}
+                for i in range(200)}
+        entries = self.entries(json.dumps(data), 64)
+        self.assertEqual(data, {key: value for key, value, t in entries})
+        self.assertEqual(data, {key: json.loads(text)
+                                for key, v, text in entries})
+
+    def test_invalid_data(self):
+        for text in ["", "[]", '{"a": {}', '{"a" {}}', '{"a": {}, }',
+                     '{1: {}}', '{"a": {}} []', '{"a": {"b": }}']:
+            with self.assertRaises(ValueError):
+                self.entries(text)
+
+
+class TestAtomicWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "file.json")
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write("old")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def read(self):
+        with open(self.path, "r", encoding="utf-8") as file:
+            return file.read()
+
+    def test_replaces_file(self):
+        with atomic_writer(self.path, 4) as outfile:
+            for i in range(10):
+                outfile.write(str(i))
+            self.assertEqual("old", self.read())
+        self.assertEqual("0123456789", self.read())
+        self.assertEqual(["file.json"], os.listdir(self.tmpdir.name))
+
+    def test_keeps_file_on_error(self):
+        with self.assertRaises(ValueError):
+            with atomic_writer(self.path) as outfile:
+                outfile.write("new")
+                raise ValueError
+        self.assertEqual("old", self.read())
+        self.assertEqual(["file.json"], os.listdir(self.tmpdir.name))
+
+
+if __name__ == "__main__":
+    unittest.main()
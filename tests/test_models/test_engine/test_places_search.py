@@ -0,0 +1,108 @@
+#!/usr/bin/python3
+"""This module contains unittest code for the places_search module"""
+
+import models
+from models.engine.places_search import bucket_labels, places_search
+from models.amenity import Amenity
+from models.city import City
+from models.place import Place
+from models.state import State
+import unittest
+from tests import setUpModule, tearDownModule
+
+
+class TestPlacesSearch(unittest.TestCase):
+
+    def setUp(self):
+        models.storage.all().clear()
+        self.states = []
+        self.cities = []
+        for name in ("Lagos", "Oyo"):
+            state = State()
+            state.name = name
+            state.save()
+            self.states.append(state)
+            city = City()
+            city.name = name + " city"
+            city.state_id = state.id
+            city.save()
+            self.cities.append(city)
+        self.wifi = Amenity()
+        self.wifi.save()
+        self.pool = Amenity()
+        self.pool.save()
+        self.places = []
+        for i, price in enumerate([20, 80, 150, 50, 600, 120]):
+            place = Place()
+            place.name = "place-{}".format(i)
+            place.price_by_night = price
+            place.max_guest = i
+            place.city_id = self.cities[i % 2].id
+            place.amenity_ids = [self.wifi.id] + \
+                ([self.pool.id] if i % 3 == 0 else [])
+            place.save()
+            self.places.append(place)
+
+    def names(self, found):
+        return [place.name for place in found["places"]]
+
+    def test_no_filter(self):
+        found = models.storage.places_search(per_page=4)
+        self.assertEqual(6, found["total"])
+        self.assertEqual(["place-0", "place-3", "place-1", "place-5"],
+                         self.names(found))
+        self.assertEqual({self.wifi.id: 6, self.pool.id: 2},
+                         found["facets"]["amenities"])
+        self.assertEqual({"0-50": 1, "50-100": 2, "100-200": 2,
+                          "200-500": 0, "500+": 1}, found["facets"]["price"])
+
+    def test_states_and_cities(self):
+        found = models.storage.places_search(states=[self.states[0].id])
+        self.assertEqual(["place-0", "place-2", "place-4"],
+                         self.names(found))
+        found = models.storage.places_search(
+            states=[self.states[0].id], cities=[self.cities[1].id])
+        self.assertEqual(6, found["total"])
+        found = models.storage.places_search(states=["unknown"])
+        self.assertEqual((0, []), (found["total"], found["places"]))
+
+    def test_amenities_price_and_guests(self):
+        found = models.storage.places_search(
+            amenities=[self.wifi.id, self.pool.id])
+        self.assertEqual(["place-0", "place-3"], self.names(found))
+        found = models.storage.places_search(price_range=(50, 150),
+                                             max_guest=2)
+        self.assertEqual(["place-3", "place-5", "place-2"],
+                         self.names(found))
+        self.assertEqual({self.wifi.id: 3, self.pool.id: 1},
+                         found["facets"]["amenities"])
+        self.assertEqual({"0-50": 0, "50-100": 1, "100-200": 2,
+                          "200-500": 0, "500+": 0}, found["facets"]["price"])
+        found = models.storage.places_search(price_range=(None, 50))
+        self.assertEqual(["place-0", "place-3"], self.names(found))
+
+    def test_pages(self):
+        found = models.storage.places_search(page=2, per_page=4)
+        self.assertEqual(["place-2", "place-4"], self.names(found))
+        found = models.storage.places_search(max_guest=0, page=2,
+                                             per_page=4)
+        self.assertEqual(["place-2", "place-4"], self.names(found))
+        self.assertEqual((2, 4, 6), (found["page"], found["per_page"],
+                                     found["total"]))
+        with self.assertRaises(ValueError):
+            models.storage.places_search(page=0)
+        with self.assertRaises(ValueError):
+            models.storage.places_search(per_page=0)
+
+    def test_places_without_price(self):
+        self.places[1].price_by_night = "free"
+        self.places[1].save()
+        found = models.storage.places_search()
+        self.assertEqual("place-1", self.names(found)[-1])
+        self.assertEqual(1, found["facets"]["price"]["50-100"])
+
+    def test_buckets(self):
+        self.assertEqual(["0-100", "100+"], bucket_labels((0, 100)))
+        found = places_search(models.storage, max_guest=0,
+                              buckets=[0, 100])
+        self.assertEqual({"0-100": 3, "100+": 3}, found["facets"]["price"])
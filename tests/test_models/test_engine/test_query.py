@@ -0,0 +1,165 @@
+#!/usr/bin/python3
+"""This module contains unittest code for the query module"""
+
+import models
+from models.engine.query import Query
+from models.place import Place
+from models.user import User
+import unittest
+from tests import setUpModule, tearDownModule
+
+
+class TestQuery(unittest.TestCase):
+
+    def setUp(self):
+        models.storage.all().clear()
+        self.places = []
+        for i, price in enumerate([80, 20, 150, 50, 120, 50]):
+            place = Place()
+            place.price_by_night = price
+            place.city_id = "city-{}".format(i % 2)
+            place.max_guest = i
+            place.name = "place-{}".format(i)
+            place.save()
+            self.places.append(place)
+
+    def names(self, query):
+        return [place.name for place in query]
+
+    def test_query_type(self):
+        self.assertEqual(Query, type(models.storage.query(Place)))
+
+    def test_where_eq(self):
+        query = models.storage.query(Place).where(city_id="city-1")
+        self.assertEqual(["place-1", "place-3", "place-5"],
+                         sorted(self.names(query)))
+
+    def test_where_operators(self):
+        query = models.storage.query(Place).where(price_by_night__gte=50,
+                                                  price_by_night__lt=120)
+        self.assertEqual(["place-0", "place-3", "place-5"],
+                         sorted(self.names(query)))
+        query = models.storage.query(Place).where(max_guest__in=[1, 2],
+                                                  name__ne="place-1")
+        self.assertEqual(["place-2"], self.names(query))
+
+    def test_where_contains(self):
+        for i, place in enumerate(self.places):
+            place.amenity_ids = ["wifi", "tv"][:i % 3]
+            place.save()
+        query = models.storage.query(Place).where(
+            amenity_ids__contains=["wifi", "tv"])
+        self.assertEqual(["place-2", "place-5"], sorted(self.names(query)))
+        plan = query.explain()
+        self.assertEqual(("bitmap index", "Place.amenity_ids", 2),
+                         (plan["plan"], plan["index"],
+                          plan["estimated_rows"]))
+        query = models.storage.query(Place).where(
+            amenity_ids__contains=["wifi"], city_id="city-0")
+        self.assertEqual(["place-2", "place-4"], sorted(self.names(query)))
+
+    def test_unknown_operator(self):
+        with self.assertRaises(ValueError):
+            models.storage.query(Place).where(name__like="place")
+
+    def test_order_by_and_limit(self):
+        query = models.storage.query(Place).order_by("price_by_night")
+        self.assertEqual([20, 50, 50, 80, 120, 150],
+                         [place.price_by_night for place in query])
+        query = models.storage.query(Place).where(city_id="city-0") \
+            .order_by("-price_by_night").limit(2)
+        self.assertEqual(["place-2", "place-4"], self.names(query))
+        query = models.storage.query(Place).order_by("-name").limit(1)
+        self.assertEqual(["place-5"], self.names(query))
+
+    def test_first_and_all(self):
+        query = models.storage.query(Place).order_by("price_by_night")
+        self.assertEqual("place-1", query.first().name)
+        self.assertEqual(6, len(query.all()))
+        self.assertIsNone(
+            models.storage.query(User).where(email="nobody").first())
+
+    def test_results_are_lazy(self):
+        query = iter(models.storage.query(Place).order_by("price_by_night"))
+        self.assertEqual("place-1", next(query).name)
+
+    def test_explain_hash_index(self):
+        plan = models.storage.query(Place).where(
+            city_id="city-1", price_by_night__gte=0).explain()
+        self.assertEqual("hash index", plan["plan"])
+        self.assertEqual("Place.city_id", plan["index"])
+        self.assertEqual(3, plan["estimated_rows"])
+
+    def test_explain_range_index(self):
+        plan = models.storage.query(Place).where(
+            name__ne="place-0", price_by_night__gt=100).explain()
+        self.assertEqual("range index", plan["plan"])
+        self.assertEqual("Place.price_by_night", plan["index"])
+        self.assertEqual(2, plan["estimated_rows"])
+        self.assertIsNone(plan["order"])
+
+    def test_explain_partitioned_index(self):
+        plan = models.storage.query(Place).where(
+            city_id="city-1", price_by_night__gt=100).explain()
+        self.assertEqual("partitioned index", plan["plan"])
+        self.assertEqual("Place.price_by_night per city_id", plan["index"])
+        self.assertEqual(0, plan["estimated_rows"])
+        plan = models.storage.query(Place).where(city_id="city-0") \
+            .order_by("-price_by_night").limit(2).explain()
+        self.assertEqual(("partitioned index", "index", 2),
+                         (plan["plan"], plan["order"], plan["limit"]))
+
+    def test_top_k_per_city(self):
+        query = models.storage.query(Place).where(city_id="city-1") \
+            .order_by("price_by_night").limit(2)
+        self.assertEqual([20, 50], [place.price_by_night for place in query])
+        self.places[1].city_id = "city-0"
+        self.places[1].save()
+        self.assertEqual(["place-3", "place-5"], sorted(self.names(query)))
+        query = models.storage.query(Place).where(city_id="city-0") \
+            .order_by("-created_at").limit(2)
+        self.assertEqual(["place-4", "place-2"], self.names(query))
+        self.assertEqual([], self.names(models.storage.query(Place).where(
+            city_id="city-9").order_by("price_by_night").limit(2)))
+
+    def test_explain_ordered_index(self):
+        plan = models.storage.query(Place).order_by("created_at") \
+            .limit(2).explain()
+        self.assertEqual("range index", plan["plan"])
+        self.assertEqual("Place.created_at", plan["index"])
+        self.assertEqual("index", plan["order"])
+
+    def test_order_by_keeps_missing_values(self):
+        self.places[1].price_by_night = None
+        self.places[1].save()
+        query = models.storage.query(Place).order_by("price_by_night")
+        self.assertEqual([50, 50, 80, 120, 150, None],
+                         [place.price_by_night for place in query])
+        self.assertEqual("index", query.explain()["order"])
+        query = models.storage.query(Place).order_by("-price_by_night")
+        self.assertEqual([None, 150, 120, 80, 50, 50],
+                         [place.price_by_night for place in query])
+        self.assertEqual("index", query.explain()["order"])
+        query = models.storage.query(Place).where(city_id="city-1") \
+            .order_by("price_by_night").limit(3)
+        self.assertEqual(["place-3", "place-5", "place-1"],
+                         sorted(self.names(query)[:2]) + self.names(query)[2:])
+        self.assertEqual("index", query.explain()["order"])
+        self.assertEqual("Place.price_by_night per city_id",
+                         query.explain()["index"])
+        query = models.storage.query(Place).where(city_id="city-0") \
+            .order_by("price_by_night").limit(1)
+        self.assertEqual(["place-0"], self.names(query))
+        self.assertEqual("index", query.explain()["order"])
+
+    def test_explain_scan(self):
+        plan = models.storage.query(Place).where(name="place-1") \
+            .order_by("name").limit(3).explain()
+        self.assertEqual("class scan", plan["plan"])
+        self.assertEqual(6, plan["estimated_rows"])
+        self.assertEqual("top-k heap", plan["order"])
+        self.assertEqual(3, plan["limit"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+"""This module contains unittest code for the segments module"""
+
+import json
+import os
+import tempfile
+from models.engine.binary_format import json_to_binary
+from models.engine.segments import read_segment, read_segments, \
+    segment_of, segment_paths
+import unittest
+from tests import setUpModule, tearDownModule
+
+
+class TestSegmentPaths(unittest.TestCase):
+
+    def test_paths(self):
+        self.assertEqual(["file.json"], segment_paths("file.json", 1))
+        self.assertEqual(["file.json.0", "file.json.1"],
+                         segment_paths("file.json", 2))
+
+    def test_segment_of(self):
+        self.assertEqual(0, segment_of("User.1", 1))
+        segments = [segment_of("User.{}".format(i), 4) for i in range(100)]
+        self.assertEqual({0, 1, 2, 3}, set(segments))
+        self.assertEqual(segments,
+                         [segment_of("User.{}".format(i), 4)
+                          for i in range(100)])
+
+
+class TestReadSegments(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.paths = []
+        for i in range(3):
+            path = os.path.join(self.dir.name, "file.json.{}".format(i))
+            with open(path, "w") as outfile:
+                json.dump({"User.{}{}".format(i, j): {
+                    "__class__": "User", "id": "{}{}".format(i, j),
+                    "created_at": "2017-09-28T21:05:54.119427",
+                    "first_name": "Betty"} for j in range(2)}, outfile)
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_read_json_segment(self):
+        schemas, rows = read_segment(self.paths[0])
+        self.assertEqual(b"", schemas)
+        self.assertEqual(["User.00", "User.01"], [row[0] for row in rows])
+        key, name, attrs, fragment = rows[0]
+        self.assertEqual("User", name)
+        self.assertEqual("2017-09-28T21:05:54.119427", attrs["created_at"])
+        self.assertEqual("00", json.loads("{" + fragment + "}")[key]["id"])
+
+    def test_read_binary_segment(self):
+        path = os.path.join(self.dir.name, "file.bin")
+        json_to_binary(self.paths[1], path)
+        schemas, rows = read_segment(path, "binary")
+        self.assertTrue(schemas)
+        self.assertEqual(["User.10", "User.11"], [row[0] for row in rows])
+        self.assertEqual("Betty", rows[0][2]["first_name"])
+
+    def test_read_segments_in_workers(self):
+        results = list(read_segments(self.paths, workers=2))
+        self.assertEqual([read_segment(path) for path in self.paths],
+                         results)
+        self.assertEqual(results, list(read_segments(self.paths, workers=1)))
+
+    def test_missing_segment(self):
+        with self.assertRaises(FileNotFoundError):
+            list(read_segments(self.paths + [self.paths[0] + "x"],
+                               workers=2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,225 @@
+#!/usr/bin/python3
+"""This module contains unittest code for the sqlite_storage module"""
+
+import os
+import sqlite3
+import tempfile
+from unittest.mock import patch
+from models.engine.sqlite_storage import SQLiteStorage
+from models.user import User
+from models.state import State
+from models.city import City
+from models.place import Place
+import unittest
+from tests import setUpModule, tearDownModule
+
+
+class TestSQLiteStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "hbnb.db")
+        self.storage = SQLiteStorage(self.db_path)
+        self.storage.reload()
+        patcher = patch("models.storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.storage.close()
+        self.tmpdir.cleanup()
+
+    def rows(self, table):
+        with sqlite3.connect(self.db_path) as connection:
+            return connection.execute(
+                'SELECT id FROM "{}"'.format(table)).fetchall()
+
+    def test_tables_and_wal(self):
+        with sqlite3.connect(self.db_path) as connection:
+            tables = {row[0] for row in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'")}
+            mode = connection.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual({"BaseModel", "User", "State", "City", "Amenity",
+                          "Place", "Review"}, tables)
+        self.assertEqual("wal", mode)
+
+    def test_new_and_save(self):
+        user = User()
+        self.assertEqual([], self.rows("User"))
+        self.storage.save()
+        self.assertEqual([(user.id,)], self.rows("User"))
+
+    def test_get_loads_lazily(self):
+        user = User()
+        user.first_name = "Betty"
+        self.storage.save()
+        self.storage.reload()
+        obj = self.storage.get(User, user.id)
+        self.assertIsNot(user, obj)
+        self.assertEqual("Betty", obj.first_name)
+        self.assertEqual(user.created_at, obj.created_at)
+        self.assertIs(obj, self.storage.get(User, user.id))
+        self.assertIsNone(self.storage.get(State, user.id))
+
+    def test_all(self):
+        user = User()
+        state = State()
+        self.storage.save()
+        self.storage.reload()
+        keys = self.storage.all().keys()
+        self.assertIn("User.{}".format(user.id), keys)
+        self.assertIn("State.{}".format(state.id), keys)
+
+    def test_all_with_class_and_count(self):
+        users = [User() for i in range(2)]
+        State()
+        self.storage.save()
+        self.storage.reload()
+        self.assertEqual(2, self.storage.count(User))
+        self.assertEqual({"User.{}".format(user.id) for user in users},
+                         set(self.storage.all(User).keys()))
+        self.assertEqual(1, self.storage.count(State))
+        self.assertEqual(3, self.storage.count())
+
+    def test_count_does_not_load_objects(self):
+        users = [User() for i in range(3)]
+        self.storage.save()
+        self.storage.reload()
+        self.storage.get(User, users[0].id).first_name = "Betty"
+        self.storage.delete(self.storage.get(User, users[1].id))
+        User()
+        with patch.object(User, "__init__") as init:
+            self.assertEqual(3, self.storage.count(User))
+            self.assertEqual(3, self.storage.count())
+        init.assert_not_called()
+        self.assertEqual(3, len(self.storage.all(User)))
+        self.assertEqual(3, self.storage.count(User))
+
+    def test_all_returns_a_copy(self):
+        user = User()
+        self.storage.all().clear()
+        self.assertIs(user, self.storage.get(User, user.id))
+        self.assertEqual(1, self.storage.count())
+
+    def test_find_by(self):
+        cities = [City() for i in range(3)]
+        for city in cities[:2]:
+            city.state_id = "1"
+        self.storage.save()
+        self.storage.reload()
+        city = City()
+        city.state_id = "1"
+        found = self.storage.find_by(City, "state_id", "1")
+        self.assertEqual({"City.{}".format(obj.id)
+                          for obj in cities[:2] + [city]}, set(found))
+        self.storage.delete(found["City.{}".format(cities[0].id)])
+        self.assertEqual(2, len(self.storage.find_by(City, "state_id", "1")))
+
+    def test_find_range(self):
+        for price in [80, 20, 150, 50]:
+            place = Place()
+            place.price_by_night = price
+        self.storage.save()
+        self.storage.reload()
+        place = Place()
+        place.price_by_night = 60
+        found = self.storage.find_range(Place, "price_by_night", 50, 100)
+        self.assertEqual([50, 60, 80], [obj.price_by_night for obj in found])
+        found = self.storage.find_range(Place, "price_by_night", limit=2,
+                                        reverse=True)
+        self.assertEqual([150, 80], [obj.price_by_night for obj in found])
+        self.assertEqual([place], self.storage.find_range(
+            Place, "created_at", low=place.created_at))
+
+    def test_save_only_writes_dirty_objects(self):
+        users = [User() for i in range(3)]
+        self.storage.save()
+        users[1].first_name = "Betty"
+        with patch.object(User, "to_dict", wraps=users[1].to_dict) as to_dict:
+            self.storage.save()
+        self.assertEqual(1, to_dict.call_count)
+
+    def test_update(self):
+        user = User()
+        self.storage.save()
+        user.first_name = "Betty"
+        user.save()
+        self.storage.reload()
+        self.assertEqual("Betty",
+                         self.storage.get(User, user.id).first_name)
+
+    def test_delete(self):
+        city = City()
+        self.storage.save()
+        self.storage.delete(city)
+        self.assertIsNone(self.storage.get(City, city.id))
+        self.storage.save()
+        self.assertEqual([], self.rows("City"))
+
+    def test_batch_rollback(self):
+        user = User()
+        user.first_name = "Betty"
+        state = State()
+        self.storage.save()
+        with self.assertRaises(ValueError):
+            with self.storage.batch():
+                user.first_name = "Holberton"
+                user.save()
+                self.storage.delete(state)
+                city = City()
+                raise ValueError
+        self.assertEqual("Betty", user.first_name)
+        self.assertIs(state, self.storage.get(State, state.id))
+        self.assertIsNone(self.storage.get(City, city.id))
+
+    def test_batch_commits_on_exit(self):
+        with self.storage.batch():
+            user = User()
+            user.save()
+            self.assertEqual([], self.rows("User"))
+        self.assertEqual([(user.id,)], self.rows("User"))
+
+    def test_aggregate(self):
+        city = City()
+        city.name = "Ikeja"
+        for price in (80, 20):
+            place = Place()
+            place.city_id = city.id
+            place.price_by_night = price
+        self.storage.save()
+        self.storage.reload()
+        groups = self.storage.aggregate(Place, group_by="city_id",
+                                        metrics={"avg": "price_by_night"},
+                                        label="name")
+        self.assertEqual({city.id: {"avg": 50.0, "label": "Ikeja"}}, groups)
+
+    def test_search(self):
+        place = Place()
+        place.name = "Sunny loft"
+        Place().name = "Dark cellar"
+        self.storage.save()
+        self.storage.reload()
+        self.assertEqual([place.id], [obj.id for obj in
+                                      self.storage.search(Place, "LOFT")])
+        self.assertEqual([], self.storage.search(User, "loft"))
+
+    def test_places_search(self):
+        state = State()
+        city = City()
+        city.state_id = state.id
+        for price in (80, 20, 150):
+            place = Place()
+            place.city_id = city.id
+            place.price_by_night = price
+            place.amenity_ids = ["wifi"]
+        self.storage.save()
+        self.storage.reload()
+        found = self.storage.places_search(states=[state.id],
+                                           price_range=(50, None))
+        self.assertEqual([80, 150], [place.price_by_night
+                                     for place in found["places"]])
+        self.assertEqual({"wifi": 2}, found["facets"]["amenities"])
+
+
+if __name__ == "__main__":
+    unittest.main()
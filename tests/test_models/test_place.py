@@ -9,14 +9,22 @@ from time import sleep
 from unittest.mock import patch
 import uuid
 from models.place import Place
+from models.amenity import Amenity
+from models.review import Review
 from models.engine.file_storage import FileStorage
 from datetime import datetime
 
 import unittest
+import tests
+from tests import tearDownModule
 
 storage = FileStorage()
-storage.all().clear()
-storage.save()
+
+
+def setUpModule():
+    tests.setUpModule()
+    storage.all().clear()
+    storage.save()
 
 
 def fake_uuid4():
@@ -156,6 +164,13 @@ class TestPlaceInit(unittest.TestCase):
         self.assertTrue("amenity_ids" not in obj.__dict__.keys())
         self.assertTrue("amenity_ids" in dir(obj))
 
+    def test_amenity_ids_are_not_shared(self):
+        obj = Place()
+        obj.amenity_ids.append("wifi")
+        self.assertEqual(["wifi"], obj.to_dict()["amenity_ids"])
+        self.assertEqual([], Place().amenity_ids)
+        self.assertEqual([], Place.amenity_ids)
+
     def test_init_with_kwargs_id(self):
         obj_id = str(uuid.uuid4())
         obj = Place(id=obj_id)
@@ -340,5 +355,37 @@ class TestPlaceToDict(unittest.TestCase):
         self.assertIn("name", obj.to_dict().keys())
 
 
+class TestPlaceRelationships(unittest.TestCase):
+    def setUp(self):
+        storage.all().clear()
+
+    def test_reviews(self):
+        place = Place()
+        reviews = [Review() for i in range(2)]
+        for review in reviews:
+            review.place_id = place.id
+            review.save()
+        Review()
+        self.assertCountEqual(reviews, place.reviews)
+
+    def test_review_count(self):
+        places = [Place() for i in range(3)]
+        for i, place in enumerate(places):
+            for j in range(i):
+                Review().place_id = place.id
+        self.assertEqual([0, 1, 2], [place.review_count for place in places])
+        query = storage.query(Place).order_by("-review_count").limit(2)
+        self.assertEqual(places[:0:-1], query.all())
+
+    def test_amenities(self):
+        place = Place()
+        wifi = Amenity()
+        tv = Amenity()
+        Amenity()
+        place.amenity_ids = [wifi.id, tv.id, "missing"]
+        self.assertEqual([wifi, tv], place.amenities)
+        self.assertEqual([], Place().amenities)
+
+
 if __name__ == "__main__":
     unittest.main()
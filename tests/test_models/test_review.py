@@ -12,10 +12,16 @@ import uuid
 from models.engine.file_storage import FileStorage
 from datetime import datetime
 import unittest
+import tests
+from tests import tearDownModule
 
 storage = FileStorage()
-storage.all().clear()
-storage.save()
+
+
+def setUpModule():
+    tests.setUpModule()
+    storage.all().clear()
+    storage.save()
 
 
 def fake_uuid4():
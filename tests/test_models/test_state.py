@@ -9,13 +9,20 @@ from time import sleep
 from unittest.mock import patch
 import uuid
 from models.state import State
+from models.city import City
 from models.engine.file_storage import FileStorage
 from datetime import datetime
 import unittest
+import tests
+from tests import tearDownModule
 
 storage = FileStorage()
-storage.all().clear()
-storage.save()
+
+
+def setUpModule():
+    tests.setUpModule()
+    storage.all().clear()
+    storage.save()
 
 
 def fake_uuid4():
@@ -229,5 +236,24 @@ class TestStateToDict(unittest.TestCase):
         self.assertIn("name", obj.to_dict().keys())
 
 
+class TestStateCities(unittest.TestCase):
+    def setUp(self):
+        storage.all().clear()
+
+    def test_cities(self):
+        state = State()
+        cities = [City() for i in range(3)]
+        for city in cities[:2]:
+            city.state_id = state.id
+            city.save()
+        self.assertCountEqual(cities[:2], state.cities)
+        cities[0].state_id = "other"
+        cities[0].save()
+        self.assertEqual([cities[1]], state.cities)
+
+    def test_no_cities(self):
+        self.assertEqual([], State().cities)
+
+
 if __name__ == "__main__":
     unittest.main()
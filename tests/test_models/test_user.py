@@ -9,13 +9,21 @@ from time import sleep
 from unittest.mock import patch
 import uuid
 from models.user import User
+from models.place import Place
+from models.review import Review
 from models.engine.file_storage import FileStorage
 from datetime import datetime
 import unittest
+import tests
+from tests import tearDownModule
 
 storage = FileStorage()
-storage.all().clear()
-storage.save()
+
+
+def setUpModule():
+    tests.setUpModule()
+    storage.all().clear()
+    storage.save()
 
 
 def fake_uuid4():
@@ -251,5 +259,22 @@ class TestUserToDict(unittest.TestCase):
         self.assertIn("name", obj.to_dict().keys())
 
 
+class TestUserRelationships(unittest.TestCase):
+    def setUp(self):
+        storage.all().clear()
+
+    def test_places_and_reviews(self):
+        user = User()
+        place = Place()
+        place.user_id = user.id
+        place.save()
+        review = Review()
+        review.user_id = user.id
+        review.save()
+        self.assertEqual([place], user.places)
+        self.assertEqual([review], user.reviews)
+        self.assertEqual([], User().places)
+
+
 if __name__ == "__main__":
     unittest.main()